@@ -0,0 +1,115 @@
+"""配置服务性能基准
+
+用法(在 backend 目录下)：
+    python -m benchmarks                                  # 运行并与基线对比，出现回归时退出码为1
+    python -m benchmarks --sizes 10,1000,10000,100000     # 指定配置库规模
+    python -m benchmarks --backends json,sqlite           # 同时测试sqlite后端
+    python -m benchmarks --usage-mb 512                   # 用量索引使用512MB的模拟transcript(0为跳过)
+    python -m benchmarks --cli-runs 50                    # 命令行工具冷启动的测量次数(0为跳过)
+    python -m benchmarks --save-baseline                  # 把本次结果写为新基线
+"""
+import argparse
+import platform
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+from modules.api_config.watcher import FileWatcher
+from .cli_startup import run_cli_benchmarks
+from .common import find_regressions, load_baseline, save_results, seed_manager
+from .manager_ops import run_manager_benchmarks
+from .route_load import run_route_benchmarks
+from .serialization import run_serialization_benchmarks
+from .usage_index import run_usage_benchmarks
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+
+def default_iterations(size: int) -> int:
+    """规模越大单次写入越慢，相应减少迭代次数"""
+    return max(3, min(100, 200_000 // max(size, 1)))
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="ApiConfigManager 性能基准")
+    parser.add_argument("--sizes", default="10,1000,10000", help="配置库规模，逗号分隔")
+    parser.add_argument("--backends", default="json", help="存储后端：json,sqlite")
+    parser.add_argument("--iterations", type=int, default=None, help="每个操作的迭代次数，默认按规模自动选择")
+    parser.add_argument("--concurrency", type=int, default=32, help="路由压测的并发客户端数")
+    parser.add_argument("--requests", type=int, default=20, help="每个并发客户端的请求数")
+    parser.add_argument("--rounds", type=int, default=3, help="路由压测重复轮数，取中位数")
+    parser.add_argument("--usage-mb", type=int, default=32, help="用量索引基准的模拟transcript大小(MB)，0为跳过")
+    parser.add_argument("--cli-runs", type=int, default=20, help="命令行工具冷启动基准的测量次数，0为跳过")
+    parser.add_argument("--skip-routes", action="store_true", help="只测试管理器操作")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="基线文件")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果写入基线文件")
+    parser.add_argument("--output", type=Path, default=None, help="另存本次结果")
+    parser.add_argument("--metric", default="p50_ms", help="回归判断使用的指标")
+    parser.add_argument("--threshold", type=float, default=0.5, help="允许的相对变慢比例(0.5表示50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="忽略小于该绝对差值的变化")
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+    backends = [backend.strip() for backend in args.backends.split(",") if backend.strip()]
+    results: Dict[str, dict] = {}
+    watcher = FileWatcher()
+
+    try:
+        with tempfile.TemporaryDirectory(prefix="ccm-bench-") as tmp:
+            for backend in backends:
+                for size in sizes:
+                    iterations = args.iterations or default_iterations(size)
+                    print(f"▶ {backend} / {size} 个配置 / 每项 {iterations} 次")
+                    manager = seed_manager(backend, size, Path(tmp) / f"{backend}-{size}", watcher)
+                    group = run_manager_benchmarks(manager, iterations)
+                    group.update(run_serialization_benchmarks(manager, iterations))
+                    if not args.skip_routes:
+                        group.update(run_route_benchmarks(manager, args.concurrency, args.requests, args.rounds))
+                    for op, stats in group.items():
+                        results[f"{backend}/{size}/{op}"] = stats
+            if args.usage_mb > 0:
+                print(f"▶ 用量索引 / {args.usage_mb}MB transcript")
+                for op, stats in run_usage_benchmarks(Path(tmp) / "usage", args.usage_mb).items():
+                    results[f"usage/{args.usage_mb}MB/{op}"] = stats
+            if args.cli_runs > 0:
+                print(f"▶ 命令行工具冷启动 / {args.cli_runs} 次")
+                workdir = Path(tmp) / "cli"
+                workdir.mkdir()
+                for op, stats in run_cli_benchmarks(workdir, args.cli_runs).items():
+                    results[f"cli/{op}"] = stats
+    finally:
+        watcher.stop()
+
+    baseline = load_baseline(args.baseline)
+    print(f"\n{'操作':<40}{'p50(ms)':>10}{'p95(ms)':>10}{'ops/s':>10}{'基线p50':>10}")
+    for key, stats in sorted(results.items()):
+        base = baseline.get(key, {}).get(args.metric)
+        print(f"{key:<40}{stats['p50_ms']:>10.3f}{stats['p95_ms']:>10.3f}"
+              f"{stats['ops_per_sec'] or 0:>10.1f}{base if base is not None else '-':>10}")
+
+    meta = {
+        "created_at": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": sizes,
+        "backends": backends
+    }
+    if args.output:
+        save_results(args.output, results, meta)
+    if args.save_baseline:
+        save_results(args.baseline, results, meta)
+        print(f"\n已写入基线: {args.baseline}")
+        return 0
+
+    regressions = find_regressions(results, baseline, args.metric, args.threshold, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ {len(regressions)} 项超过回归阈值({args.threshold:.0%})：")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\n✅ 未发现性能回归" if baseline else "\n(没有基线，可用 --save-baseline 生成)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from .common import summarize
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+CLI = str(BACKEND_DIR / "cli.py")
+
+def run_cold(args: List[str], env: dict) -> float:
+    """启动一个新的解释器执行命令，返回墙钟耗时(秒)"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, *args], env=env, cwd=BACKEND_DIR, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+def run_cli_benchmarks(workdir: Path, runs: int = 20) -> Dict[str, dict]:
+    """命令行工具的冷启动耗时
+
+    python_startup 为空解释器的启动耗时(下限)；server_import 为导入 main.py(FastAPI/uvicorn/Pydantic)的耗时，
+    即原先必须启动服务才能切换配置时的最低启动成本。cli_switch 交替切换两个配置，每次都实际写入。
+    """
+    data_dir = workdir / "data"
+    env = dict(os.environ, HOME=str(workdir))
+    cli = [CLI, "--data-dir", str(data_dir)]
+    seed = workdir / "profiles.ndjson"
+    seed.write_text(
+        '{"name": "bench-a", "api_key": "sk-bench-0000000001", "base_url": "https://a.example.com"}\n'
+        '{"name": "bench-b", "api_key": "sk-bench-0000000002", "base_url": "https://b.example.com"}\n',
+        encoding="utf-8"
+    )
+    subprocess.run([sys.executable, *cli, "import", str(seed)], env=env, check=True, stdout=subprocess.DEVNULL)
+
+    scenarios = {
+        "python_startup": lambda i: ["-c", "pass"],
+        "server_import": lambda i: ["-c", "import main"],
+        "cli_current": lambda i: [*cli, "current"],
+        "cli_list": lambda i: [*cli, "list"],
+        "cli_switch": lambda i: [*cli, "switch", "bench-a" if i % 2 else "bench-b"],
+    }
+    results = {}
+    for name, make_args in scenarios.items():
+        run_cold(make_args(0), env)  # 预热文件系统缓存
+        count = max(3, runs // 4) if name == "server_import" else runs
+        results[name] = summarize([run_cold(make_args(i), env) for i in range(count)])
+    return results
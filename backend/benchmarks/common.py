@@ -0,0 +1,107 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from modules.api_config.manager import ApiConfigManager
+from modules.api_config.storage import JsonFileStorage, SqliteStorage
+from modules.api_config.watcher import FileWatcher
+
+def summarize(samples: List[float], wall_seconds: Optional[float] = None) -> dict:
+    """把一组耗时(秒)汇总为毫秒级统计，wall_seconds为并发场景的总耗时"""
+    ordered = sorted(samples)
+
+    def pick(q: float) -> float:
+        return ordered[min(int(len(ordered) * q), len(ordered) - 1)] * 1000
+
+    elapsed = wall_seconds if wall_seconds is not None else sum(samples)
+    return {
+        "iterations": len(samples),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+        "p50_ms": round(pick(0.50), 3),
+        "p95_ms": round(pick(0.95), 3),
+        "p99_ms": round(pick(0.99), 3),
+        "ops_per_sec": round(len(samples) / elapsed, 1) if elapsed > 0 else None
+    }
+
+def time_calls(func: Callable[[int], object], iterations: int) -> dict:
+    """顺序调用 func(i) 并统计耗时"""
+    samples = []
+    for i in range(iterations):
+        started = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+def make_profiles(size: int) -> List[dict]:
+    """生成测试用配置项，第一个为激活配置"""
+    created_at = datetime.utcnow().isoformat()
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"bench-{i}",
+            "api_key": f"sk-bench-{i:010d}",
+            "base_url": f"https://relay-{i % 50}.example.com",
+            "created_at": created_at,
+            "is_active": i == 0
+        }
+        for i in range(size)
+    ]
+
+def seed_manager(backend: str, size: int, workdir: Path, watcher: FileWatcher) -> ApiConfigManager:
+    """在workdir中创建包含size个配置的存储并返回管理器"""
+    (workdir / ".claude").mkdir(parents=True, exist_ok=True)
+    config_file = workdir / "api_configs.json"
+    document = {
+        "api_profiles": make_profiles(size),
+        "metadata": {"version": "1.0", "revision": 0}
+    }
+    JsonFileStorage(config_file).write_document(document)
+
+    if backend == "json":
+        storage = JsonFileStorage(config_file)
+    elif backend == "sqlite":
+        storage = SqliteStorage(workdir / "api_configs.db", import_from=config_file)
+    else:
+        raise ValueError(f"不支持的存储后端: {backend}")
+
+    return ApiConfigManager(
+        config_file=str(config_file),
+        claude_settings_path=str(workdir / ".claude" / "settings.json"),
+        watcher=watcher,
+        storage=storage
+    )
+
+def load_baseline(path: Path) -> Dict[str, dict]:
+    """读取基线结果，不存在时返回空"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("results", {})
+    except FileNotFoundError:
+        return {}
+
+def save_results(path: Path, results: Dict[str, dict], meta: dict):
+    """保存为机器可读的结果文件(也用作基线)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"meta": meta, "results": results}, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write("\n")
+
+def find_regressions(results: Dict[str, dict], baseline: Dict[str, dict],
+                     metric: str, threshold: float, min_delta_ms: float) -> List[str]:
+    """对比基线，返回超过阈值的回归项描述
+
+    当前值超过 基线×(1+threshold) 且绝对差值大于 min_delta_ms 时视为回归，
+    后者用于忽略亚毫秒级操作的计时噪声。基线中没有的项不参与比较。
+    """
+    regressions = []
+    for key, current in sorted(results.items()):
+        base = baseline.get(key)
+        if not base or base.get(metric) is None or current.get(metric) is None:
+            continue
+        before, after = base[metric], current[metric]
+        if after > before * (1 + threshold) and after - before > min_delta_ms:
+            regressions.append(f"{key}: {metric} {before:.3f}ms -> {after:.3f}ms (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
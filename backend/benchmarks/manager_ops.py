@@ -0,0 +1,43 @@
+import itertools
+import random
+from typing import Dict
+from modules.api_config.manager import ApiConfigManager
+from modules.api_config.models import CreateApiConfigRequest, UpdateApiConfigRequest
+from .common import time_calls
+
+def run_manager_benchmarks(manager: ApiConfigManager, iterations: int, seed: int = 0) -> Dict[str, dict]:
+    """直接调用 ApiConfigManager，测量各操作的单次延迟和吞吐
+
+    add 新增的配置随后由 delete 删除，测量期间配置库规模保持不变。
+    """
+    rng = random.Random(seed)
+    profile_ids = [profile["id"] for profile in manager.export_profiles()]
+    results: Dict[str, dict] = {}
+
+    results["list_all"] = time_calls(lambda i: manager.get_all_profiles(), iterations)
+    results["list_page"] = time_calls(lambda i: manager.list_profiles(limit=100), iterations)
+    results["get"] = time_calls(lambda i: manager.get_profile(rng.choice(profile_ids)), iterations)
+
+    added = []
+
+    def add(i: int):
+        profile = manager.add_profile(CreateApiConfigRequest(
+            name=f"bench-added-{i}",
+            api_key=f"sk-bench-added-{i:06d}",
+            base_url="https://added.example.com"
+        ))
+        added.append(profile.id)
+
+    results["add"] = time_calls(add, iterations)
+
+    counter = itertools.count()
+    results["update"] = time_calls(
+        lambda i: manager.update_profile(
+            rng.choice(profile_ids),
+            UpdateApiConfigRequest(base_url=f"https://updated-{next(counter)}.example.com")
+        ),
+        iterations
+    )
+    results["activate"] = time_calls(lambda i: manager.activate_profile(rng.choice(profile_ids)), iterations)
+    results["delete"] = time_calls(lambda i: manager.delete_profile(added[i]), iterations)
+    return results
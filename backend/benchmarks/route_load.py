@@ -0,0 +1,91 @@
+import asyncio
+import itertools
+import random
+import time
+from typing import Dict, List
+import httpx
+from fastapi import FastAPI
+from modules.api_config.async_manager import AsyncApiConfigManager
+from modules.api_config.manager import ApiConfigManager
+from modules.api_config.models import UpdateApiConfigRequest
+from modules.api_config.routes import router, get_async_api_config_manager
+from .common import summarize
+
+PREFIX = "/api/v1/api-config"
+
+def build_app(async_manager: AsyncApiConfigManager) -> FastAPI:
+    """只挂载配置路由的应用，依赖替换为待测的管理器"""
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_async_api_config_manager] = lambda: async_manager
+    return app
+
+async def _load(client: httpx.AsyncClient, path: str, concurrency: int, requests_per_client: int) -> dict:
+    """concurrency个客户端并发，各自顺序发送requests_per_client个请求"""
+    samples: List[float] = []
+
+    async def worker():
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            response = await client.get(path)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(samples, wall_seconds=time.perf_counter() - started)
+
+async def _median_load(client: httpx.AsyncClient, path: str, concurrency: int,
+                       requests_per_client: int, rounds: int) -> dict:
+    """重复压测rounds轮，取p50居中的一轮，降低单核机器上的调度噪声"""
+    runs = [await _load(client, path, concurrency, requests_per_client) for _ in range(rounds)]
+    runs.sort(key=lambda stats: stats["p50_ms"])
+    return dict(runs[len(runs) // 2], rounds=rounds)
+
+async def _run(manager: ApiConfigManager, concurrency: int, requests_per_client: int,
+               rounds: int) -> Dict[str, dict]:
+    async_manager = AsyncApiConfigManager(manager)
+    transport = httpx.ASGITransport(app=build_app(async_manager))
+    results: Dict[str, dict] = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in ("status", "current"):
+                await _load(client, f"{PREFIX}/{name}", concurrency, 2)  # 预热，不计入结果
+            for name in ("status", "current"):
+                results[f"{name}_concurrent"] = await _median_load(
+                    client, f"{PREFIX}/{name}", concurrency, requests_per_client, rounds
+                )
+
+            # 持续写入的同时压测/status，验证读请求不被写操作阻塞
+            profile_ids = [profile["id"] for profile in manager.export_profiles()]
+            rng = random.Random(0)
+            counter = itertools.count()
+            stop = asyncio.Event()
+            writes = 0
+
+            async def writer():
+                nonlocal writes
+                while not stop.is_set():
+                    await async_manager.update_profile(
+                        rng.choice(profile_ids),
+                        UpdateApiConfigRequest(base_url=f"https://load-{next(counter)}.example.com")
+                    )
+                    writes += 1
+
+            writer_task = asyncio.create_task(writer())
+            try:
+                results["status_under_writes"] = await _median_load(
+                    client, f"{PREFIX}/status", concurrency, requests_per_client, rounds
+                )
+            finally:
+                stop.set()
+                await writer_task
+            results["status_under_writes"]["concurrent_writes"] = writes
+    finally:
+        async_manager.shutdown()
+    return results
+
+def run_route_benchmarks(manager: ApiConfigManager, concurrency: int = 32,
+                         requests_per_client: int = 20, rounds: int = 3) -> Dict[str, dict]:
+    """通过进程内ASGI客户端并发请求/status和/current"""
+    return asyncio.run(_run(manager, concurrency, requests_per_client, rounds))
@@ -0,0 +1,61 @@
+import json
+import tracemalloc
+from typing import Callable, Dict
+from modules.api_config import fastjson
+from modules.api_config.manager import ApiConfigManager
+from modules.api_config.models import ApiConfigListResponse, ApiConfigProfile
+from .common import time_calls
+
+def peak_allocation_kib(func: Callable[[], object]) -> float:
+    """单次调用期间的峰值内存分配(KiB)，单独测量以免tracemalloc影响计时"""
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024, 1)
+
+def run_serialization_benchmarks(manager: ApiConfigManager, iterations: int) -> Dict[str, dict]:
+    """对比完整配置列表响应的两种生成方式，以及配置文档写盘的编码耗时
+
+    list_encode_validated 重现逐项Pydantic校验、response_model再校验并用标准库json编码的旧路径；
+    list_encode_fast 使用索引中缓存的校验结果和预编码片段。
+    """
+    def validated_response() -> bytes:
+        profiles = [ApiConfigProfile(**profile) for profile in manager.export_profiles()]
+        response = ApiConfigListResponse(
+            profiles=profiles,
+            active_profile_id=manager.get_active_profile_id(),
+            total_count=len(profiles),
+            revision=manager.get_revision()
+        )
+        content = ApiConfigListResponse.model_validate(response.model_dump()).model_dump(mode="json")
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_response() -> bytes:
+        page = manager.list_profiles()
+        content = {
+            "active_profile_id": page.active_id,
+            "total_count": page.total_count,
+            "revision": page.revision,
+            "next_cursor": page.next_cursor,
+            "probes": None
+        }
+        return fastjson.dumps_with(content, profiles=fastjson.join_array(page.fragments))
+
+    document = {"api_profiles": manager.export_profiles(), "metadata": {"version": "1.0"}}
+    scenarios = {
+        "list_encode_validated": validated_response,
+        "list_encode_fast": fast_response,
+        "persist_encode_stdlib": lambda: json.dumps(document, ensure_ascii=False, indent=2),
+        "persist_encode_fast": lambda: fastjson.dumps_pretty(document)
+    }
+
+    results: Dict[str, dict] = {}
+    for name, func in scenarios.items():
+        func()  # 预热：首次读取时填充校验缓存
+        stats = time_calls(lambda i: func(), iterations)
+        stats["peak_alloc_kib"] = peak_allocation_kib(func)
+        results[name] = stats
+    return results
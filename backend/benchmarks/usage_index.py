@@ -0,0 +1,65 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict
+from modules.api_config.activations import ActivationHistory
+from modules.api_config.usage import UsageIndexer
+from .common import summarize, time_calls
+
+def write_transcripts(projects_dir: Path, total_mb: int, files: int = 20) -> int:
+    """生成约total_mb的transcript，返回写入的字节数
+
+    与真实transcript相近：约一半是不含usage的用户消息/工具结果行，每条助手消息写成两行(两个内容块)。
+    """
+    started = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    padding = "x" * 600
+    per_file = total_mb * 1024 * 1024 // files
+    written = 0
+    for n in range(files):
+        path = projects_dir / f"-work-project-{n % 4}" / f"session-{n}.jsonl"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines, size, i = [], 0, 0
+        while size < per_file:
+            timestamp = (started + timedelta(seconds=n * 3600 + i * 30)).isoformat().replace("+00:00", "Z")
+            user = json.dumps({"type": "user", "timestamp": timestamp, "message": {"role": "user", "content": padding}})
+            assistant = json.dumps({
+                "type": "assistant", "timestamp": timestamp, "requestId": f"req-{n}-{i}",
+                "message": {"id": f"msg-{n}-{i}", "model": "claude-sonnet", "content": [{"type": "text", "text": padding}],
+                            "usage": {"input_tokens": 12, "output_tokens": 340, "cache_read_input_tokens": 20000}}
+            })
+            chunk = f"{user}\n{assistant}\n{assistant}\n"
+            lines.append(chunk)
+            size += len(chunk)
+            i += 1
+        path.write_text("".join(lines), encoding="utf-8")
+        written += size
+    return written
+
+def run_usage_benchmarks(workdir: Path, total_mb: int, iterations: int = 20) -> Dict[str, dict]:
+    """用量索引：首次全量索引、追加少量内容后的增量索引、无变化时的扫描，以及缓存/未缓存的查询"""
+    projects_dir = workdir / "projects"
+    written = write_transcripts(projects_dir, total_mb)
+    history = ActivationHistory(workdir / "activation_history.jsonl")
+    history.record("profile-a", "a", at="2024-12-31T00:00:00")
+    history.record("profile-b", "b", at="2025-01-01T06:00:00")
+    indexer = UsageIndexer(projects_dir, workdir / "usage_index.json", history, refresh_interval=0)
+
+    started = time.perf_counter()
+    indexer.refresh()
+    results = {"usage_full_index": summarize([time.perf_counter() - started])}
+    results["usage_full_index"]["mb_per_sec"] = round(written / 1024 / 1024 / results["usage_full_index"]["mean_ms"] * 1000, 1)
+
+    target = next(projects_dir.rglob("*.jsonl"))
+    line = target.read_bytes().splitlines(keepends=True)[-1]
+
+    def append_and_refresh(i: int):
+        with open(target, "ab") as f:
+            f.write(line.replace(b'"msg-', f'"append-{i}-'.encode()))
+        indexer.refresh()
+
+    results["usage_incremental_refresh"] = time_calls(append_and_refresh, iterations)
+    results["usage_unchanged_refresh"] = time_calls(lambda i: indexer.refresh(), iterations)
+    results["usage_query_uncached"] = time_calls(lambda i: indexer.query(since=i, granularity="hour"), iterations)
+    results["usage_query_cached"] = time_calls(lambda i: indexer.query(granularity="day"), iterations)
+    return results
@@ -0,0 +1,261 @@
+"""ClaudeCodeManager 命令行工具：不启动服务，直接读写配置存储
+
+用法(可在任意目录执行)：
+    python backend/cli.py list                     # 列出配置，* 为激活配置
+    python backend/cli.py current                  # 当前激活配置
+    python backend/cli.py switch <名称或ID>         # 激活配置并同步settings.json
+    python backend/cli.py export > profiles.ndjson # 导出为NDJSON(与 GET /profiles/export 相同)
+    python backend/cli.py import profiles.ndjson   # 导入NDJSON，- 表示标准输入
+选项：--data-dir 数据目录(默认 backend/data)、--namespace 命名空间、--json 以JSON输出
+
+为了冷启动快，模块顶层只导入存储层，不导入FastAPI、uvicorn和Pydantic(只有import需要校验时才加载)。
+切换与 ApiConfigManager.apply_profile 一样在跨进程写锁内完成，运行中的服务通过文件监听感知变更。
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+# 配置文件很小，标准库json足够快，且比加载orjson的启动耗时少
+os.environ.setdefault("CCM_JSON_BACKEND", "json")
+
+from modules.api_config import fastjson
+from modules.api_config.activations import ActivationHistory
+from modules.api_config.fileio import ProcessLock
+from modules.api_config.index import ProfileIndex
+from modules.api_config.journal import create_journal
+from modules.api_config.namespaces import DEFAULT_NAMESPACE, namespace_paths
+from modules.api_config.settings_sync import ClaudeSettingsSync
+from modules.api_config.storage import ChangeSet, ConfigStorage, create_config_storage
+
+DEFAULT_DATA_DIR = Path(__file__).resolve().parent / "data"
+# 流式导入时每积累多少条执行一次批量写入，与 POST /profiles/import 一致
+IMPORT_CHUNK_SIZE = 500
+
+class CliError(Exception):
+    """命令执行失败，消息输出到标准错误，退出码为1"""
+
+def mask_key(api_key: str) -> str:
+    return f"{api_key[:6]}...{api_key[-4:]}" if len(api_key) > 12 else "***"
+
+class Store:
+    """命令行使用的配置存储：按命名空间定位配置文件和settings.json"""
+
+    def __init__(self, data_dir: Path, namespace: str, settings_path: Optional[str] = None):
+        self.config_file, default_settings = namespace_paths(data_dir, namespace)
+        self.claude_settings_path = Path(settings_path or default_settings).expanduser()
+        sqlite_path = None if self.config_file.parent == data_dir else str(self.config_file.with_suffix(".db"))
+        self.storage: ConfigStorage = create_config_storage(str(self.config_file), sqlite_path=sqlite_path)
+        # 代理模式下默认命名空间的settings.json和跟随激活配置的同步目标指向本地代理，切换时不改写
+        # (与 modules.proxy.routes.proxy_enabled 相同的判断，不导入以免加载FastAPI)
+        self.proxied = namespace == DEFAULT_NAMESPACE and \
+            os.getenv("CCM_PROXY_ENABLED", "").lower() in ("1", "true", "yes")
+
+    def load(self) -> ProfileIndex:
+        self.storage.initialize()
+        return ProfileIndex(self.storage.load())
+
+    def find(self, index: ProfileIndex, ref: str) -> str:
+        """按名称(忽略大小写)或ID查找配置"""
+        profile_id = index.find_id_by_name(ref) or (ref if ref in index else None)
+        if profile_id is None:
+            raise CliError(f"配置 '{ref}' 不存在")
+        return profile_id
+
+    def switch(self, ref: str) -> dict:
+        """激活配置：先写settings.json，成功后再落盘激活状态，随后同步跟随激活配置的同步目标"""
+        with ProcessLock(self.storage.lock_path):
+            index = self.load()
+            profile_id = self.find(index, ref)
+            profile = index.get(profile_id)
+            api_key, base_url = profile.get("api_key"), profile.get("base_url")
+            if not isinstance(api_key, str) or not isinstance(base_url, str):
+                raise CliError(f"配置 '{ref}' 无效")
+
+            settings_status = "proxied"
+            if not self.proxied:
+                syncer = ClaudeSettingsSync(self.claude_settings_path)
+                settings_status = syncer.write(api_key, base_url)
+                if settings_status == "failed":
+                    raise CliError(f"同步settings.json失败: {syncer.last_error}")
+
+            changed = index.active_id != profile_id
+            if changed:
+                index.activate(profile_id)
+                index.bump_revision()
+                if not self.storage.commit(self.storage.prepare(index, ChangeSet(active_id=profile_id))):
+                    raise CliError("保存配置失败")
+                ActivationHistory(self.config_file.parent / "activation_history.jsonl").record(profile_id, profile["name"])
+                create_journal(self.config_file.parent / "journal").append([{
+                    "type": "profile_activated",
+                    "revision": index.revision,
+                    "active_profile_id": profile_id,
+                    "profile_ids": [profile_id],
+                    "name": profile["name"],
+                    "source": "cli"
+                }])
+        failed_targets = self._sync_targets(profile_id, (api_key, base_url)) if changed and not self.proxied else []
+        return {
+            "profile": profile,
+            "changed": changed,
+            "settings": settings_status,
+            "revision": index.revision,
+            "failed_targets": failed_targets
+        }
+
+    def _sync_targets(self, profile_id: str, credentials) -> list:
+        """同步跟随激活配置的同步目标，返回失败的目标路径"""
+        registry_file = self.config_file.parent / "sync_targets.json"
+        if not registry_file.exists():
+            return []
+        from modules.api_config.sync_targets import SyncTargetRegistry
+        registry = SyncTargetRegistry(registry_file)
+        try:
+            targets = [target for target in registry.targets() if target.profile_id is None]
+            results = registry.apply([(target, profile_id, credentials) for target in targets])
+        finally:
+            registry.shutdown()
+        return [result.path for result in results if result.status == "failed"]
+
+    def import_lines(self, stream) -> tuple:
+        """导入NDJSON，规则与 POST /profiles/import 相同，返回(成功数, 错误列表)"""
+        from pydantic import ValidationError
+        from modules.api_config.manager import ApiConfigManager
+        from modules.api_config.models import ApiConfigProfile
+
+        manager = ApiConfigManager(
+            config_file=str(self.config_file),
+            claude_settings_path=str(self.claude_settings_path),
+            storage=self.storage
+        )
+        added, errors, pending = 0, [], []
+
+        def flush():
+            nonlocal added
+            if pending:
+                results = manager.bulk_add_profiles([profile for _, profile in pending])
+                for (line_no, _), error in zip(pending, results):
+                    if error is None:
+                        added += 1
+                    else:
+                        errors.append(f"第{line_no}行: {error}")
+                pending.clear()
+
+        for line_no, raw in enumerate(stream, 1):
+            if not raw.strip():
+                continue
+            try:
+                record = fastjson.loads(raw)
+                if not isinstance(record, dict):
+                    raise ValueError("每行必须是一个JSON对象")
+                record.pop("is_active", None)
+                pending.append((line_no, ApiConfigProfile.model_validate(record)))
+            except ValidationError as e:
+                errors.append(f"第{line_no}行: {e.errors()[0]['msg']}")
+            except ValueError as e:
+                errors.append(f"第{line_no}行: 无效的JSON: {e}")
+            if len(pending) >= IMPORT_CHUNK_SIZE:
+                flush()
+        flush()
+        return added, errors
+
+def print_json(obj):
+    sys.stdout.buffer.write(fastjson.dumps(obj) + b"\n")
+
+def cmd_list(store: Store, args) -> int:
+    index = store.load()
+    profiles = [dict(profile, api_key=mask_key(str(profile.get("api_key", "")))) for profile in index.values()]
+    if args.json:
+        print_json({"profiles": profiles, "active_profile_id": index.active_id, "revision": index.revision})
+        return 0
+    for profile in profiles:
+        marker = "*" if profile.get("id") == index.active_id else " "
+        print(f"{marker} {profile.get('name', ''):<24} {profile.get('base_url', ''):<40} {profile['api_key']}")
+    return 0
+
+def cmd_current(store: Store, args) -> int:
+    index = store.load()
+    active = index.active()
+    if active is None:
+        raise CliError("没有激活的配置")
+    if args.json:
+        print_json(dict(active, api_key=mask_key(str(active.get("api_key", "")))))
+    else:
+        print(f"{active.get('name')}  {active.get('base_url')}")
+    return 0
+
+def cmd_switch(store: Store, args) -> int:
+    result = store.switch(args.profile)
+    profile = result["profile"]
+    if args.json:
+        print_json({
+            "profile_id": profile["id"],
+            "name": profile["name"],
+            "changed": result["changed"],
+            "settings": result["settings"],
+            "revision": result["revision"],
+            "failed_targets": result["failed_targets"]
+        })
+    elif result["changed"]:
+        print(f"已切换到 '{profile['name']}' ({profile.get('base_url')})")
+    else:
+        print(f"'{profile['name']}' 已是激活配置")
+    for path in result["failed_targets"]:
+        print(f"同步目标写入失败: {path}", file=sys.stderr)
+    return 0
+
+def cmd_export(store: Store, args) -> int:
+    out = sys.stdout.buffer
+    for profile in store.load().values():
+        out.write(fastjson.dumps(profile) + b"\n")
+    return 0
+
+def cmd_import(store: Store, args) -> int:
+    if args.file == "-":
+        added, errors = store.import_lines(sys.stdin.buffer)
+    else:
+        with open(args.file, 'rb') as f:
+            added, errors = store.import_lines(f)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if args.json:
+        print_json({"added": added, "failed": len(errors)})
+    else:
+        print(f"导入 {added} 个配置，失败 {len(errors)} 个")
+    return 0 if not errors else 1
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="cli.py", description="ClaudeCodeManager 命令行工具")
+    parser.add_argument("--data-dir", type=Path, default=Path(os.getenv("CCM_DATA_DIR", DEFAULT_DATA_DIR)),
+                        help="数据目录，默认为 backend/data (环境变量 CCM_DATA_DIR)")
+    parser.add_argument("-n", "--namespace", default=DEFAULT_NAMESPACE, help="命名空间")
+    parser.add_argument("--settings", default=None, help="覆盖要同步的settings.json路径")
+    parser.add_argument("--json", action="store_true", help="以JSON输出")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="列出配置").set_defaults(handler=cmd_list)
+    commands.add_parser("current", help="显示激活配置").set_defaults(handler=cmd_current)
+    switch = commands.add_parser("switch", help="激活配置")
+    switch.add_argument("profile", help="配置名称或ID")
+    switch.set_defaults(handler=cmd_switch)
+    commands.add_parser("export", help="导出NDJSON到标准输出").set_defaults(handler=cmd_export)
+    importer = commands.add_parser("import", help="导入NDJSON")
+    importer.add_argument("file", help="NDJSON文件，- 表示标准输入")
+    importer.set_defaults(handler=cmd_import)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        store = Store(args.data_dir.expanduser().resolve(), args.namespace, args.settings)
+        return args.handler(store, args)
+    except (CliError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:  # 输出被 head 等提前关闭
+        sys.stderr.close()
+        return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
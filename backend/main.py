@@ -2,16 +2,55 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
-from modules.api_config.routes import router as api_config_router
+from modules.api_config.routes import (
+    router as api_config_router,
+    get_api_config_manager,
+    get_latency_prober,
+    get_namespace_registry
+)
+from modules.api_config.watcher import get_file_watcher
+from modules.metrics.middleware import MetricsMiddleware
+from modules.metrics.routes import router as metrics_router
+from modules.scheduler.routes import router as scheduler_router, get_rotation_scheduler
+from modules.proxy.routes import (
+    router as proxy_router,
+    admin_router as proxy_admin_router,
+    get_proxy_forwarder,
+    load_proxy_token,
+    proxy_enabled,
+    proxy_public_url
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 启动时初始化
     print("🚀 ClaudeCodeManager 启动中...")
+    if proxy_enabled():
+        # settings.json指向本地代理，之后切换配置只在内存中生效
+        get_api_config_manager().set_proxy_endpoint(proxy_public_url(), load_proxy_token())
+        print(f"🔀 本地代理已启用: {proxy_public_url()}")
+    # 按规则自动切换激活配置(规则为空时后台任务只是等待)
+    await get_rotation_scheduler().start()
     yield
     # 关闭时清理
     print("🛑 ClaudeCodeManager 正在关闭...")
+    await get_rotation_scheduler().stop()
+    if proxy_enabled():
+        # 恢复为直接使用激活配置，避免服务停止后Claude Code连接不上代理
+        get_api_config_manager().set_proxy_endpoint(None)
+        await get_proxy_forwarder().aclose()
+    if get_api_config_manager.cache_info().currsize:
+        # 写入合并窗口内尚未落盘的settings.json同步和自动备份
+        get_api_config_manager().flush_claude_settings()
+        get_api_config_manager().flush_backups()
+    if get_namespace_registry.cache_info().currsize:
+        for manager in get_namespace_registry().loaded():
+            manager.manager.flush_claude_settings()
+            manager.manager.flush_backups()
+    if get_latency_prober.cache_info().currsize:
+        await get_latency_prober().aclose()
+    get_file_watcher().stop()
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -28,10 +67,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
+# 路由耗时直方图和可选的Server-Timing响应头
+app.add_middleware(MetricsMiddleware, routes_app=app)
 
 # 注册路由模块
 app.include_router(api_config_router)
+app.include_router(proxy_admin_router)
+app.include_router(metrics_router)
+app.include_router(scheduler_router)
+if proxy_enabled():
+    app.include_router(proxy_router)
 
 @app.get("/", summary="根路径")
 async def root():
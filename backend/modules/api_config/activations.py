@@ -0,0 +1,101 @@
+import bisect
+import os
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+from . import fastjson
+
+def to_epoch(timestamp: str) -> float:
+    """ISO时间转为Unix时间戳，不带时区的时间按UTC处理(与 datetime.utcnow().isoformat() 一致)"""
+    value = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def _lookup(times: List[float], entries: List["Activation"], epoch: float) -> Optional[str]:
+    position = bisect.bisect_right(times, epoch)
+    return entries[position - 1].profile_id if position else None
+
+@dataclass
+class Activation:
+    """一次激活：at之后(直到下一次激活)的请求归属于profile_id"""
+    at: str
+    profile_id: str
+    name: str = ""
+
+class ActivationHistory:
+    """激活记录，每行一条JSON，只追加不改写
+
+    读取时只解析上次读取位置之后新追加的行，按时间排序后用二分查找定位某一时刻的激活配置。
+    """
+
+    def __init__(self, history_file: Path):
+        self.history_file = Path(history_file)
+        self._lock = threading.Lock()
+        self._entries: List[Activation] = []
+        self._times: List[float] = []
+        self._offset = 0
+
+    def _load(self):
+        """读取新追加的记录，调用方须持有 self._lock"""
+        try:
+            size = self.history_file.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._offset:  # 文件被替换或截断，重新读取
+            self._entries, self._times, self._offset = [], [], 0
+        if size == self._offset:
+            return
+        with open(self.history_file, 'rb') as f:
+            f.seek(self._offset)
+            data = f.read(size - self._offset)
+        end = data.rfind(b"\n") + 1  # 只处理完整的行
+        for line in data[:end].splitlines():
+            try:
+                entry = Activation(**fastjson.loads(line))
+                at = to_epoch(entry.at)
+            except (ValueError, TypeError):
+                continue
+            position = bisect.bisect_right(self._times, at)
+            self._times.insert(position, at)
+            self._entries.insert(position, entry)
+        self._offset += end
+
+    def record(self, profile_id: str, name: str = "", at: Optional[str] = None) -> Activation:
+        """追加一条激活记录，at默认为当前UTC时间"""
+        entry = Activation(at=at or datetime.utcnow().isoformat(), profile_id=profile_id, name=name)
+        self.history_file.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND 保证多个进程同时追加时各行完整
+        fd = os.open(self.history_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, fastjson.dumps(asdict(entry)) + b"\n")
+        finally:
+            os.close(fd)
+        return entry
+
+    def entries(self) -> List[Activation]:
+        """按时间从旧到新列出激活记录"""
+        with self._lock:
+            self._load()
+            return list(self._entries)
+
+    def latest(self) -> Optional[Activation]:
+        """最近一次激活"""
+        with self._lock:
+            self._load()
+            return self._entries[-1] if self._entries else None
+
+    def active_at(self, epoch: float) -> Optional[str]:
+        """某一时刻的激活配置ID，早于第一条记录时返回None"""
+        with self._lock:
+            self._load()
+            return _lookup(self._times, self._entries, epoch)
+
+    def resolver(self):
+        """返回批量查询用的函数，整个批次只读取一次文件"""
+        with self._lock:
+            self._load()
+            times, entries = list(self._times), list(self._entries)
+        return lambda epoch: _lookup(times, entries, epoch)
@@ -0,0 +1,167 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+from .activations import ActivationHistory
+from .backups import Snapshot
+from .index import ProfilePage
+from .manager import ApiConfigManager, ApplyResult
+from .sync_targets import SyncTarget, TargetSyncResult
+from .models import ApiConfigProfile, CreateApiConfigRequest, UpdateApiConfigRequest
+
+class AsyncApiConfigManager:
+    """ApiConfigManager的异步接口
+
+    所有可能阻塞的文件操作都放到有界线程池中执行，不占用事件循环。
+    写操作先在asyncio.Lock上排队，排队中的写请求不会占住线程池，
+    而 ApiConfigManager 写盘期间不持有快照锁，因此写入进行中读请求仍能及时返回。
+    """
+
+    def __init__(self, manager: ApiConfigManager, max_workers: int = 8):
+        self.manager = manager
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api-config-io")
+        self._write_lock: Optional[asyncio.Lock] = None
+
+    @property
+    def claude_settings_path(self):
+        return self.manager.claude_settings_path
+
+    def _get_write_lock(self) -> asyncio.Lock:
+        """延迟创建写锁，确保绑定到运行中的事件循环"""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        return self._write_lock
+
+    async def _run(self, func, *args):
+        """在线程池中执行阻塞调用，复制当前上下文以便埋点记录到所属请求"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, func, *args))
+
+    async def _run_write(self, func, *args):
+        """串行执行写操作"""
+        async with self._get_write_lock():
+            return await self._run(func, *args)
+
+    def shutdown(self):
+        """关闭线程池"""
+        self._executor.shutdown(wait=True)
+
+    # === 读操作 ===
+
+    async def get_all_profiles(self) -> List[ApiConfigProfile]:
+        return await self._run(self.manager.get_all_profiles)
+
+    async def list_profiles(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                            name: Optional[str] = None, base_url: Optional[str] = None) -> ProfilePage:
+        return await self._run(self.manager.list_profiles, cursor, limit, name, base_url)
+
+    async def get_profile(self, profile_id: str) -> Optional[ApiConfigProfile]:
+        return await self._run(self.manager.get_profile, profile_id)
+
+    async def get_active_profile(self) -> Optional[ApiConfigProfile]:
+        return await self._run(self.manager.get_active_profile)
+
+    async def get_revision(self) -> int:
+        return await self._run(self.manager.get_revision)
+
+    async def get_summary(self) -> dict:
+        return await self._run(self.manager.get_summary)
+
+    async def get_active_profile_id(self) -> Optional[str]:
+        return await self._run(self.manager.get_active_profile_id)
+
+    async def get_current_claude_config(self) -> dict:
+        return await self._run(self.manager.get_current_claude_config)
+
+    async def claude_settings_exists(self) -> bool:
+        return await self._run(self.manager.claude_settings_exists)
+
+    async def get_settings_sync_stats(self) -> dict:
+        return await self._run(self.manager.get_settings_sync_stats)
+
+    # === 写操作 ===
+
+    async def add_profile(self, profile_data: CreateApiConfigRequest) -> ApiConfigProfile:
+        return await self._run_write(self.manager.add_profile, profile_data)
+
+    async def update_profile(self, profile_id: str, updates: UpdateApiConfigRequest,
+                             expected_revision: Optional[int] = None) -> bool:
+        return await self._run_write(self.manager.update_profile, profile_id, updates, expected_revision)
+
+    async def delete_profile(self, profile_id: str, expected_revision: Optional[int] = None) -> bool:
+        return await self._run_write(self.manager.delete_profile, profile_id, expected_revision)
+
+    async def activate_profile(self, profile_id: str, expected_revision: Optional[int] = None) -> bool:
+        return await self._run_write(self.manager.activate_profile, profile_id, expected_revision)
+
+    async def apply_profile(self, profile_id: str, expected_revision: Optional[int] = None,
+                            rollback_on_failure: bool = False) -> ApplyResult:
+        return await self._run_write(self.manager.apply_profile, profile_id, expected_revision, rollback_on_failure)
+
+    async def bulk_add_profiles(self, profiles: List[ApiConfigProfile],
+                                expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        return await self._run_write(self.manager.bulk_add_profiles, profiles, expected_revision)
+
+    async def bulk_update_profiles(self, updates: List[Tuple[str, UpdateApiConfigRequest]],
+                                   expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        return await self._run_write(self.manager.bulk_update_profiles, updates, expected_revision)
+
+    async def bulk_delete_profiles(self, profile_ids: List[str],
+                                   expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        return await self._run_write(self.manager.bulk_delete_profiles, profile_ids, expected_revision)
+
+    async def export_profiles(self) -> List[dict]:
+        return await self._run(self.manager.export_profiles)
+
+    async def get_activation_history(self) -> ActivationHistory:
+        return await self._run(self.manager.get_activation_history)
+
+    async def query_history(self, since: Optional[float] = None, until: Optional[float] = None,
+                            types: Optional[List[str]] = None, profile_id: Optional[str] = None,
+                            limit: int = 100, cursor: Optional[str] = None,
+                            descending: bool = True) -> Tuple[List[dict], Optional[str]]:
+        return await self._run(self.manager.journal.query, since, until, types, profile_id, limit, cursor, descending)
+
+    async def history_entry_at(self, epoch: float) -> Optional[dict]:
+        return await self._run(self.manager.journal.entry_at, epoch)
+
+    async def compact_history(self, before: float) -> Tuple[int, dict]:
+        journal = self.manager.journal
+        return await self._run(lambda: (journal.compact(before), journal.stats()))
+
+    async def backup_config(self) -> Tuple[Snapshot, bool]:
+        return await self._run(self.manager.backup_config)
+
+    async def list_backups(self) -> List[Snapshot]:
+        return await self._run(self.manager.list_backups)
+
+    async def get_backup_stats(self) -> dict:
+        return await self._run(self.manager.get_backup_stats)
+
+    async def diff_backups(self, base_id: str, target_id: Optional[str] = None) -> dict:
+        return await self._run(self.manager.diff_backups, base_id, target_id)
+
+    async def restore_backup(self, snapshot_id: str, restore_settings: bool = False,
+                             expected_revision: Optional[int] = None) -> Tuple[int, Snapshot]:
+        return await self._run_write(self.manager.restore_backup, snapshot_id, restore_settings, expected_revision)
+
+    # === 同步目标 ===
+
+    async def list_sync_targets(self) -> List[Tuple[SyncTarget, Optional[TargetSyncResult]]]:
+        return await self._run(self.manager.list_sync_targets)
+
+    async def add_sync_target(self, path: str, profile_id: Optional[str] = None,
+                              label: Optional[str] = None) -> Tuple[SyncTarget, TargetSyncResult]:
+        return await self._run(self.manager.add_sync_target, path, profile_id, label)
+
+    async def update_sync_target(self, target_id: str, **fields) -> Optional[Tuple[SyncTarget, TargetSyncResult]]:
+        return await self._run(functools.partial(self.manager.update_sync_target, target_id, **fields))
+
+    async def remove_sync_target(self, target_id: str) -> bool:
+        return await self._run(self.manager.remove_sync_target, target_id)
+
+    async def sync_targets(self, target_ids: Optional[List[str]] = None,
+                           rollback_on_failure: bool = False) -> List[TargetSyncResult]:
+        return await self._run(self.manager.sync_targets, target_ids, rollback_on_failure)
@@ -0,0 +1,220 @@
+import difflib
+import gzip
+import hashlib
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from . import fastjson
+from .fileio import ProcessLock, atomic_write_bytes
+from .watcher import file_signature
+
+# 备份中的文件名
+CONFIG_FILE = "api_configs.json"
+SETTINGS_FILE = "settings.json"
+
+# 每次写入都会变化、不参与内容比较的元数据
+VOLATILE_METADATA = ("last_updated", "revision")
+
+def canonical_document(document: dict) -> bytes:
+    """生成用于备份的配置文档：去掉易变元数据，相同的配置内容得到相同的字节"""
+    metadata = {k: v for k, v in (document.get("metadata") or {}).items() if k not in VOLATILE_METADATA}
+    return fastjson.dumps_pretty({"api_profiles": document.get("api_profiles", []), "metadata": metadata}).encode("utf-8")
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+@dataclass
+class Snapshot:
+    """一次备份：文件名→内容哈希，内容以压缩blob保存在对象目录中"""
+    id: str
+    created_at: str
+    reason: str
+    revision: int
+    profile_count: int
+    files: Dict[str, str] = field(default_factory=dict)
+
+class BackupStore:
+    """内容寻址的备份库
+
+    目录结构：
+        objects/<哈希前2位>/<sha256>.gz   gzip压缩的文件内容，相同内容只保存一份
+        snapshots.json                      备份清单，按时间从旧到新
+
+    与最近一次备份内容相同时不产生新备份，也不写盘。
+    保留策略：保留最近keep_last个备份，另外每个UTC日期保留当天最后一个备份，最多keep_daily天；
+    不再被任何备份引用的blob随之删除。清单和blob的修改在跨进程锁内完成。
+    """
+
+    def __init__(self, root: Path, keep_last: int = 20, keep_daily: int = 7):
+        self.root = Path(root)
+        self.keep_last = keep_last
+        self.keep_daily = keep_daily
+        self.manifest_path = self.root / "snapshots.json"
+        self._objects = self.root / "objects"
+        self._lock = threading.Lock()
+        self._process_lock = ProcessLock(self.root / "backups.lock")
+        self._snapshots: List[Snapshot] = []
+        self._manifest_signature = None
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / f"{digest}.gz"
+
+    def _refresh(self):
+        """清单被其他进程修改过时重新读取，调用方须持有 self._lock"""
+        signature = file_signature(self.manifest_path)
+        if signature == self._manifest_signature:
+            return
+        try:
+            with open(self.manifest_path, 'rb') as f:
+                data = fastjson.loads(f.read())
+            self._snapshots = [Snapshot(**item) for item in data.get("snapshots", [])]
+        except FileNotFoundError:
+            self._snapshots = []
+        self._manifest_signature = signature
+
+    def _save_manifest(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        document = {"version": 1, "snapshots": [asdict(snapshot) for snapshot in self._snapshots]}
+        atomic_write_bytes(self.manifest_path, fastjson.dumps_pretty(document).encode("utf-8"))
+        self._manifest_signature = file_signature(self.manifest_path)
+
+    def latest(self) -> Optional[Snapshot]:
+        with self._lock:
+            self._refresh()
+            return self._snapshots[-1] if self._snapshots else None
+
+    def snapshots(self) -> List[Snapshot]:
+        """按时间从新到旧列出备份"""
+        with self._lock:
+            self._refresh()
+            return list(reversed(self._snapshots))
+
+    def get(self, snapshot_id: str) -> Optional[Snapshot]:
+        with self._lock:
+            self._refresh()
+            return next((s for s in self._snapshots if s.id == snapshot_id), None)
+
+    def snapshot(self, files: Dict[str, bytes], reason: str, revision: int = 0,
+                 profile_count: int = 0) -> Tuple[Snapshot, bool]:
+        """保存一次备份，返回(备份, 是否新建)；内容与最近一次备份相同时返回最近的备份"""
+        digests = {name: content_hash(data) for name, data in files.items()}
+        with self._lock:
+            # 与本进程已知的最近备份相同，不访问磁盘
+            if self._snapshots and self._snapshots[-1].files == digests:
+                return self._snapshots[-1], False
+        with self._lock, self._process_lock:
+            self._refresh()
+            latest = self._snapshots[-1] if self._snapshots else None
+            if latest is not None and latest.files == digests:
+                return latest, False
+
+            for name, digest in digests.items():
+                path = self._blob_path(digest)
+                if not path.exists():
+                    path.parent.mkdir(parents=True, exist_ok=True)
+                    atomic_write_bytes(path, gzip.compress(files[name], compresslevel=6))
+
+            now = datetime.utcnow()
+            snapshot = Snapshot(
+                id=f"{now:%Y%m%dT%H%M%S%f}-{content_hash(repr(sorted(digests.items())).encode())[:8]}",
+                created_at=now.isoformat(),
+                reason=reason,
+                revision=revision,
+                profile_count=profile_count,
+                files=digests
+            )
+            self._snapshots.append(snapshot)
+            removed = self._apply_retention()
+            self._save_manifest()
+            self._collect_garbage(removed)
+            return snapshot, True
+
+    def _apply_retention(self) -> List[Snapshot]:
+        """按保留策略删除旧备份，返回被删除的备份，调用方须持有锁"""
+        keep = {id(s) for s in self._snapshots[-self.keep_last:]} if self.keep_last > 0 else set()
+        days_kept: List[str] = []
+        for snapshot in reversed(self._snapshots):
+            day = snapshot.created_at[:10]
+            if day in days_kept:
+                continue
+            if len(days_kept) >= self.keep_daily:
+                break
+            days_kept.append(day)
+            keep.add(id(snapshot))
+        removed = [s for s in self._snapshots if id(s) not in keep]
+        self._snapshots = [s for s in self._snapshots if id(s) in keep]
+        return removed
+
+    def _collect_garbage(self, removed: List[Snapshot]):
+        """删除不再被引用的blob"""
+        referenced = {digest for s in self._snapshots for digest in s.files.values()}
+        for snapshot in removed:
+            for digest in snapshot.files.values():
+                if digest not in referenced:
+                    try:
+                        self._blob_path(digest).unlink()
+                    except FileNotFoundError:
+                        pass
+
+    def read(self, snapshot: Snapshot, name: str) -> Optional[bytes]:
+        """读取备份中某个文件的内容，该备份不包含此文件时返回None"""
+        digest = snapshot.files.get(name)
+        if digest is None:
+            return None
+        with open(self._blob_path(digest), 'rb') as f:
+            data = gzip.decompress(f.read())
+        if content_hash(data) != digest:
+            raise ValueError(f"备份 {snapshot.id} 中的 {name} 已损坏")
+        return data
+
+    def stats(self) -> dict:
+        """备份数量、blob数量和压缩后占用的字节数"""
+        with self._lock:
+            self._refresh()
+            digests = {digest for s in self._snapshots for digest in s.files.values()}
+            stored = 0
+            for digest in digests:
+                try:
+                    stored += self._blob_path(digest).stat().st_size
+                except FileNotFoundError:
+                    pass
+            return {
+                "snapshot_count": len(self._snapshots),
+                "blob_count": len(digests),
+                "stored_bytes": stored,
+                "keep_last": self.keep_last,
+                "keep_daily": self.keep_daily
+            }
+
+def diff_documents(old: dict, new: dict) -> dict:
+    """按配置ID比较两个配置文档"""
+    def by_id(document: dict) -> Dict[str, dict]:
+        return {p["id"]: p for p in document.get("api_profiles", []) if isinstance(p, dict) and p.get("id")}
+
+    def active_id(profiles: Dict[str, dict]) -> Optional[str]:
+        return next((pid for pid, p in profiles.items() if p.get("is_active")), None)
+
+    before, after = by_id(old), by_id(new)
+    changed = []
+    for profile_id in before.keys() & after.keys():
+        fields = sorted(
+            key for key in before[profile_id].keys() | after[profile_id].keys()
+            if key != "is_active" and before[profile_id].get(key) != after[profile_id].get(key)
+        )
+        if fields:
+            changed.append({"id": profile_id, "name": after[profile_id].get("name"), "fields": fields})
+    return {
+        "added": [{"id": pid, "name": p.get("name"), "fields": []} for pid, p in after.items() if pid not in before],
+        "removed": [{"id": pid, "name": p.get("name"), "fields": []} for pid, p in before.items() if pid not in after],
+        "changed": sorted(changed, key=lambda item: item["id"]),
+        "active_before": active_id(before),
+        "active_after": active_id(after)
+    }
+
+def diff_text(old: Optional[bytes], new: Optional[bytes], old_label: str, new_label: str) -> List[str]:
+    """两份文本的unified diff"""
+    old_lines = old.decode("utf-8").splitlines() if old is not None else []
+    new_lines = new.decode("utf-8").splitlines() if new is not None else []
+    return list(difflib.unified_diff(old_lines, new_lines, old_label, new_label, lineterm=""))
@@ -0,0 +1,141 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Deque, Optional, Tuple
+
+@dataclass
+class ConfigEvent:
+    """带版本号的配置变更事件"""
+    version: int
+    type: str
+    data: dict = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+class EventBroker:
+    """进程级事件广播器
+
+    事件保存在固定长度的环形缓冲区中，订阅者按版本号从缓冲区读取，
+    新事件到达时只需唤醒一次共享的asyncio.Event，订阅者数量不影响发布成本。
+    版本号附带进程启动时生成的epoch，服务重启后旧版本号会被识别并要求客户端全量刷新。
+    """
+
+    def __init__(self, buffer_size: int = 1000, heartbeat_interval: float = 15.0):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.heartbeat_interval = heartbeat_interval
+        self._events: Deque[ConfigEvent] = deque(maxlen=buffer_size)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def format_id(self, version: int) -> str:
+        """生成SSE事件id"""
+        return f"{self.epoch}-{version}"
+
+    def parse_id(self, event_id: Optional[str]) -> Optional[int]:
+        """解析客户端传回的事件id，epoch不匹配时返回None"""
+        if not event_id:
+            return None
+        epoch, _, version = event_id.rpartition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        return int(version)
+
+    def publish(self, event_type: str, data: Optional[dict] = None) -> ConfigEvent:
+        """发布事件，可在任意线程调用"""
+        with self._lock:
+            self._version += 1
+            event = ConfigEvent(version=self._version, type=event_type, data=data or {})
+            self._events.append(event)
+            loop = self._loop
+
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.call_soon_threadsafe(self._notify)
+            except RuntimeError:
+                pass  # 事件循环已关闭
+        return event
+
+    def _notify(self):
+        """唤醒所有等待中的订阅者"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+        self._wakeup = asyncio.Event()
+
+    def _events_after(self, version: int) -> Tuple[bool, list]:
+        """获取指定版本之后的事件，返回(是否仍可续传, 事件列表)"""
+        with self._lock:
+            if version < 0 or (self._events and version < self._events[0].version - 1):
+                return False, []
+            # 版本号连续递增，从尾部向前收集即可，成本只与新事件数量相关
+            events = []
+            for event in reversed(self._events):
+                if event.version <= version:
+                    break
+                events.append(event)
+            events.reverse()
+            return True, events
+
+    async def subscribe(self, since: Optional[int] = None) -> AsyncIterator[Optional[ConfigEvent]]:
+        """订阅事件流
+
+        since为None表示从当前版本开始；无法续传时先推送resync事件。
+        长时间无事件时产出None，供调用方发送心跳。
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+
+        if since is None or since > self._version:
+            cursor = self._version
+            yield ConfigEvent(version=cursor, type="ready", data={"version": cursor})
+        else:
+            cursor = since
+
+        while True:
+            wakeup = self._wakeup
+            resumable, events = self._events_after(cursor)
+            if not resumable:
+                cursor = self._version
+                yield ConfigEvent(version=cursor, type="resync", data={"version": cursor})
+                continue
+
+            for event in events:
+                cursor = event.version
+                yield event
+
+            if events:
+                continue
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield None
+
+    def encode(self, event: Optional[ConfigEvent]) -> str:
+        """编码为SSE文本帧"""
+        if event is None:
+            return ": keep-alive\n\n"
+        payload = json.dumps(
+            {"version": event.version, "timestamp": event.timestamp, **event.data},
+            ensure_ascii=False
+        )
+        return f"id: {self.format_id(event.version)}\nevent: {event.type}\ndata: {payload}\n\n"
+
+_event_broker: Optional[EventBroker] = None
+_event_broker_lock = threading.Lock()
+
+def get_event_broker() -> EventBroker:
+    """获取进程级共享的事件广播器"""
+    global _event_broker
+    with _event_broker_lock:
+        if _event_broker is None:
+            _event_broker = EventBroker()
+        return _event_broker
@@ -0,0 +1,41 @@
+import json
+import os
+from typing import Any
+
+# CCM_JSON_BACKEND=json 时强制使用标准库：命令行工具只处理很小的文件，省去加载orjson的启动耗时
+if os.getenv("CCM_JSON_BACKEND", "orjson") == "json":
+    orjson = None
+else:
+    try:
+        import orjson  # 比标准库json快数倍，未安装时退回标准库
+    except ImportError:
+        orjson = None
+
+def loads(data):
+    """解析JSON文本或字节，格式错误时抛出 json.JSONDecodeError"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """紧凑格式的UTF-8 JSON，非ASCII字符不转义"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def dumps_pretty(obj: Any) -> str:
+    """两空格缩进的JSON文本，与 json.dumps(ensure_ascii=False, indent=2) 格式一致，用于写盘"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, indent=2)
+
+def dumps_with(obj: dict, **raw: bytes) -> bytes:
+    """编码obj，并把已编码的JSON片段作为额外成员嵌入(片段不再解析或重新编码)"""
+    members = [dumps(key) + b":" + value for key, value in raw.items()]
+    if obj:
+        members.append(dumps(obj)[1:-1])
+    return b"{" + b",".join(members) + b"}"
+
+def join_array(fragments) -> bytes:
+    """把已编码的JSON片段拼接为数组"""
+    return b"[" + b",".join(fragments) + b"]"
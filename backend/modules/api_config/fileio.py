@@ -0,0 +1,74 @@
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有fcntl，只保留进程内互斥
+    fcntl = None
+
+def atomic_write_text(path: Path, text: str):
+    """原子性写入文本文件
+
+    先写入同目录下的唯一临时文件再rename，多个进程同时写同一文件时不会互相覆盖临时文件。
+    """
+    atomic_write_bytes(path, text.encode('utf-8'))
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """原子性写入二进制文件，做法同 atomic_write_text"""
+    path = Path(path)
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_name, path)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+class ProcessLock:
+    """基于fcntl.flock的跨进程互斥锁
+
+    同一进程内先获取线程锁，再获取文件锁；锁文件只用于加锁，内容为空。
+    不支持fcntl的平台上退化为进程内锁。
+    """
+
+    def __init__(self, lock_path: Path):
+        self.lock_path = Path(lock_path)
+        self._thread_lock = threading.Lock()
+        self._fd = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if fcntl is None:
+            return
+        try:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except BaseException:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
@@ -0,0 +1,239 @@
+import base64
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:  # 模型(Pydantic)在首次校验时才导入，命令行工具只用索引时不必加载
+    from .models import ApiConfigProfile
+
+def normalize_name(name: str) -> str:
+    """名称规范化：忽略首尾空白和大小写"""
+    return name.strip().casefold()
+
+def encode_cursor(profile_id: str, position: int) -> str:
+    """生成不透明的分页游标"""
+    return base64.urlsafe_b64encode(f"{position}:{profile_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """解析分页游标，格式错误时抛出ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        position, profile_id = raw.split(":", 1)
+        return profile_id, int(position)
+    except Exception:
+        raise ValueError(f"无效的分页游标: {cursor}")
+
+@dataclass
+class ProfilePage:
+    """分页查询结果"""
+    profiles: list
+    next_cursor: Optional[str]
+    total_count: int
+    active_id: Optional[str]
+    revision: int
+    # 与profiles一一对应的已编码JSON片段
+    fragments: List[bytes] = field(default_factory=list)
+
+class ValidatedProfile(NamedTuple):
+    """校验通过的配置项及其JSON编码，配置项变更前一直复用"""
+    model: "ApiConfigProfile"
+    fragment: bytes
+
+    @classmethod
+    def of(cls, model: "ApiConfigProfile") -> "ValidatedProfile":
+        return cls(model, model.model_dump_json().encode("utf-8"))
+
+class ProfileIndex:
+    """配置项内存索引
+
+    以 id→配置 的有序字典作为配置列表本身，另外维护规范化名称→id 的映射和激活配置指针，
+    所有变更都经由本类方法完成，从而保证三者始终一致，查找、改名、激活均为O(1)。
+    """
+
+    def __init__(self, data: dict):
+        self.metadata: dict = data.get("metadata") or {}
+        self._profiles: Dict[str, dict] = {}
+        self._names: Dict[str, str] = {}
+        self._active_id: Optional[str] = None
+        # 缺少id的历史数据无法寻址，但写回时原样保留
+        self._unindexed: List[dict] = []
+        # 分页用的有序id列表和 id→位置 映射，删除后失效、下次分页时重建
+        self._order: Optional[List[str]] = None
+        self._positions: Optional[Dict[str, int]] = None
+        # id→校验结果(无效配置为None)，配置项变更时丢弃对应条目
+        self._validated: Dict[str, Optional[ValidatedProfile]] = {}
+
+        for profile in data.get("api_profiles", []):
+            profile_id = profile.get("id") if isinstance(profile, dict) else None
+            if not profile_id or profile_id in self._profiles:
+                self._unindexed.append(profile)
+                continue
+
+            self._profiles[profile_id] = profile
+            name = profile.get("name")
+            if isinstance(name, str):
+                self._names.setdefault(normalize_name(name), profile_id)
+
+            if profile.get("is_active"):
+                if self._active_id is None:
+                    self._active_id = profile_id
+                else:
+                    profile["is_active"] = False  # 只允许一个激活配置
+
+    def __len__(self) -> int:
+        return len(self._profiles)
+
+    def __contains__(self, profile_id: str) -> bool:
+        return profile_id in self._profiles
+
+    def values(self) -> Iterator[dict]:
+        """按插入顺序遍历配置项"""
+        return iter(self._profiles.values())
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        """按id获取配置项"""
+        return self._profiles.get(profile_id)
+
+    def validated(self, profile_id: str) -> Optional[ValidatedProfile]:
+        """获取校验后的配置项，不存在或无效时返回None
+
+        每个配置项只在首次读取(或变更后首次读取)时校验和编码一次。
+        """
+        try:
+            return self._validated[profile_id]
+        except KeyError:
+            pass
+        profile = self._profiles.get(profile_id)
+        if profile is None:
+            return None
+        from .models import ApiConfigProfile
+        try:
+            entry = ValidatedProfile.of(ApiConfigProfile(**profile))
+        except Exception:
+            entry = None  # 无效的配置项，同样缓存以免重复校验
+        self._validated[profile_id] = entry
+        return entry
+
+    def set_validated(self, profile_id: str, model: "ApiConfigProfile"):
+        """记录写入时已经校验过的配置项，调用方须保证model与存储的配置一致"""
+        self._validated[profile_id] = ValidatedProfile.of(model)
+
+    def find_id_by_name(self, name: str) -> Optional[str]:
+        """按名称(忽略大小写)查找配置id"""
+        return self._names.get(normalize_name(name))
+
+    def name_taken(self, name: str, exclude_id: Optional[str] = None) -> bool:
+        """名称是否已被其他配置占用"""
+        owner = self.find_id_by_name(name)
+        return owner is not None and owner != exclude_id
+
+    @property
+    def revision(self) -> int:
+        """文档修订号，每次落盘递增"""
+        return int(self.metadata.get("revision", 0))
+
+    def bump_revision(self) -> int:
+        """递增文档修订号"""
+        self.metadata["revision"] = self.revision + 1
+        return self.metadata["revision"]
+
+    @property
+    def active_id(self) -> Optional[str]:
+        return self._active_id
+
+    def active(self) -> Optional[dict]:
+        """获取当前激活的配置项"""
+        return self._profiles.get(self._active_id) if self._active_id else None
+
+    def first_id(self) -> Optional[str]:
+        """获取第一个配置项的id"""
+        return next(iter(self._profiles), None)
+
+    def add(self, profile: dict, model: Optional["ApiConfigProfile"] = None):
+        """添加配置项，model为写入前已校验的同一配置"""
+        profile_id = profile["id"]
+        if self._order is not None and profile_id not in self._profiles:
+            self._positions[profile_id] = len(self._order)
+            self._order.append(profile_id)
+        self._profiles[profile_id] = profile
+        if model is not None:
+            self.set_validated(profile_id, model)
+        else:
+            self._validated.pop(profile_id, None)
+        self._names.setdefault(normalize_name(profile["name"]), profile_id)
+        if profile.get("is_active"):
+            self.activate(profile_id)
+
+    def rename(self, profile_id: str, name: str):
+        """修改配置名称并同步名称映射"""
+        profile = self._profiles[profile_id]
+        old_key = normalize_name(profile.get("name") or "")
+        if self._names.get(old_key) == profile_id:
+            del self._names[old_key]
+        profile["name"] = name
+        self._names.setdefault(normalize_name(name), profile_id)
+        self._validated.pop(profile_id, None)
+
+    def update(self, profile_id: str, **fields):
+        """修改配置项的非索引字段(名称须通过rename修改)"""
+        self._profiles[profile_id].update(fields)
+        self._validated.pop(profile_id, None)
+
+    def remove(self, profile_id: str) -> Optional[dict]:
+        """删除配置项，返回被删除的配置"""
+        profile = self._profiles.pop(profile_id, None)
+        if profile is None:
+            return None
+        self._order = None
+        self._positions = None
+        self._validated.pop(profile_id, None)
+
+        key = normalize_name(profile.get("name") or "")
+        if self._names.get(key) == profile_id:
+            del self._names[key]
+        if self._active_id == profile_id:
+            self._active_id = None
+        return profile
+
+    def activate(self, profile_id: str):
+        """切换激活配置指针"""
+        previous = self.active()
+        if previous is not None and self._active_id != profile_id:
+            previous["is_active"] = False
+            self._validated.pop(self._active_id, None)
+        target = self._profiles[profile_id]
+        if not target.get("is_active"):
+            target["is_active"] = True
+            self._validated.pop(profile_id, None)
+        self._active_id = profile_id
+
+    def page(self, after: Optional[str] = None, after_position: int = -1, limit: Optional[int] = None,
+             predicate: Optional[Callable[[dict], bool]] = None) -> tuple:
+        """从游标之后按插入顺序取一页配置
+        
+        after为上一页最后一项的id，该项已被删除时退回使用after_position。
+        返回(配置列表, 最后一项的(id, 位置)或None表示没有下一页)。
+        """
+        if self._order is None:
+            self._order = list(self._profiles)
+            self._positions = {profile_id: i for i, profile_id in enumerate(self._order)}
+        start = self._positions[after] + 1 if after in self._positions else after_position + 1
+
+        items: List[dict] = []
+        last = None
+        for position in range(max(start, 0), len(self._order)):
+            profile_id = self._order[position]
+            profile = self._profiles[profile_id]
+            if predicate is not None and not predicate(profile):
+                continue
+            if limit is not None and len(items) >= limit:
+                return items, last
+            items.append(profile)
+            last = (profile_id, position)
+        return items, None
+
+    def to_document(self) -> dict:
+        """生成用于持久化的配置文档"""
+        return {
+            "api_profiles": list(self._profiles.values()) + self._unindexed,
+            "metadata": self.metadata
+        }
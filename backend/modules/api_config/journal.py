@@ -0,0 +1,484 @@
+import bisect
+import os
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from . import fastjson
+from .activations import to_epoch
+from .fileio import ProcessLock, atomic_write_bytes
+
+# 分段文件名为第一条记录的序号，如 000000000001.log，旁边的 .idx 是该分段的时间索引
+SEGMENT_PATTERN = re.compile(r"^(\d{12})\.log$")
+# 压缩的中间结果：<第一个序号>-<最后一个序号>.compact，写完整后才改成这个名字
+COMPACT_PATTERN = re.compile(r"^(\d{12})-(\d{12})\.compact$")
+# 时间索引的一条记录：(时间戳, 记录在分段中的字节偏移)
+INDEX_RECORD = struct.Struct("<dQ")
+# 相邻索引记录之间至少间隔的字节数，查询时最多顺序读取这么多内容
+INDEX_STRIDE = 4096
+READ_CHUNK = 64 * 1024
+
+def segment_name(first_seq: int) -> str:
+    return f"{first_seq:012d}.log"
+
+@dataclass
+class Segment:
+    """一个分段，first_epoch为第一条记录的时间(空分段为None)"""
+    first_seq: int
+    path: Path
+    first_epoch: Optional[float] = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.path.with_suffix(".idx")
+
+@dataclass
+class Tail:
+    """最后一个分段的写入位置，跨进程追加时以文件大小判断是否需要重新读取"""
+    segment: Segment
+    size: int
+    last_seq: int
+    last_epoch: Optional[float]
+    last_indexed: Optional[int]
+
+def parse_line(line: bytes) -> Optional[dict]:
+    try:
+        entry = fastjson.loads(line)
+    except ValueError:
+        return None
+    return entry if isinstance(entry, dict) else None
+
+def read_forward(path: Path, offset: int = 0) -> Iterator[Tuple[int, int, dict]]:
+    """从offset开始顺序读取完整的行，产出(行起点, 行终点, 记录)"""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        buffer = b""
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return
+            buffer += chunk
+            start = 0
+            while True:
+                end = buffer.find(b"\n", start)
+                if end < 0:
+                    break
+                entry = parse_line(buffer[start:end])
+                if entry is not None:
+                    yield offset + start, offset + end + 1, entry
+                start = end + 1
+            offset += start
+            buffer = buffer[start:]
+
+def read_backward(path: Path, end: Optional[int] = None) -> Iterator[Tuple[int, int, dict]]:
+    """从end(须为行边界，默认文件末尾)向前逐行读取，产出(行起点, 行终点, 记录)，末尾不完整的行被忽略"""
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END) if end is None else end
+        buffer = b""
+        trim = end is None
+        while True:
+            # buffer 是 [position, position+len(buffer)) 的内容，以完整的行结尾
+            while True:
+                cut = buffer.rfind(b"\n", 0, len(buffer) - 1)
+                if cut < 0:
+                    break
+                line_start = position + cut + 1
+                entry = parse_line(buffer[cut + 1:-1])
+                if entry is not None:
+                    yield line_start, position + len(buffer), entry
+                buffer = buffer[:cut + 1]
+            if position == 0:
+                entry = parse_line(buffer[:-1]) if buffer else None
+                if entry is not None:
+                    yield 0, len(buffer), entry
+                return
+            step = min(READ_CHUNK, position)
+            position -= step
+            f.seek(position)
+            buffer = f.read(step) + buffer
+            if trim:
+                newline = buffer.rfind(b"\n")
+                if newline < 0 and position > 0:
+                    continue
+                buffer = buffer[:newline + 1]
+                trim = False
+
+def build_index(path: Path) -> Tuple[bytes, Optional[float]]:
+    """扫描分段生成时间索引，返回(索引内容, 第一条记录的时间)"""
+    records, last_indexed, first_epoch = [], None, None
+    for start, _, entry in read_forward(path):
+        epoch = to_epoch(entry["at"])
+        if first_epoch is None:
+            first_epoch = epoch
+        if last_indexed is None or start - last_indexed >= INDEX_STRIDE:
+            records.append(INDEX_RECORD.pack(epoch, start))
+            last_indexed = start
+    return b"".join(records), first_epoch
+
+def create_journal(directory: Path) -> "Journal":
+    """按环境变量 CCM_JOURNAL_SEGMENT_MB、CCM_JOURNAL_RETENTION_DAYS 创建变更日志(服务和命令行工具共用)"""
+    retention_days = float(os.getenv("CCM_JOURNAL_RETENTION_DAYS", "90"))
+    return Journal(
+        directory,
+        segment_bytes=int(float(os.getenv("CCM_JOURNAL_SEGMENT_MB", "8")) * 1024 * 1024),
+        retention_days=retention_days if retention_days > 0 else None
+    )
+
+class Journal:
+    """变更日志：每次配置变更和激活追加一条记录，只追加、不改写已有内容
+
+    记录按时间顺序写入分段文件(每行一条JSON)，每条记录带有写入后的激活配置ID，
+    因此"某一时刻的激活配置"就是该时刻之前的最后一条记录。每个分段旁有紧凑的二进制时间索引
+    (每隔约 INDEX_STRIDE 字节记录一次 时间→偏移)，查询时先按分段的起始时间二分、再在索引中二分，
+    最后只顺序读取几KB，耗时与记录总数的对数相关。
+    分段超过 segment_bytes 后开始新分段；设置retention_days时，早于保留期的分段被合并为一个
+    只保留激活变化的分段，仍能回答任意时刻的激活配置。
+    追加在跨进程锁内完成，时间戳单调不减。
+    """
+
+    def __init__(self, directory: Path, segment_bytes: int = 8 * 1024 * 1024,
+                 retention_days: Optional[float] = None, clock=time.time):
+        self.directory = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.retention_days = retention_days
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._process_lock = ProcessLock(self.directory / "journal.lock")
+        self._segments: List[Segment] = []
+        self._directory_signature = None
+        self._tail: Optional[Tail] = None
+
+    # === 分段 ===
+
+    def _refresh_segments(self):
+        """目录内容变化时重新列出分段，调用方须持有 self._lock"""
+        try:
+            signature = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self._segments, self._directory_signature, self._tail = [], None, None
+            return
+        if signature == self._directory_signature:
+            # 追加不改变目录，其他进程向空分段写入第一条记录后需要补上起始时间
+            if self._segments and self._segments[-1].first_epoch is None:
+                self._segments[-1].first_epoch = self._first_epoch(self._segments[-1])
+            return
+        names = os.listdir(self.directory)
+        if any(COMPACT_PATTERN.match(name) for name in names):
+            with self._process_lock:
+                self._finish_compaction()
+            names = os.listdir(self.directory)
+            signature = os.stat(self.directory).st_mtime_ns
+        segments = []
+        for name in sorted(names):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segment = Segment(int(match.group(1)), self.directory / name)
+                segment.first_epoch = self._first_epoch(segment)
+                segments.append(segment)
+        self._segments = segments
+        self._directory_signature = signature
+        if self._tail is not None and (not segments or self._tail.segment.path != segments[-1].path):
+            self._tail = None
+
+    def _first_epoch(self, segment: Segment) -> Optional[float]:
+        """分段第一条记录的时间：读取索引的第一条记录，索引缺失时重新生成"""
+        try:
+            with open(segment.index_path, 'rb') as f:
+                head = f.read(INDEX_RECORD.size)
+            if len(head) == INDEX_RECORD.size:
+                return INDEX_RECORD.unpack(head)[0]
+        except FileNotFoundError:
+            pass
+        index, first_epoch = build_index(segment.path)
+        if index:
+            atomic_write_bytes(segment.index_path, index)
+        return first_epoch
+
+    def _sync_tail(self) -> Tail:
+        """确定最后一个分段的写入位置，调用方须持有两把锁；其他进程追加过时只读取新增的部分"""
+        if not self._segments:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._start_segment(1)
+        segment = self._segments[-1]
+        size = segment.path.stat().st_size
+        tail = self._tail
+        if tail is not None and tail.segment.path == segment.path and tail.size == size:
+            return tail
+        if tail is None or tail.segment.path != segment.path or size < tail.size:
+            tail = Tail(segment, 0, segment.first_seq - 1, None, None)
+            try:
+                with open(segment.index_path, 'rb') as f:
+                    f.seek(-INDEX_RECORD.size, os.SEEK_END)
+                    tail.last_indexed = INDEX_RECORD.unpack(f.read(INDEX_RECORD.size))[1]
+            except (FileNotFoundError, OSError, struct.error):
+                pass
+            last = next(read_backward(segment.path), None)
+        else:
+            last = None
+            for _, end, entry in read_forward(segment.path, tail.size):
+                last = (None, end, entry)
+            if last is None:
+                last = (None, tail.size, None)
+        if last is not None and last[2] is not None:
+            tail.size = last[1]
+            tail.last_seq = last[2]["seq"]
+            tail.last_epoch = to_epoch(last[2]["at"])
+        if size != tail.size:  # 进程写入中途退出留下的不完整行，截掉以免与下一条记录连在一起
+            os.truncate(segment.path, tail.size)
+        if tail.last_epoch is None and self._segments[:-1]:
+            previous = next(read_backward(self._segments[-2].path), None)
+            if previous is not None:
+                tail.last_epoch = to_epoch(previous[2]["at"])
+        self._tail = tail
+        return tail
+
+    def _start_segment(self, first_seq: int):
+        path = self.directory / segment_name(first_seq)
+        path.touch()
+        self._segments.append(Segment(first_seq, path))
+        self._directory_signature = os.stat(self.directory).st_mtime_ns
+        self._tail = None
+
+    # === 追加 ===
+
+    def append(self, records: Iterable[dict]) -> List[dict]:
+        """追加记录(一次写入)，补充序号seq和时间at后返回"""
+        records = list(records)
+        if not records:
+            return []
+        with self._lock, self._process_lock:
+            self._refresh_segments()
+            tail = self._sync_tail()
+            rotated = False
+            if tail.size >= self.segment_bytes:
+                self._start_segment(tail.last_seq + 1)
+                last_epoch = tail.last_epoch
+                tail = self._sync_tail()
+                tail.last_epoch = last_epoch
+                rotated = True
+
+            at = datetime.utcfromtimestamp(max(self._clock(), tail.last_epoch or 0)).isoformat()
+            epoch = to_epoch(at)
+            lines, index_records, entries = [], [], []
+            offset = tail.size
+            for record in records:
+                entry = {"seq": tail.last_seq + len(entries) + 1, "at": at, **record}
+                line = fastjson.dumps(entry) + b"\n"
+                if tail.last_indexed is None or offset - tail.last_indexed >= INDEX_STRIDE:
+                    index_records.append(INDEX_RECORD.pack(epoch, offset))
+                    tail.last_indexed = offset
+                lines.append(line)
+                entries.append(entry)
+                offset += len(line)
+
+            segment = tail.segment
+            self._write_append(segment.path, b"".join(lines))
+            if index_records:
+                self._write_append(segment.index_path, b"".join(index_records))
+            if segment.first_epoch is None:
+                segment.first_epoch = epoch
+            tail.size, tail.last_seq, tail.last_epoch = offset, entries[-1]["seq"], epoch
+        if rotated and self.retention_days is not None:
+            self.compact(epoch - self.retention_days * 86400)
+        return entries
+
+    @staticmethod
+    def _write_append(path: Path, data: bytes):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    # === 查询 ===
+
+    def _locate(self, epoch: float) -> Optional[Tuple[int, int]]:
+        """时间不晚于epoch的最后一条索引记录：(分段下标, 偏移)；epoch早于所有记录时返回None"""
+        firsts = [segment.first_epoch for segment in self._segments if segment.first_epoch is not None]
+        position = bisect.bisect_right(firsts, epoch) - 1
+        if position < 0:
+            return None
+        segment = self._segments[position]
+        with open(segment.index_path, 'rb') as f:
+            fd = f.fileno()
+            low, high = 0, os.fstat(fd).st_size // INDEX_RECORD.size
+            offset = 0
+            while low < high:  # 在索引中二分，只读取探查到的记录
+                middle = (low + high) // 2
+                record_epoch, record_offset = INDEX_RECORD.unpack(os.pread(fd, INDEX_RECORD.size, middle * INDEX_RECORD.size))
+                if record_epoch <= epoch:
+                    offset, low = record_offset, middle + 1
+                else:
+                    high = middle
+        return position, offset
+
+    def entry_at(self, epoch: float) -> Optional[dict]:
+        """时间不晚于epoch的最后一条记录，其active_profile_id即该时刻的激活配置"""
+        with self._lock:
+            self._refresh_segments()
+            located = self._locate(epoch)
+            if located is None:
+                return None
+            position, offset = located
+            result = None
+            for _, _, entry in read_forward(self._segments[position].path, offset):
+                if to_epoch(entry["at"]) > epoch:
+                    break
+                result = entry
+            return result
+
+    def _start_position(self, since: Optional[float]) -> Tuple[int, int]:
+        if since is None:
+            return 0, 0
+        located = self._locate(since)
+        return located if located is not None else (0, 0)
+
+    def _end_position(self, until: Optional[float]) -> Tuple[int, Optional[int]]:
+        """第一条不早于until的记录的位置，(分段下标, 偏移)，偏移为None表示分段末尾"""
+        last = len(self._segments) - 1
+        if until is None:
+            return last, None
+        located = self._locate(until)
+        if located is None:
+            return 0, 0
+        position, offset = located
+        for start, _, entry in read_forward(self._segments[position].path, offset):
+            if to_epoch(entry["at"]) >= until:
+                return position, start
+        return position, None
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              types: Optional[List[str]] = None, profile_id: Optional[str] = None,
+              limit: int = 100, cursor: Optional[str] = None,
+              descending: bool = True) -> Tuple[List[dict], Optional[str]]:
+        """[since, until)内满足条件的记录，返回(记录, 下一页游标)；游标为"分段序号:偏移"，没有更多时为None"""
+        with self._lock:
+            self._refresh_segments()
+            if not self._segments:
+                return [], None
+            positions = {segment.first_seq: i for i, segment in enumerate(self._segments)}
+            resume = None
+            if cursor:
+                try:
+                    first_seq, offset = (int(part) for part in cursor.split(":", 1))
+                    resume = (positions[first_seq], offset)
+                except (ValueError, KeyError):
+                    raise ValueError(f"无效的游标: {cursor}")
+
+            def wanted(entry: dict) -> bool:
+                if types and entry.get("type") not in types:
+                    return False
+                return profile_id is None or profile_id in entry.get("profile_ids", ())
+
+            results = []
+            if descending:
+                position, end = resume or self._end_position(until)
+                while position >= 0:
+                    segment = self._segments[position]
+                    for start, line_end, entry in read_backward(segment.path, end):
+                        if since is not None and to_epoch(entry["at"]) < since:
+                            return results, None
+                        if wanted(entry):
+                            if len(results) == limit:
+                                return results, f"{segment.first_seq}:{line_end}"
+                            results.append(entry)
+                    position, end = position - 1, None
+                return results, None
+
+            position, offset = resume or self._start_position(since)
+            while position < len(self._segments):
+                segment = self._segments[position]
+                for start, end, entry in read_forward(segment.path, offset):
+                    epoch = to_epoch(entry["at"])
+                    if since is not None and epoch < since:
+                        continue
+                    if until is not None and epoch >= until:
+                        return results, None
+                    if wanted(entry):
+                        if len(results) == limit:
+                            return results, f"{segment.first_seq}:{start}"
+                        results.append(entry)
+                position, offset = position + 1, 0
+            return results, None
+
+    # === 压缩 ===
+
+    def compact(self, before: float) -> int:
+        """合并早于before的已封存分段，只保留激活配置发生变化的记录，返回丢弃的记录数
+
+        只处理从最早的分段开始、连续且整个分段都早于before的分段(不包括正在写入的分段)。
+        先把结果完整写入 .compact 文件，再删除被合并的分段、替换第一个分段，中途退出时下次读取会继续完成。
+        """
+        with self._lock, self._process_lock:
+            self._refresh_segments()
+            merge = []
+            for segment, following in zip(self._segments, self._segments[1:]):
+                if following.first_epoch is None or following.first_epoch > before:
+                    break
+                merge.append(segment)
+            if not merge:
+                return 0
+
+            kept, dropped, active = [], 0, None
+            for segment in merge:
+                for start, end, entry in read_forward(segment.path):
+                    changed = entry.get("active_profile_id") != active
+                    active = entry.get("active_profile_id")
+                    if changed or entry.get("type") == "profile_activated":
+                        kept.append(fastjson.dumps(entry) + b"\n")
+                    else:
+                        dropped += 1
+            if dropped == 0 and len(merge) == 1:  # 已经压缩过
+                return 0
+
+            last_seq = self._segments[len(merge)].first_seq - 1
+            name = f"{merge[0].first_seq:012d}-{last_seq:012d}.compact"
+            temp = self.directory / f"{name}.tmp"
+            with open(temp, 'wb') as f:
+                f.write(b"".join(kept))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.directory / name)
+            self._finish_compaction()
+            self._directory_signature = None
+            self._refresh_segments()
+            return dropped
+
+    def _finish_compaction(self):
+        """完成已写好的 .compact：删除被合并的分段，替换第一个分段并重建索引，调用方须持有跨进程锁"""
+        for name in os.listdir(self.directory):
+            if name.endswith(".compact.tmp"):
+                os.unlink(self.directory / name)
+                continue
+            match = COMPACT_PATTERN.match(name)
+            if not match:
+                continue
+            first_seq, last_seq = int(match.group(1)), int(match.group(2))
+            for other in os.listdir(self.directory):
+                other_match = SEGMENT_PATTERN.match(other)
+                if other_match and first_seq < int(other_match.group(1)) <= last_seq:
+                    os.unlink(self.directory / other)
+                    try:
+                        os.unlink((self.directory / other).with_suffix(".idx"))
+                    except FileNotFoundError:
+                        pass
+            target = self.directory / segment_name(first_seq)
+            os.replace(self.directory / name, target)
+            index, _ = build_index(target)
+            atomic_write_bytes(target.with_suffix(".idx"), index)
+        self._tail = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh_segments()
+            sizes = [segment.path.stat().st_size for segment in self._segments]
+            first = self._segments[0].first_epoch if self._segments else None
+            return {
+                "segments": len(self._segments),
+                "bytes": sum(sizes),
+                "first_at": datetime.utcfromtimestamp(first).isoformat() if first is not None else None
+            }
@@ -1,286 +1,898 @@
 import threading
 import json
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import Callable, List, Optional, Dict, Tuple
 from datetime import datetime
-import shutil
 import uuid
+from . import fastjson
+from .activations import ActivationHistory
+from .backups import CONFIG_FILE, SETTINGS_FILE, BackupStore, Snapshot, canonical_document, diff_documents, diff_text
+from .fileio import ProcessLock, atomic_write_bytes
+from .journal import Journal
+from .index import ProfileIndex, ProfilePage, decode_cursor, encode_cursor
 from .models import ApiConfigProfile, CreateApiConfigRequest, UpdateApiConfigRequest
+from .settings_sync import ClaudeSettingsSync
+from .storage import ChangeSet, ConfigStorage, JsonFileStorage
+from .sync_targets import SyncTarget, SyncTargetRegistry, TargetSyncResult
+from .watcher import FileWatcher, FileSignature, file_signature
+from modules.metrics.instruments import count_cache_lookup, instrument_lock, observe_io
+
+class RevisionConflictError(Exception):
+    """配置文档修订号与调用方预期不一致（已被其他请求或进程修改）"""
+    
+    def __init__(self, expected: int, current: int):
+        super().__init__(f"配置已被修改：期望修订号 {expected}，当前修订号 {current}")
+        self.expected = expected
+        self.current = current
+
+@dataclass
+class ApplyResult:
+    """激活配置的结果，targets为各同步目标的写入结果"""
+    success: bool
+    targets: List[TargetSyncResult] = field(default_factory=list)
 
 class ApiConfigManager:
     def __init__(self, 
                  config_file: str = "./data/api_configs.json",
-                 claude_settings_path: str = "~/.claude/settings.json"):
+                 claude_settings_path: str = "~/.claude/settings.json",
+                 watcher: Optional[FileWatcher] = None,
+                 storage: Optional[ConfigStorage] = None,
+                 settings_sync_window: float = 0.0,
+                 backups: Optional[BackupStore] = None,
+                 auto_backup_window: Optional[float] = None,
+                 sync_targets: Optional[SyncTargetRegistry] = None,
+                 activations: Optional[ActivationHistory] = None,
+                 journal: Optional[Journal] = None):
         self.config_file = Path(config_file)
         self.claude_settings_path = Path(claude_settings_path).expanduser()
-        self._lock = threading.Lock()
-        self._ensure_data_dir()
-        self._ensure_config_file()
-    
-    def _ensure_data_dir(self):
-        """确保数据目录存在"""
-        self.config_file.parent.mkdir(parents=True, exist_ok=True)
-    
-    def _ensure_config_file(self):
-        """确保配置文件存在"""
-        if not self.config_file.exists():
-            initial_data = {
-                "api_profiles": [],
-                "metadata": {
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "version": "1.0"
-                }
-            }
-            self._write_config_data(initial_data)
+        self._storage = storage or JsonFileStorage(self.config_file)
+        # _lock 保护内存快照，只在内存操作期间持有；
+        # _write_lock 串行化所有进程的写操作(线程锁+fcntl文件锁)，覆盖磁盘写入
+        self._lock = instrument_lock(threading.Lock(), "snapshot")
+        self._write_lock = instrument_lock(ProcessLock(self._storage.lock_path), "write")
+        
+        # 已解析的配置快照，文件签名变化(或收到文件事件)时失效
+        self._cache: Optional[ProfileIndex] = None
+        self._cache_signature = None
+        self._cache_stale = True
+        self._watch_native = False
+        
+        # 变更事件订阅者，以及settings.json的内容感知同步器
+        self._listeners: List[Callable[[str, dict], None]] = []
+        self._settings_sync = ClaudeSettingsSync(self.claude_settings_path, window=settings_sync_window)
+        # 额外的settings.json同步目标(项目级.claude/settings.json等)，各自可绑定不同配置
+        self._sync_targets = sync_targets or SyncTargetRegistry(self.config_file.parent / "sync_targets.json")
+        # 激活记录(只追加)，用于把用量等按时间归属到当时的激活配置
+        self._activations = activations or ActivationHistory(self.config_file.parent / "activation_history.jsonl")
+        # 变更日志(只追加)：每次变更和激活一条记录，可查询任意时刻的激活配置
+        self.journal = journal or Journal(self.config_file.parent / "journal")
+        # 本地代理模式下settings.json固定指向代理的(API Key, Base URL)
+        self._proxy_endpoint: Optional[Tuple[str, str]] = None
+        # 按settings.json文件签名缓存的解析结果
+        self._claude_config_cache: Optional[Tuple[FileSignature, dict]] = None
+        
+        # 备份库；auto_backup_window不为None时在配置变更后自动备份，窗口内的多次变更合并为一次
+        self._backups = backups or BackupStore(self.config_file.parent / "backups")
+        self._backup_lock = threading.Lock()
+        self._backup_timer: Optional[threading.Timer] = None
+        self._auto_backup_window = auto_backup_window
+        # 最近一次备份时的配置编码(按快照签名和修订号缓存)和settings.json内容(按文件签名缓存)
+        self._backup_config: Optional[Tuple[tuple, bytes, int]] = None
+        self._backup_settings: Optional[Tuple[FileSignature, Optional[bytes]]] = None
+        if auto_backup_window is not None:
+            self.add_listener(self._schedule_auto_backup)
+        
+        self._storage.initialize()
+        if watcher is not None:
+            self._watch_native = all([
+                watcher.watch(path, self._on_config_file_changed)
+                for path in self._storage.watch_paths
+            ])
+            watcher.watch(self.claude_settings_path, self._on_claude_settings_changed)
+    
+    def add_listener(self, listener: Callable[[str, dict], None]):
+        """订阅配置变更事件，回调参数为(事件类型, 事件数据)"""
+        self._listeners.append(listener)
+    
+    def _emit(self, event_type: str, data: Optional[dict] = None):
+        """通知所有订阅者"""
+        for listener in self._listeners:
+            try:
+                listener(event_type, data or {})
+            except Exception as e:
+                print(f"配置变更事件处理失败: {e}")
+    
+    def _on_config_file_changed(self, path: Path):
+        """文件监听回调：标记快照需要重新校验"""
+        self._cache_stale = True
+        with self._lock:
+            changed = self._storage.signature() != self._cache_signature
+        if changed:
+            self._emit("profiles_changed", {"source": "external"})
+    
+    def _on_claude_settings_changed(self, path: Path):
+        """文件监听回调：settings.json被外部修改"""
+        if file_signature(path) != self._settings_sync.last_signature:
+            self._emit("settings_changed", {"source": "external"})
+    
+    def _invalidate_cache(self):
+        """丢弃配置快照，下次读取时重新解析文件"""
+        self._cache = None
+        self._cache_signature = None
+    
+    def _get_index(self, verify: bool = False) -> ProfileIndex:
+        """获取配置索引
+        
+        返回的是共享快照，调用方须持有 self._lock；修改后保存失败时会自动丢弃快照。
+        verify=True 时跳过文件事件快速路径，总是比对存储签名（写操作使用，以读到其他进程的最新写入）。
+        """
+        if self._cache is not None and self._watch_native and not self._cache_stale and not verify:
+            count_cache_lookup("hit")
+            return self._cache
+        
+        signature = self._storage.signature()
+        self._cache_stale = False
+        if self._cache is not None and signature == self._cache_signature:
+            count_cache_lookup("revalidated")
+            return self._cache
+        
+        count_cache_lookup("miss")
+        self._cache = ProfileIndex(self._storage.load())
+        self._cache_signature = signature
+        return self._cache
+    
+    @contextmanager
+    def _mutation(self, expected_revision: Optional[int] = None):
+        """持有 self._lock 修改配置索引，过程中出现异常时丢弃快照
+        
+        调用方须已持有 self._write_lock；expected_revision 不为空时做比较并交换检查。
+        """
+        with self._lock:
+            index = self._get_index(verify=True)
+            if expected_revision is not None and index.revision != expected_revision:
+                raise RevisionConflictError(expected_revision, index.revision)
+            try:
+                yield index
+            except BaseException:
+                self._invalidate_cache()
+                raise
+    
+    def _prepare(self, index: ProfileIndex, changes: ChangeSet):
+        """递增修订号并生成待落盘的数据，调用方须持有 self._lock"""
+        index.bump_revision()
+        return self._storage.prepare(index, changes)
+    
+    def _commit(self, payload) -> bool:
+        """落盘已准备好的数据
+        
+        只在持有 self._write_lock 时调用；写盘期间不持有 self._lock，读操作不会被阻塞。
+        写入失败时丢弃内存中已修改的快照。
+        """
+        success = self._storage.commit(payload)
+        with self._lock:
+            if success:
+                # 刷新快照签名，避免自身写入触发重新解析
+                self._cache_signature = self._storage.signature()
+            else:
+                self._invalidate_cache()
+        return success
     
-    def _read_config_data(self) -> dict:
-        """读取配置文件数据"""
+    def _journal(self, index: ProfileIndex, *records: Tuple[str, List[str], dict]):
+        """写入变更日志，每条记录附带修订号和变更后的激活配置；调用方须持有 self._write_lock
+        
+        记录中不包含API Key，只记录被修改的字段名。写入失败只打印错误，不影响已落盘的变更。
+        """
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {
-                "api_profiles": [],
-                "metadata": {
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "version": "1.0"
-                }
-            }
+            self.journal.append(
+                dict(type=event_type, revision=index.revision, active_profile_id=index.active_id,
+                     profile_ids=profile_ids, **data)
+                for event_type, profile_ids, data in records
+            )
+        except OSError as e:
+            print(f"写入变更日志失败: {e}")
     
-    def _write_config_data(self, data: dict) -> bool:
-        """写入配置文件数据"""
+    # === 备份 ===
+    
+    def _current_backup_files(self) -> Tuple[Dict[str, bytes], int, int]:
+        """当前配置和settings.json的备份内容，返回(文件名→内容, 修订号, 配置数量)
+        
+        配置和settings.json自上次调用后都没有变化时直接复用缓存的内容，不编码也不读文件。
+        """
+        with self._lock:
+            index = self._get_index()
+            key = (self._cache_signature, index.revision)
+            if self._backup_config is None or self._backup_config[0] != key:
+                self._backup_config = (key, canonical_document(index.to_document()), len(index))
+            _, config, profile_count = self._backup_config
+            revision = index.revision
+        
+        signature = file_signature(self.claude_settings_path)
+        if self._backup_settings is None or self._backup_settings[0] != signature:
+            try:
+                with open(self.claude_settings_path, 'rb') as f:
+                    settings = f.read()
+            except FileNotFoundError:
+                settings = None
+            self._backup_settings = (signature, settings)
+        settings = self._backup_settings[1]
+        
+        files = {CONFIG_FILE: config}
+        if settings is not None:
+            files[SETTINGS_FILE] = settings
+        return files, revision, profile_count
+    
+    def backup_config(self, reason: str = "manual") -> Tuple[Snapshot, bool]:
+        """备份当前配置和settings.json，返回(备份, 是否新建)；内容未变化时返回最近的备份"""
+        with self._backup_lock:
+            files, revision, profile_count = self._current_backup_files()
+            return self._backups.snapshot(files, reason, revision, profile_count)
+    
+    def _schedule_auto_backup(self, event_type: str, data: dict):
+        """变更事件回调：窗口结束时自动备份"""
+        if self._auto_backup_window <= 0:
+            self._run_auto_backup()
+            return
+        with self._backup_lock:
+            if self._backup_timer is None:
+                self._backup_timer = threading.Timer(self._auto_backup_window, self._run_auto_backup)
+                self._backup_timer.daemon = True
+                self._backup_timer.start()
+    
+    def _run_auto_backup(self):
+        with self._backup_lock:
+            self._backup_timer = None
         try:
-            # 更新元数据
-            data["metadata"]["last_updated"] = datetime.utcnow().isoformat()
-            
-            # 原子性写入
-            temp_file = self.config_file.with_suffix('.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            
-            # 移动到目标文件
-            temp_file.replace(self.config_file)
-            return True
+            self.backup_config("auto")
         except Exception as e:
-            print(f"写入配置文件失败: {e}")
-            import traceback
-            traceback.print_exc()
-            return False
+            print(f"自动备份失败: {e}")
     
-    def backup_config(self) -> bool:
-        """备份配置文件"""
-        try:
-            backup_path = self.config_file.with_suffix(f'.bak.{int(datetime.utcnow().timestamp())}')
-            shutil.copy2(self.config_file, backup_path)
-            return True
-        except Exception:
-            return False
+    def flush_backups(self):
+        """立即执行合并窗口内尚未进行的自动备份"""
+        with self._backup_lock:
+            timer, self._backup_timer = self._backup_timer, None
+        if timer is not None:
+            timer.cancel()
+            self._run_auto_backup()
+    
+    def list_backups(self) -> List[Snapshot]:
+        """按时间从新到旧列出备份"""
+        return self._backups.snapshots()
+    
+    def get_backup_stats(self) -> dict:
+        """备份库占用情况和保留策略"""
+        return self._backups.stats()
+    
+    def _get_backup(self, snapshot_id: str) -> Snapshot:
+        snapshot = self._backups.get(snapshot_id)
+        if snapshot is None:
+            raise KeyError(snapshot_id)
+        return snapshot
+    
+    def diff_backups(self, base_id: str, target_id: Optional[str] = None) -> dict:
+        """比较两个备份，target_id为空时与当前配置比较
+        
+        返回按配置ID比较的增删改结果和settings.json的unified diff。
+        """
+        base = self._get_backup(base_id)
+        base_files = {name: self._backups.read(base, name) for name in (CONFIG_FILE, SETTINGS_FILE)}
+        if target_id is None:
+            target_files = self._current_backup_files()[0]
+        else:
+            target = self._get_backup(target_id)
+            target_files = {name: self._backups.read(target, name) for name in (CONFIG_FILE, SETTINGS_FILE)}
+        
+        diff = diff_documents(fastjson.loads(base_files[CONFIG_FILE]), fastjson.loads(target_files[CONFIG_FILE]))
+        diff["settings_diff"] = diff_text(
+            base_files.get(SETTINGS_FILE), target_files.get(SETTINGS_FILE),
+            f"{base_id}/{SETTINGS_FILE}", f"{target_id or 'current'}/{SETTINGS_FILE}"
+        )
+        return diff
+    
+    def restore_backup(self, snapshot_id: str, restore_settings: bool = False,
+                       expected_revision: Optional[int] = None) -> Tuple[int, Snapshot]:
+        """从备份恢复配置库，返回(恢复后的修订号, 恢复前自动创建的备份)
+        
+        整个配置库在一次写入中替换(json后端原子重写文件，sqlite后端单个事务)。
+        restore_settings=True 时同时恢复备份中的settings.json(代理模式下忽略)，
+        否则只把恢复后的激活配置同步到settings.json。备份不存在时抛出KeyError。
+        """
+        snapshot = self._get_backup(snapshot_id)
+        document = fastjson.loads(self._backups.read(snapshot, CONFIG_FILE))
+        settings = self._backups.read(snapshot, SETTINGS_FILE) if restore_settings else None
+        
+        with self._write_lock:
+            # 恢复前先备份当前状态，恢复操作本身也可以撤销
+            pre_restore, _ = self.backup_config("pre-restore")
+            with self._mutation(expected_revision) as index:
+                metadata = dict(index.metadata, **(document.get("metadata") or {}))
+                metadata["revision"] = index.revision
+                restored = ProfileIndex({"api_profiles": document.get("api_profiles", []), "metadata": metadata})
+                payload = self._prepare(restored, ChangeSet(
+                    upserts=list(restored.values()),
+                    deletes=[profile["id"] for profile in index.values() if profile["id"] not in restored],
+                    active_id=restored.active_id
+                ))
+                self._cache = restored
+                active = restored.validated(restored.active_id) if restored.active_id else None
+                active_changed = restored.active_id != index.active_id
+            
+            if settings is not None and self._proxy_endpoint is None:
+                atomic_write_bytes(self.claude_settings_path, settings)
+            elif active is not None:
+                self._apply_profile_to_claude(active.model)
+            
+            if not self._commit(payload):
+                raise Exception("保存配置失败")
+            if active_changed and active is not None:
+                self._activations.record(active.model.id, active.model.name)
+            self._journal(
+                restored,
+                ("restored", [], {"snapshot_id": snapshot_id, "count": len(restored)}),
+                *([("profile_activated", [active.model.id], {"name": active.model.name})]
+                  if active_changed and active is not None else [])
+            )
+            self._sync_target_list(self._sync_targets.targets())
+            self._emit("profiles_changed", {
+                "source": "restore",
+                "snapshot_id": snapshot_id,
+                "active_profile_id": restored.active_id
+            })
+            return restored.revision, pre_restore
     
     # === API配置库管理 ===
     
     def get_all_profiles(self) -> List[ApiConfigProfile]:
-        """获取所有API配置项"""
+        """获取所有API配置项
+        
+        返回的是索引中缓存的已校验实例，配置项变更前不会重复校验；调用方不应修改返回的对象。
+        """
         with self._lock:
-            data = self._read_config_data()
-            profiles = []
-            for profile_data in data.get("api_profiles", []):
-                try:
-                    profiles.append(ApiConfigProfile(**profile_data))
-                except Exception:
-                    continue  # 跳过无效的配置项
-            return profiles
+            index = self._get_index()
+            entries = (index.validated(profile["id"]) for profile in index.values())
+            return [entry.model for entry in entries if entry is not None]  # 跳过无效的配置项
     
-    def add_profile(self, profile_data: CreateApiConfigRequest) -> ApiConfigProfile:
-        """添加新的API配置"""
+    def list_profiles(self, cursor: Optional[str] = None, limit: Optional[int] = None,
+                      name: Optional[str] = None, base_url: Optional[str] = None) -> ProfilePage:
+        """分页获取API配置项
+        
+        按插入顺序返回游标之后的最多limit项，name/base_url为忽略大小写的子串过滤。
+        配置项只在首次读取或变更后校验一次，结果同时带有可直接拼接进响应的JSON片段。
+        """
+        after, after_position = decode_cursor(cursor) if cursor else (None, -1)
+        name_filter = name.casefold() if name else None
+        url_filter = base_url.casefold() if base_url else None
+        
+        def predicate(profile: dict) -> bool:
+            if name_filter and name_filter not in str(profile.get("name", "")).casefold():
+                return False
+            if url_filter and url_filter not in str(profile.get("base_url", "")).casefold():
+                return False
+            return True
+        
         with self._lock:
-            # 创建新配置项
-            new_profile = ApiConfigProfile(
-                name=profile_data.name,
-                api_key=profile_data.api_key,
-                base_url=profile_data.base_url,
-                is_active=False
+            index = self._get_index()
+            items, last = index.page(
+                after, after_position, limit,
+                predicate if (name_filter or url_filter) else None
             )
+            entries = [index.validated(profile_data["id"]) for profile_data in items]
+            entries = [entry for entry in entries if entry is not None]  # 跳过无效的配置项
+            return ProfilePage(
+                profiles=[entry.model for entry in entries],
+                next_cursor=encode_cursor(*last) if last else None,
+                total_count=len(index),
+                active_id=index.active_id,
+                revision=index.revision,
+                fragments=[entry.fragment for entry in entries]
+            )
+    
+    def get_profile(self, profile_id: str) -> Optional[ApiConfigProfile]:
+        """按id获取API配置项"""
+        with self._lock:
+            entry = self._get_index().validated(profile_id)
+            return entry.model if entry is not None else None
+    
+    def add_profile(self, profile_data: CreateApiConfigRequest) -> ApiConfigProfile:
+        """添加新的API配置"""
+        # 创建新配置项
+        new_profile = ApiConfigProfile(
+            name=profile_data.name,
+            api_key=profile_data.api_key,
+            base_url=profile_data.base_url,
+            is_active=False
+        )
+        
+        with self._write_lock:
+            with self._mutation() as index:
+                # 检查名称是否重复
+                if index.name_taken(new_profile.name):
+                    raise ValueError(f"配置名称 '{new_profile.name}' 已存在")
+                
+                # 如果是第一个配置，自动激活
+                if len(index) == 0:
+                    new_profile.is_active = True
+                
+                # 添加到配置索引，写入时的校验结果直接用于后续读取
+                profile_dict = new_profile.model_dump()
+                # 确保datetime被序列化为字符串
+                profile_dict["created_at"] = new_profile.created_at.isoformat()
+                index.add(profile_dict, new_profile)
+                payload = self._prepare(index, ChangeSet(upserts=[profile_dict]))
             
-            # 读取现有数据
-            data = self._read_config_data()
-            
-            # 检查名称是否重复
-            existing_names = [p.get("name") for p in data.get("api_profiles", [])]
-            if new_profile.name in existing_names:
-                raise ValueError(f"配置名称 '{new_profile.name}' 已存在")
-            
-            # 添加到配置列表
-            profile_dict = new_profile.model_dump()
-            # 确保datetime被序列化为字符串
-            profile_dict["created_at"] = new_profile.created_at.isoformat()
-            data.setdefault("api_profiles", []).append(profile_dict)
-            
-            # 如果是第一个配置，自动激活
-            if len(data["api_profiles"]) == 1:
-                new_profile.is_active = True
-                data["api_profiles"][0]["is_active"] = True
+            if new_profile.is_active:
                 self._apply_profile_to_claude(new_profile)
             
             # 保存数据
-            if self._write_config_data(data):
+            if self._commit(payload):
+                if new_profile.is_active:
+                    self._activations.record(new_profile.id, new_profile.name)
+                    self._fan_out(active_changed=True)
+                self._journal(
+                    index,
+                    ("profile_created", [new_profile.id], {"name": new_profile.name, "base_url": new_profile.base_url}),
+                    *([("profile_activated", [new_profile.id], {"name": new_profile.name})] if new_profile.is_active else [])
+                )
+                self._emit("profile_created", {
+                    "profile_id": new_profile.id,
+                    "active_profile_id": index.active_id
+                })
                 return new_profile
             else:
                 raise Exception("保存配置失败")
     
-    def update_profile(self, profile_id: str, updates: UpdateApiConfigRequest) -> bool:
+    def update_profile(self, profile_id: str, updates: UpdateApiConfigRequest,
+                       expected_revision: Optional[int] = None) -> bool:
         """更新API配置项"""
-        with self._lock:
-            data = self._read_config_data()
-            profiles = data.get("api_profiles", [])
-            
-            # 查找目标配置
-            target_index = None
-            for i, profile in enumerate(profiles):
-                if profile.get("id") == profile_id:
-                    target_index = i
-                    break
-            
-            if target_index is None:
-                return False
-            
-            # 应用更新
-            target_profile = profiles[target_index]
-            if updates.name is not None:
-                target_profile["name"] = updates.name
-            if updates.api_key is not None:
-                target_profile["api_key"] = updates.api_key
-            if updates.base_url is not None:
-                target_profile["base_url"] = updates.base_url
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                target_profile = index.get(profile_id)
+                if target_profile is None:
+                    return False
+                
+                if updates.name is not None and index.name_taken(updates.name, exclude_id=profile_id):
+                    raise ValueError(f"配置名称 '{updates.name}' 已存在")
+                
+                # 应用更新
+                if updates.name is not None:
+                    index.rename(profile_id, updates.name)
+                index.update(profile_id, **updates.model_dump(include={"api_key", "base_url"}, exclude_none=True))
+                
+                updated_profile = ApiConfigProfile(**target_profile)
+                index.set_validated(profile_id, updated_profile)
+                payload = self._prepare(index, ChangeSet(upserts=[target_profile]))
             
             # 如果是当前激活配置，同时更新Claude设置
-            if target_profile.get("is_active"):
-                updated_profile = ApiConfigProfile(**target_profile)
+            if updated_profile.is_active:
                 self._apply_profile_to_claude(updated_profile)
             
-            return self._write_config_data(data)
+            if not self._commit(payload):
+                return False
+            self._fan_out([profile_id], active_changed=updated_profile.is_active)
+            self._journal(index, ("profile_updated", [profile_id], {
+                "name": updated_profile.name,
+                "fields": sorted(updates.model_dump(exclude_none=True))
+            }))
+            self._emit("profile_updated", {"profile_id": profile_id})
+            return True
     
-    def delete_profile(self, profile_id: str) -> bool:
+    def delete_profile(self, profile_id: str, expected_revision: Optional[int] = None) -> bool:
         """删除API配置项"""
-        with self._lock:
-            data = self._read_config_data()
-            profiles = data.get("api_profiles", [])
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                removed = index.remove(profile_id)
+                if removed is None:
+                    return False  # 没找到要删除的配置
+                
+                # 如果删除的是激活配置，激活第一个可用配置
+                first_profile = None
+                if removed.get("is_active") and len(index) > 0:
+                    first_id = index.first_id()
+                    index.activate(first_id)
+                    first_profile = ApiConfigProfile(**index.get(first_id))
+                payload = self._prepare(index, ChangeSet(
+                    deletes=[profile_id],
+                    active_id=first_profile.id if first_profile else None
+                ))
             
-            # 查找并删除目标配置
-            original_count = len(profiles)
-            was_active = False
+            if first_profile is not None:
+                self._apply_profile_to_claude(first_profile)
             
-            profiles_to_keep = []
-            for profile in profiles:
-                if profile.get("id") == profile_id:
-                    was_active = profile.get("is_active", False)
-                else:
-                    profiles_to_keep.append(profile)
+            if not self._commit(payload):
+                return False
+            if first_profile is not None:
+                self._activations.record(first_profile.id, first_profile.name)
+            self._fan_out([profile_id], active_changed=first_profile is not None)
+            self._journal(
+                index,
+                ("profile_deleted", [profile_id], {"name": removed.get("name")}),
+                *([("profile_activated", [first_profile.id], {"name": first_profile.name})] if first_profile else [])
+            )
+            self._emit("profile_deleted", {
+                "profile_id": profile_id,
+                "active_profile_id": first_profile.id if first_profile else index.active_id
+            })
+            return True
+    
+    # === 批量操作 ===
+    
+    def bulk_add_profiles(self, profiles: List[ApiConfigProfile],
+                          expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        """批量添加配置项，一次落盘
+        
+        返回与输入一一对应的错误信息列表，None表示该项添加成功；单项失败不影响其他项。
+        """
+        errors: List[Optional[str]] = []
+        added: List[dict] = []
+        activated_profile = None
+        
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                for profile in profiles:
+                    if profile.id in index:
+                        errors.append(f"配置ID '{profile.id}' 已存在")
+                        continue
+                    if index.name_taken(profile.name):
+                        errors.append(f"配置名称 '{profile.name}' 已存在")
+                        continue
+                    
+                    profile_dict = profile.model_dump()
+                    profile_dict["created_at"] = profile.created_at.isoformat()
+                    profile_dict["is_active"] = False
+                    index.add(profile_dict, profile.model_copy(update={"is_active": False}))
+                    added.append(profile_dict)
+                    errors.append(None)
+                
+                if not added:
+                    return errors
+                
+                # 配置库原本为空时，自动激活第一个新配置
+                if index.active_id is None:
+                    index.activate(added[0]["id"])
+                    activated_profile = index.validated(added[0]["id"]).model
+                
+                payload = self._prepare(index, ChangeSet(upserts=added))
             
-            if len(profiles_to_keep) == original_count:
-                return False  # 没找到要删除的配置
+            if activated_profile is not None:
+                self._apply_profile_to_claude(activated_profile)
             
-            data["api_profiles"] = profiles_to_keep
+            if not self._commit(payload):
+                raise Exception("保存配置失败")
+            if activated_profile is not None:
+                self._activations.record(activated_profile.id, activated_profile.name)
+                self._fan_out(active_changed=True)
+            self._journal(
+                index,
+                ("profiles_created", [profile["id"] for profile in added], {"count": len(added)}),
+                *([("profile_activated", [activated_profile.id], {"name": activated_profile.name})]
+                  if activated_profile is not None else [])
+            )
+            self._emit("profiles_changed", {
+                "source": "bulk_create",
+                "count": len(added),
+                "active_profile_id": index.active_id
+            })
+            return errors
+    
+    def bulk_update_profiles(self, updates: List[Tuple[str, UpdateApiConfigRequest]],
+                             expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        """批量更新配置项，一次落盘，返回与输入一一对应的错误信息列表"""
+        errors: List[Optional[str]] = []
+        changed: Dict[str, dict] = {}
+        
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                for profile_id, update in updates:
+                    target_profile = index.get(profile_id)
+                    if target_profile is None:
+                        errors.append("配置项不存在")
+                        continue
+                    if update.name is not None and index.name_taken(update.name, exclude_id=profile_id):
+                        errors.append(f"配置名称 '{update.name}' 已存在")
+                        continue
+                    
+                    if update.name is not None:
+                        index.rename(profile_id, update.name)
+                    index.update(profile_id, **update.model_dump(include={"api_key", "base_url"}, exclude_none=True))
+                    changed[profile_id] = target_profile
+                    errors.append(None)
+                
+                if not changed:
+                    return errors
+                
+                active_profile = None
+                if index.active_id in changed:
+                    active_profile = ApiConfigProfile(**changed[index.active_id])
+                payload = self._prepare(index, ChangeSet(upserts=list(changed.values())))
             
-            # 如果删除的是激活配置，需要处理
-            if was_active and profiles_to_keep:
-                # 激活第一个可用配置
-                profiles_to_keep[0]["is_active"] = True
-                first_profile = ApiConfigProfile(**profiles_to_keep[0])
-                self._apply_profile_to_claude(first_profile)
+            # 激活配置被修改时只同步一次Claude设置
+            if active_profile is not None:
+                self._apply_profile_to_claude(active_profile)
             
-            return self._write_config_data(data)
+            if not self._commit(payload):
+                raise Exception("保存配置失败")
+            self._fan_out(changed, active_changed=active_profile is not None)
+            self._journal(index, ("profiles_updated", list(changed), {"count": len(changed)}))
+            self._emit("profiles_changed", {"source": "bulk_update", "count": len(changed)})
+            return errors
+    
+    def bulk_delete_profiles(self, profile_ids: List[str],
+                             expected_revision: Optional[int] = None) -> List[Optional[str]]:
+        """批量删除配置项，一次落盘，返回与输入一一对应的错误信息列表"""
+        errors: List[Optional[str]] = []
+        deleted: List[str] = []
+        activated_profile = None
+        
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                was_active = False
+                for profile_id in profile_ids:
+                    removed = index.remove(profile_id)
+                    if removed is None:
+                        errors.append("配置项不存在")
+                        continue
+                    was_active = was_active or bool(removed.get("is_active"))
+                    deleted.append(profile_id)
+                    errors.append(None)
+                
+                if not deleted:
+                    return errors
+                
+                # 删除了激活配置时，激活第一个剩余配置
+                if was_active and len(index) > 0:
+                    first_id = index.first_id()
+                    index.activate(first_id)
+                    activated_profile = ApiConfigProfile(**index.get(first_id))
+                
+                payload = self._prepare(index, ChangeSet(
+                    deletes=deleted,
+                    active_id=activated_profile.id if activated_profile else None
+                ))
+            
+            if activated_profile is not None:
+                self._apply_profile_to_claude(activated_profile)
+            
+            if not self._commit(payload):
+                raise Exception("保存配置失败")
+            if activated_profile is not None:
+                self._activations.record(activated_profile.id, activated_profile.name)
+            self._fan_out(deleted, active_changed=activated_profile is not None)
+            self._journal(
+                index,
+                ("profiles_deleted", deleted, {"count": len(deleted)}),
+                *([("profile_activated", [activated_profile.id], {"name": activated_profile.name})]
+                  if activated_profile is not None else [])
+            )
+            self._emit("profiles_changed", {
+                "source": "bulk_delete",
+                "count": len(deleted),
+                "active_profile_id": index.active_id
+            })
+            return errors
+    
+    def export_profiles(self) -> List[dict]:
+        """导出所有配置项的快照副本，供流式序列化"""
+        with self._lock:
+            return [dict(profile) for profile in self._get_index().values()]
     
     # === 配置应用 ===
     
-    def activate_profile(self, profile_id: str) -> bool:
+    def activate_profile(self, profile_id: str, expected_revision: Optional[int] = None) -> bool:
         """激活指定API配置"""
-        with self._lock:
-            data = self._read_config_data()
-            profiles = data.get("api_profiles", [])
-            
-            # 查找目标配置
-            target_profile = None
-            for profile in profiles:
-                if profile.get("id") == profile_id:
-                    target_profile = profile
-                    break
-            
-            if not target_profile:
-                return False
+        return self.apply_profile(profile_id, expected_revision).success
+    
+    def apply_profile(self, profile_id: str, expected_revision: Optional[int] = None,
+                      rollback_on_failure: bool = False) -> ApplyResult:
+        """激活指定API配置，同时并行写入所有跟随激活配置的同步目标
+        
+        rollback_on_failure 时只要有同步目标写入失败，已写入的目标恢复为写入前的内容，
+        settings.json改回原激活配置，激活不生效；否则激活照常生效，失败的目标在结果中报告。
+        """
+        with self._write_lock:
+            with self._mutation(expected_revision) as index:
+                target_profile = index.get(profile_id)
+                if target_profile is None:
+                    return ApplyResult(False)
+                active_profile = ApiConfigProfile(**dict(target_profile, is_active=True))
+                previous = index.validated(index.active_id) if index.active_id else None
             
-            # 更新激活状态
-            for profile in profiles:
-                profile["is_active"] = (profile.get("id") == profile_id)
+            # 先应用到Claude Code，成功后再切换激活状态
+            if not self._apply_profile_to_claude(active_profile):
+                return ApplyResult(False)
+            results = self._sync_target_list(
+                self._sync_targets.affected(active_changed=True),
+                active_id=profile_id,
+                rollback_on_failure=rollback_on_failure
+            )
+            if rollback_on_failure and any(result.status == "failed" for result in results):
+                if previous is not None:
+                    self._apply_profile_to_claude(previous.model)
+                return ApplyResult(False, results)
             
-            # 应用到Claude Code
-            active_profile = ApiConfigProfile(**target_profile)
-            success = self._apply_profile_to_claude(active_profile)
+            with self._mutation() as index:
+                if profile_id not in index:
+                    return ApplyResult(False, results)
+                index.activate(profile_id)
+                payload = self._prepare(index, ChangeSet(active_id=profile_id))
             
-            if success:
-                return self._write_config_data(data)
-            else:
-                return False
+            if not self._commit(payload):
+                return ApplyResult(False, results)
+            self._activations.record(profile_id, active_profile.name)
+            self._journal(index, ("profile_activated", [profile_id], {"name": active_profile.name}))
+            self._emit("profile_activated", {"profile_id": profile_id, "active_profile_id": profile_id})
+            return ApplyResult(True, results)
+    
+    def get_activation_history(self) -> ActivationHistory:
+        """激活记录；还没有任何记录时以当前激活配置作为起点"""
+        if not self._activations.entries():
+            active_profile = self.get_active_profile()
+            if active_profile is not None:
+                self._activations.record(active_profile.id, active_profile.name)
+        return self._activations
     
     def get_active_profile(self) -> Optional[ApiConfigProfile]:
         """获取当前激活的配置"""
-        profiles = self.get_all_profiles()
-        for profile in profiles:
-            if profile.is_active:
-                return profile
-        return None
+        with self._lock:
+            index = self._get_index()
+            if index.active_id is None:
+                return None
+            entry = index.validated(index.active_id)
+            return entry.model if entry is not None else None
+    
+    def get_revision(self) -> int:
+        """获取配置文档当前修订号"""
+        with self._lock:
+            return self._get_index().revision
+    
+    def get_summary(self) -> dict:
+        """获取配置库概况：修订号、配置数量、激活配置和settings.json签名，不校验任何配置项"""
+        with self._lock:
+            index = self._get_index()
+            summary = {
+                "revision": index.revision,
+                "profile_count": len(index),
+                "active_profile_id": index.active_id
+            }
+        summary["settings_signature"] = file_signature(self.claude_settings_path)
+        return summary
     
     def get_active_profile_id(self) -> Optional[str]:
         """获取当前激活配置ID"""
-        active = self.get_active_profile()
-        return active.id if active else None
+        with self._lock:
+            return self._get_index().active_id
     
     def _apply_profile_to_claude(self, profile: ApiConfigProfile) -> bool:
-        """将配置应用到Claude Code的settings.json"""
-        try:
-            # 读取Claude设置文件
-            if not self.claude_settings_path.exists():
-                # 如果不存在，创建基本结构
-                claude_config = {
-                    "env": {},
-                    "permissions": {"allow": [], "deny": []}
-                }
-            else:
-                with open(self.claude_settings_path, 'r', encoding='utf-8') as f:
-                    claude_config = json.load(f)
-            
-            # 更新环境变量
-            if "env" not in claude_config:
-                claude_config["env"] = {}
-            
-            claude_config["env"]["ANTHROPIC_API_KEY"] = profile.api_key
-            claude_config["env"]["ANTHROPIC_BASE_URL"] = profile.base_url
-            
-            # 更新apiKeyHelper
-            claude_config["apiKeyHelper"] = f"echo '{profile.api_key}'"
-            
-            # 原子性写入
-            temp_file = self.claude_settings_path.with_suffix('.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(claude_config, f, ensure_ascii=False, indent=2)
-            
-            temp_file.replace(self.claude_settings_path)
-            return True
-            
-        except Exception:
-            return False
+        """将配置应用到Claude Code的settings.json，内容未变化时不写盘
+        
+        代理模式下settings.json始终指向本地代理，切换配置不需要改写文件。
+        """
+        if self._proxy_endpoint is not None:
+            return self._settings_sync.sync(*self._proxy_endpoint)
+        return self._settings_sync.sync(profile.api_key, profile.base_url)
+    
+    def set_proxy_endpoint(self, base_url: Optional[str], api_key: Optional[str] = None) -> bool:
+        """启用(或以None关闭)本地代理模式，并立即同步settings.json"""
+        if base_url is None:
+            self._proxy_endpoint = None
+            active_profile = self.get_active_profile()
+            success = self._apply_profile_to_claude(active_profile) if active_profile else True
+        else:
+            self._proxy_endpoint = (api_key, base_url)
+            success = self._settings_sync.sync(api_key, base_url)
+        self._fan_out(active_changed=True)
+        return success
+    
+    # === 同步目标 ===
+    
+    def _sync_target_list(self, targets: List[SyncTarget], active_id: Optional[str] = None,
+                          rollback_on_failure: bool = False) -> List[TargetSyncResult]:
+        """按各目标的绑定解析出要写入的配置，并行写入
+        
+        active_id 覆盖跟随激活配置的目标所使用的配置(激活切换落盘前使用)；
+        代理模式下跟随激活配置的目标与settings.json一样指向本地代理。
+        """
+        if not targets:
+            return []
+        with self._lock:
+            index = self._get_index()
+            active_id = active_id or index.active_id
+            assignments = []
+            for target in targets:
+                profile_id = target.profile_id or active_id
+                entry = index.validated(profile_id) if profile_id else None
+                if entry is None:
+                    credentials = None
+                elif target.profile_id is None and self._proxy_endpoint is not None:
+                    credentials = self._proxy_endpoint
+                else:
+                    credentials = (entry.model.api_key, entry.model.base_url)
+                assignments.append((target, profile_id, credentials))
+        
+        results = self._sync_targets.apply(assignments, rollback_on_failure)
+        failed = [result.target_id for result in results if result.status == "failed"]
+        if failed:
+            self._emit("sync_targets_failed", {"target_ids": failed})
+        return results
+    
+    def _fan_out(self, profile_ids=(), active_changed: bool = False) -> List[TargetSyncResult]:
+        """配置变更落盘后，同步绑定到这些配置的目标(active_changed时另加跟随激活配置的目标)"""
+        return self._sync_target_list(self._sync_targets.affected(profile_ids, active_changed))
+    
+    def list_sync_targets(self) -> List[Tuple[SyncTarget, Optional[TargetSyncResult]]]:
+        """列出同步目标及其在本进程中最近一次的同步结果"""
+        return [(target, self._sync_targets.last_result(target.id)) for target in self._sync_targets.targets()]
+    
+    def _check_binding(self, profile_id: Optional[str]):
+        if profile_id is not None and self.get_profile(profile_id) is None:
+            raise ValueError(f"配置 '{profile_id}' 不存在")
+    
+    def add_sync_target(self, path: str, profile_id: Optional[str] = None,
+                        label: Optional[str] = None) -> Tuple[SyncTarget, TargetSyncResult]:
+        """登记同步目标并立即同步，profile_id为空时跟随激活配置"""
+        self._check_binding(profile_id)
+        target = self._sync_targets.add(path, profile_id, label, reserved=[self.claude_settings_path])
+        return target, self._sync_target_list([target])[0]
+    
+    def update_sync_target(self, target_id: str, **fields) -> Optional[Tuple[SyncTarget, TargetSyncResult]]:
+        """修改同步目标的绑定配置或名称，并立即同步；目标不存在时返回None"""
+        self._check_binding(fields.get("profile_id"))
+        target = self._sync_targets.update(target_id, **fields)
+        if target is None:
+            return None
+        return target, self._sync_target_list([target])[0]
+    
+    def remove_sync_target(self, target_id: str) -> bool:
+        """取消登记同步目标，不修改目标文件"""
+        return self._sync_targets.remove(target_id)
+    
+    def sync_targets(self, target_ids: Optional[List[str]] = None,
+                     rollback_on_failure: bool = False) -> List[TargetSyncResult]:
+        """按绑定重新同步指定(或全部)目标，目标不存在时抛出KeyError"""
+        targets = self._sync_targets.targets()
+        if target_ids is not None:
+            by_id = {target.id: target for target in targets}
+            missing = [target_id for target_id in target_ids if target_id not in by_id]
+            if missing:
+                raise KeyError(missing[0])
+            targets = [by_id[target_id] for target_id in target_ids]
+        return self._sync_target_list(targets, rollback_on_failure=rollback_on_failure)
+    
+    def flush_claude_settings(self) -> bool:
+        """立即写入合并窗口内尚未落盘的settings.json同步"""
+        return self._settings_sync.flush()
+    
+    def get_settings_sync_stats(self) -> dict:
+        """获取settings.json同步计数(实际写入/跳过/合并/失败)"""
+        return self._settings_sync.stats()
+    
+    def claude_settings_exists(self) -> bool:
+        """Claude设置文件是否存在"""
+        return self.claude_settings_path.exists()
     
     def get_current_claude_config(self) -> dict:
-        """获取Claude Code当前使用的配置"""
+        """获取Claude Code当前使用的配置，settings.json未变化时直接返回缓存"""
+        signature = file_signature(self.claude_settings_path)
+        cached = self._claude_config_cache
+        if signature is not None and cached is not None and cached[0] == signature:
+            return dict(cached[1])
+        
         try:
+            started = time.perf_counter()
             with open(self.claude_settings_path, 'r', encoding='utf-8') as f:
-                claude_config = json.load(f)
+                text = f.read()
+            observe_io("read", "claude_settings", time.perf_counter() - started, len(text))
+            claude_config = json.loads(text)
                 
             env = claude_config.get("env", {})
-            return {
+            current = {
                 "api_key": env.get("ANTHROPIC_API_KEY", ""),
                 "base_url": env.get("ANTHROPIC_BASE_URL", ""),
                 "source": "Claude Code settings.json"
             }
+            self._claude_config_cache = (signature, current)
+            return dict(current)
         except Exception:
             return {
                 "api_key": "",
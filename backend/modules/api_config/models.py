@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import uuid
 
@@ -23,15 +23,71 @@ class UpdateApiConfigRequest(BaseModel):
     api_key: Optional[str] = Field(None, min_length=10, description="API密钥")
     base_url: Optional[str] = Field(None, pattern=r"https?://.*", description="API服务器地址")
 
+class BulkUpdateItem(UpdateApiConfigRequest):
+    id: str = Field(..., description="配置ID")
+
+class BulkCreateRequest(BaseModel):
+    profiles: List[Dict[str, Any]] = Field(..., description="待创建的配置项，逐项校验")
+
+class BulkUpdateRequest(BaseModel):
+    profiles: List[Dict[str, Any]] = Field(..., description="待更新的配置项(需包含id)，逐项校验")
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., description="待删除的配置ID列表")
+
+class BulkItemResult(BaseModel):
+    index: int = Field(..., description="在请求中的序号(导入时为行号)")
+    success: bool = Field(..., description="该项是否成功")
+    id: Optional[str] = Field(None, description="配置ID")
+    error: Optional[str] = Field(None, description="失败原因")
+
+class BulkOperationResponse(BaseModel):
+    success_count: int = Field(..., description="成功数量")
+    failure_count: int = Field(..., description="失败数量")
+    results: List[BulkItemResult] = Field(..., description="逐项结果")
+    revision: int = Field(..., description="操作完成后的配置文档修订号")
+
+class LatencyPercentiles(BaseModel):
+    p50: Optional[float] = Field(None, description="中位数(毫秒)")
+    p90: Optional[float] = Field(None, description="90分位(毫秒)")
+    p99: Optional[float] = Field(None, description="99分位(毫秒)")
+
+class ProbeSummary(BaseModel):
+    base_url: str = Field(..., description="探测的服务器地址")
+    samples: int = Field(..., description="历史样本数")
+    failures: int = Field(..., description="其中失败次数")
+    last_checked: Optional[datetime] = Field(None, description="最近一次探测时间")
+    last_status: Optional[int] = Field(None, description="最近一次响应状态码")
+    last_error: Optional[str] = Field(None, description="最近一次探测错误")
+    connect_ms: LatencyPercentiles = Field(..., description="TCP连接耗时")
+    tls_ms: LatencyPercentiles = Field(..., description="TLS握手耗时")
+    ttfb_ms: LatencyPercentiles = Field(..., description="首字节耗时(至响应头到达)")
+
+class ProbeListResponse(BaseModel):
+    probes: Dict[str, ProbeSummary] = Field(..., description="配置ID→探测统计，未探测过的配置不包含在内")
+    total_count: int = Field(..., description="总配置数量")
+
 class ApiConfigListResponse(BaseModel):
     profiles: List[ApiConfigProfile] = Field(..., description="配置项列表")
     active_profile_id: Optional[str] = Field(None, description="当前激活配置ID")
     total_count: int = Field(..., description="总配置数量")
+    revision: int = Field(0, description="配置文档修订号，与ETag一致")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多数据")
+    probes: Optional[Dict[str, ProbeSummary]] = Field(None, description="本页配置的延迟探测统计(include_probes=true时返回)")
+
+class TargetSyncResultModel(BaseModel):
+    target_id: str = Field(..., description="同步目标ID")
+    path: str = Field(..., description="目标文件路径")
+    profile_id: Optional[str] = Field(None, description="应用的配置ID")
+    status: str = Field(..., description="written/unchanged/skipped/failed/rolled_back")
+    error: Optional[str] = Field(None, description="失败或跳过的原因")
+    synced_at: datetime = Field(..., description="同步时间(UTC)")
 
 class ApplyConfigResponse(BaseModel):
     success: bool = Field(..., description="操作是否成功")
     message: str = Field(..., description="操作结果消息")
     applied_profile: ApiConfigProfile = Field(..., description="已应用的配置")
+    target_results: List[TargetSyncResultModel] = Field(default_factory=list, description="跟随激活配置的同步目标写入结果")
 
 class CurrentApiConfigResponse(BaseModel):
     api_key: str = Field(..., description="当前API密钥")
@@ -44,4 +100,153 @@ class StatusResponse(BaseModel):
     status: str = Field(default="running", description="服务状态")
     api_config_count: int = Field(..., description="API配置数量")
     active_profile_id: Optional[str] = Field(None, description="当前激活配置ID")
-    claude_settings_exists: bool = Field(..., description="Claude设置文件是否存在")
\ No newline at end of file
+    claude_settings_exists: bool = Field(..., description="Claude设置文件是否存在")
+
+class SettingsSyncStatsResponse(BaseModel):
+    requested: int = Field(..., description="收到的同步请求次数")
+    written: int = Field(..., description="实际写入settings.json的次数")
+    skipped: int = Field(..., description="内容未变化而跳过的次数")
+    coalesced: int = Field(..., description="合并窗口内被后续请求覆盖的次数")
+    failed: int = Field(..., description="写入失败次数")
+    pending: bool = Field(..., description="是否有尚未落盘的同步")
+    window: float = Field(..., description="合并窗口(秒)")
+
+class BackupSnapshotInfo(BaseModel):
+    id: str = Field(..., description="备份ID")
+    created_at: datetime = Field(..., description="创建时间(UTC)")
+    reason: str = Field(..., description="触发原因：manual/auto/pre-restore")
+    revision: int = Field(..., description="备份时的配置文档修订号")
+    profile_count: int = Field(..., description="备份中的配置数量")
+    files: Dict[str, str] = Field(..., description="备份的文件→内容SHA-256")
+
+class BackupListResponse(BaseModel):
+    snapshots: List[BackupSnapshotInfo] = Field(..., description="备份列表，从新到旧")
+    blob_count: int = Field(..., description="去重后保存的文件内容数量")
+    stored_bytes: int = Field(..., description="压缩后占用的字节数")
+    keep_last: int = Field(..., description="保留最近的备份数量")
+    keep_daily: int = Field(..., description="另外按天保留的天数")
+
+class BackupCreateResponse(BaseModel):
+    success: bool = Field(..., description="操作是否成功")
+    message: str = Field(..., description="操作结果消息")
+    created: bool = Field(..., description="是否新建了备份(内容未变化时复用最近的备份)")
+    snapshot: BackupSnapshotInfo = Field(..., description="备份信息")
+
+class BackupProfileChange(BaseModel):
+    id: str = Field(..., description="配置ID")
+    name: Optional[str] = Field(None, description="配置名称")
+    fields: List[str] = Field(default_factory=list, description="发生变化的字段")
+
+class BackupDiffResponse(BaseModel):
+    base: str = Field(..., description="比较基准的备份ID")
+    target: str = Field(..., description="比较目标的备份ID，current表示当前配置")
+    added: List[BackupProfileChange] = Field(..., description="新增的配置")
+    removed: List[BackupProfileChange] = Field(..., description="删除的配置")
+    changed: List[BackupProfileChange] = Field(..., description="修改过的配置")
+    active_before: Optional[str] = Field(None, description="基准中的激活配置ID")
+    active_after: Optional[str] = Field(None, description="目标中的激活配置ID")
+    settings_diff: List[str] = Field(..., description="settings.json的unified diff")
+
+class BackupRestoreResponse(BaseModel):
+    success: bool = Field(..., description="操作是否成功")
+    message: str = Field(..., description="操作结果消息")
+    revision: int = Field(..., description="恢复后的配置文档修订号")
+    pre_restore_snapshot_id: str = Field(..., description="恢复前自动创建的备份ID，可用于撤销")
+
+class SyncTargetInfo(BaseModel):
+    id: str = Field(..., description="同步目标ID")
+    path: str = Field(..., description="目标settings.json的绝对路径")
+    profile_id: Optional[str] = Field(None, description="绑定的配置ID，为空时跟随激活配置")
+    label: Optional[str] = Field(None, description="目标名称")
+    created_at: datetime = Field(..., description="登记时间(UTC)")
+    last_result: Optional[TargetSyncResultModel] = Field(None, description="最近一次同步结果")
+
+class SyncTargetListResponse(BaseModel):
+    targets: List[SyncTargetInfo] = Field(..., description="同步目标列表")
+    total_count: int = Field(..., description="同步目标数量")
+
+class CreateSyncTargetRequest(BaseModel):
+    path: str = Field(..., min_length=1, description="目标settings.json的绝对路径，如 /repo/.claude/settings.local.json")
+    profile_id: Optional[str] = Field(None, description="绑定的配置ID，不传时跟随激活配置")
+    label: Optional[str] = Field(None, max_length=100, description="目标名称")
+
+class UpdateSyncTargetRequest(BaseModel):
+    profile_id: Optional[str] = Field(None, description="绑定的配置ID，传null改为跟随激活配置")
+    label: Optional[str] = Field(None, max_length=100, description="目标名称")
+
+class SyncTargetsRequest(BaseModel):
+    target_ids: Optional[List[str]] = Field(None, description="要同步的目标ID，不传时同步全部")
+    rollback_on_failure: bool = Field(False, description="有目标失败时回滚已写入的目标")
+
+class SyncTargetsResponse(BaseModel):
+    success: bool = Field(..., description="所有目标是否都同步成功")
+    results: List[TargetSyncResultModel] = Field(..., description="逐个目标的结果")
+
+class UsageTotals(BaseModel):
+    requests: int = Field(..., description="请求数")
+    input_tokens: int = Field(..., description="输入token数")
+    output_tokens: int = Field(..., description="输出token数")
+    cache_creation_input_tokens: int = Field(..., description="写入缓存的输入token数")
+    cache_read_input_tokens: int = Field(..., description="命中缓存的输入token数")
+    total_tokens: int = Field(..., description="以上token数之和")
+
+class UsageProfileSummary(UsageTotals):
+    profile_id: Optional[str] = Field(None, description="配置ID，为空表示早于第一条激活记录、无法归属的请求")
+    name: Optional[str] = Field(None, description="配置名称(已删除的配置取激活记录中的名称)")
+
+class UsageBucket(UsageTotals):
+    start: datetime = Field(..., description="时间桶起点(UTC)")
+    profile_id: Optional[str] = Field(None, description="配置ID")
+
+class UsageResponse(BaseModel):
+    granularity: str = Field(..., description="时间桶粒度：hour 或 day")
+    profiles: List[UsageProfileSummary] = Field(..., description="各配置在查询范围内的合计，按token数从多到少")
+    buckets: List[UsageBucket] = Field(..., description="各配置按时间桶的用量，按时间排序")
+    files_indexed: int = Field(..., description="已索引的transcript文件数")
+    bytes_indexed: int = Field(..., description="已读取的transcript字节数")
+    indexed_at: Optional[datetime] = Field(None, description="索引最近一次更新时间(UTC)")
+
+class HistoryEntry(BaseModel):
+    seq: int = Field(..., description="序号，按写入顺序递增")
+    at: datetime = Field(..., description="时间(UTC)")
+    type: str = Field(..., description="profile_created / profile_updated / profile_deleted / profile_activated / profiles_created / profiles_updated / profiles_deleted / restored")
+    revision: Optional[int] = Field(None, description="变更后的配置文档修订号")
+    active_profile_id: Optional[str] = Field(None, description="变更后的激活配置ID")
+    profile_ids: List[str] = Field(default_factory=list, description="涉及的配置ID")
+    name: Optional[str] = Field(None, description="配置名称")
+    base_url: Optional[str] = Field(None, description="创建时的服务器地址")
+    fields: Optional[List[str]] = Field(None, description="被修改的字段(不记录API Key的值)")
+    count: Optional[int] = Field(None, description="批量操作涉及的配置数量")
+    snapshot_id: Optional[str] = Field(None, description="恢复使用的备份ID")
+    source: Optional[str] = Field(None, description="变更来源，如 cli")
+
+class HistoryResponse(BaseModel):
+    entries: List[HistoryEntry] = Field(..., description="变更记录")
+    next_cursor: Optional[str] = Field(None, description="下一页游标(与本次相同的order使用)，没有更多时为null")
+
+class ActiveAtResponse(BaseModel):
+    at: datetime = Field(..., description="查询的时刻(UTC)")
+    active_profile_id: Optional[str] = Field(None, description="该时刻的激活配置ID，没有记录时为null")
+    name: Optional[str] = Field(None, description="该配置被激活时的名称")
+    entry: Optional[HistoryEntry] = Field(None, description="该时刻之前的最后一条变更记录")
+
+class HistoryCompactResponse(BaseModel):
+    dropped: int = Field(..., description="被合并掉的记录数")
+    segments: int = Field(..., description="压缩后的分段数")
+    bytes: int = Field(..., description="压缩后的总大小")
+
+class NamespaceInfo(BaseModel):
+    name: str = Field(..., description="命名空间名称")
+    claude_settings_path: str = Field(..., description="该命名空间同步的settings.json")
+    description: Optional[str] = Field(None, description="说明")
+    created_at: Optional[datetime] = Field(None, description="创建时间(UTC)，默认命名空间为空")
+    is_default: bool = Field(False, description="是否为默认命名空间")
+
+class NamespaceListResponse(BaseModel):
+    namespaces: List[NamespaceInfo] = Field(..., description="命名空间列表，默认命名空间在前")
+    total_count: int = Field(..., description="命名空间数量")
+
+class CreateNamespaceRequest(BaseModel):
+    name: str = Field(..., pattern=r"^[a-z0-9][a-z0-9_-]{0,39}$", description="命名空间名称(小写字母、数字、-、_)")
+    claude_settings_path: str = Field(..., min_length=1, description="该命名空间同步的settings.json绝对路径，不能与其他命名空间共用")
+    description: Optional[str] = Field(None, max_length=200, description="说明")
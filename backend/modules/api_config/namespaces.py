@@ -0,0 +1,158 @@
+import re
+import shutil
+import threading
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
+from . import fastjson
+from .fileio import ProcessLock, atomic_write_bytes
+from .watcher import file_signature
+
+if TYPE_CHECKING:  # 管理器在首次访问命名空间时才导入，命令行工具只读取命名空间列表
+    from .async_manager import AsyncApiConfigManager
+    from .manager import ApiConfigManager
+
+# 默认命名空间即原有的 data/api_configs.json 和 ~/.claude/settings.json
+DEFAULT_NAMESPACE = "default"
+NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,39}$")
+# 与命名空间管理路由冲突的名称
+RESERVED_NAMES = {DEFAULT_NAMESPACE, "export"}
+
+@dataclass
+class Namespace:
+    """独立的配置集合：有自己的分片文件、激活配置和settings.json同步目标"""
+    name: str
+    claude_settings_path: str
+    description: Optional[str] = None
+    created_at: str = ""
+
+class NamespaceRegistry:
+    """命名空间列表及各命名空间的配置管理器
+
+    每个命名空间的数据保存在 root/<name>/ 下(api_configs.json、备份、同步目标等)，
+    由各自的 ApiConfigManager 管理，锁互不相关，不同命名空间的写操作可以并行。
+    管理器在首次访问时创建；命名空间列表保存在 root/namespaces.json，修改在跨进程锁内完成。
+    """
+
+    def __init__(self, root: Path, factory: Optional[Callable[[Namespace, Path], "ApiConfigManager"]],
+                 reserved_settings: Iterable[Path] = ()):
+        self.root = Path(root)
+        self.registry_file = self.root / "namespaces.json"
+        # factory(命名空间, 分片配置文件) -> 该命名空间的管理器
+        self._factory = factory
+        self._reserved_settings = [Path(path).expanduser().resolve() for path in reserved_settings]
+        self._lock = threading.Lock()
+        self._process_lock = ProcessLock(self.root / "namespaces.lock")
+        self._namespaces: Dict[str, Namespace] = {}
+        self._signature = None
+        self._managers: Dict[str, "AsyncApiConfigManager"] = {}
+
+    def shard_file(self, name: str) -> Path:
+        return self.root / name / "api_configs.json"
+
+    def _refresh(self):
+        """命名空间列表被修改过时重新读取，调用方须持有 self._lock"""
+        signature = file_signature(self.registry_file)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.registry_file, 'rb') as f:
+                data = fastjson.loads(f.read())
+            namespaces = [Namespace(**item) for item in data.get("namespaces", [])]
+        except FileNotFoundError:
+            namespaces = []
+        self._namespaces = {namespace.name: namespace for namespace in namespaces}
+        self._signature = signature
+
+    def _save(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        document = {"namespaces": [asdict(namespace) for namespace in self._namespaces.values()]}
+        atomic_write_bytes(self.registry_file, fastjson.dumps_pretty(document).encode("utf-8"))
+        self._signature = file_signature(self.registry_file)
+
+    def list(self) -> List[Namespace]:
+        with self._lock:
+            self._refresh()
+            return list(self._namespaces.values())
+
+    def get(self, name: str) -> Optional[Namespace]:
+        with self._lock:
+            self._refresh()
+            return self._namespaces.get(name)
+
+    def create(self, name: str, claude_settings_path: str, description: Optional[str] = None) -> Namespace:
+        """创建命名空间；名称只能包含小写字母、数字、-和_，settings.json不能与其他命名空间共用"""
+        if not NAME_PATTERN.match(name) or name in RESERVED_NAMES:
+            raise ValueError(f"无效的命名空间名称: {name}")
+        settings_path = Path(claude_settings_path).expanduser()
+        if not settings_path.is_absolute():
+            raise ValueError(f"settings.json必须是绝对路径: {claude_settings_path}")
+        settings_path = settings_path.resolve()
+        if settings_path in self._reserved_settings:
+            raise ValueError(f"{settings_path} 已由默认命名空间管理")
+
+        with self._lock, self._process_lock:
+            self._refresh()
+            if name in self._namespaces:
+                raise ValueError(f"命名空间 '{name}' 已存在")
+            if any(Path(ns.claude_settings_path) == settings_path for ns in self._namespaces.values()):
+                raise ValueError(f"{settings_path} 已由其他命名空间管理")
+            namespace = Namespace(
+                name=name,
+                claude_settings_path=str(settings_path),
+                description=description,
+                created_at=datetime.utcnow().isoformat()
+            )
+            self.shard_file(name).parent.mkdir(parents=True, exist_ok=True)
+            self._namespaces[name] = namespace
+            self._save()
+            return namespace
+
+    def delete(self, name: str, purge: bool = False) -> bool:
+        """删除命名空间，purge时同时删除其分片目录；settings.json保持不变"""
+        with self._lock, self._process_lock:
+            self._refresh()
+            if self._namespaces.pop(name, None) is None:
+                return False
+            self._save()
+            manager = self._managers.pop(name, None)
+        if manager is not None:
+            manager.manager.flush_claude_settings()
+            manager.manager.flush_backups()
+            manager.shutdown()
+        if purge:
+            shutil.rmtree(self.shard_file(name).parent, ignore_errors=True)
+        return True
+
+    def manager(self, name: str) -> Optional["AsyncApiConfigManager"]:
+        """命名空间的管理器，首次访问时创建；命名空间不存在时返回None"""
+        from .async_manager import AsyncApiConfigManager
+        manager = self._managers.get(name)
+        if manager is not None:
+            return manager
+        with self._lock:
+            self._refresh()
+            namespace = self._namespaces.get(name)
+            if namespace is None:
+                return None
+            manager = self._managers.get(name)
+            if manager is None:
+                manager = self._managers[name] = AsyncApiConfigManager(
+                    self._factory(namespace, self.shard_file(name)), max_workers=4
+                )
+            return manager
+
+    def loaded(self) -> List["AsyncApiConfigManager"]:
+        """已创建的管理器"""
+        return list(self._managers.values())
+
+def namespace_paths(data_dir: Path, name: str) -> Tuple[Path, str]:
+    """命名空间的配置文件和settings.json路径，只读取命名空间列表、不创建管理器(供命令行工具使用)"""
+    if name == DEFAULT_NAMESPACE:
+        return Path(data_dir) / "api_configs.json", "~/.claude/settings.json"
+    registry = NamespaceRegistry(Path(data_dir) / "namespaces", factory=None)
+    namespace = registry.get(name)
+    if namespace is None:
+        raise ValueError(f"命名空间 '{name}' 不存在")
+    return registry.shard_file(name), namespace.claude_settings_path
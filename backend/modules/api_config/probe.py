@@ -0,0 +1,160 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+import httpx
+
+PERCENTILES = (50, 90, 99)
+
+@dataclass
+class ProbeSample:
+    """单次探测结果，耗时单位为毫秒；复用已有连接时没有连接和TLS耗时"""
+    timestamp: datetime
+    connect_ms: Optional[float] = None
+    tls_ms: Optional[float] = None
+    ttfb_ms: Optional[float] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """线性插值计算百分位数，sorted_values须已排序"""
+    if not sorted_values:
+        return None
+    rank = (len(sorted_values) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    value = sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+    return round(value, 2)
+
+class ProbeHistory:
+    """单个配置的滚动探测历史"""
+
+    def __init__(self, base_url: str, size: int):
+        self.base_url = base_url
+        self.samples: Deque[ProbeSample] = deque(maxlen=size)
+
+    def percentiles(self, field: str) -> Dict[str, Optional[float]]:
+        values = sorted(v for v in (getattr(s, field) for s in self.samples) if v is not None)
+        return {f"p{q}": percentile(values, q) for q in PERCENTILES}
+
+    def summary(self) -> dict:
+        last = self.samples[-1] if self.samples else None
+        return {
+            "base_url": self.base_url,
+            "samples": len(self.samples),
+            "failures": sum(1 for s in self.samples if s.error is not None),
+            "last_checked": last.timestamp if last else None,
+            "last_status": last.status_code if last else None,
+            "last_error": last.error if last else None,
+            "connect_ms": self.percentiles("connect_ms"),
+            "tls_ms": self.percentiles("tls_ms"),
+            "ttfb_ms": self.percentiles("ttfb_ms")
+        }
+
+class LatencyProber:
+    """配置服务器地址的延迟探测器
+
+    所有探测共用一个连接池化的httpx.AsyncClient，并发数由信号量限制，单次探测有总超时。
+    通过httpx的trace扩展记录TCP连接、TLS握手和首字节(响应头到达)的耗时，
+    每个配置保留最近 history_size 次结果用于计算百分位数；服务器地址变化时历史重新开始。
+    """
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 5.0, history_size: int = 50,
+                 transport: Optional[httpx.AsyncBaseTransport] = None, verify: bool = True):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.history_size = history_size
+        self._transport = transport
+        self._verify = verify
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._histories: Dict[str, ProbeHistory] = {}
+        # 每记录一次结果递增，用于生成包含探测数据的响应ETag
+        self.version = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """延迟创建客户端和信号量，确保绑定到运行中的事件循环"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+                transport=self._transport,
+                verify=self._verify,
+                follow_redirects=False
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self):
+        """关闭连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _measure(self, client: httpx.AsyncClient, base_url: str) -> ProbeSample:
+        """发送一次GET请求，只等待响应头，不读取响应体"""
+        marks: Dict[str, float] = {}
+
+        async def trace(event_name: str, info: dict):
+            marks[event_name.split(".", 1)[-1]] = time.perf_counter()
+
+        def elapsed(start: str, end: str) -> Optional[float]:
+            if start in marks and end in marks:
+                return round((marks[end] - marks[start]) * 1000, 2)
+            return None
+
+        sample = ProbeSample(timestamp=datetime.utcnow())
+        started = time.perf_counter()
+        try:
+            async with client.stream("GET", base_url, extensions={"trace": trace}) as response:
+                sample.ttfb_ms = round((time.perf_counter() - started) * 1000, 2)
+                sample.status_code = response.status_code
+        except httpx.TimeoutException:
+            sample.error = f"超时(>{self.timeout}s)"
+        except httpx.HTTPError as e:
+            sample.error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+
+        sample.connect_ms = elapsed("connect_tcp.started", "connect_tcp.complete")
+        sample.tls_ms = elapsed("start_tls.started", "start_tls.complete")
+        return sample
+
+    async def probe(self, profile_id: str, base_url: str) -> ProbeSample:
+        """探测单个配置并记入历史"""
+        client = self._get_client()
+        async with self._semaphore:
+            try:
+                # 连接池排队等情况也计入超时，保证单次探测的总耗时有上限
+                sample = await asyncio.wait_for(self._measure(client, base_url), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                sample = ProbeSample(timestamp=datetime.utcnow(), error=f"超时(>{self.timeout}s)")
+
+        history = self._histories.get(profile_id)
+        if history is None or history.base_url != base_url:
+            history = self._histories[profile_id] = ProbeHistory(base_url, self.history_size)
+        history.samples.append(sample)
+        self.version += 1
+        return sample
+
+    async def probe_all(self, targets: Iterable[Tuple[str, str]]) -> Dict[str, ProbeSample]:
+        """并发探测多个(配置id, 服务器地址)，返回 id→本次结果"""
+        targets = list(targets)
+        samples = await asyncio.gather(*(self.probe(profile_id, url) for profile_id, url in targets))
+        return {profile_id: sample for (profile_id, _), sample in zip(targets, samples)}
+
+    def summary(self, profile_id: str) -> Optional[dict]:
+        """获取单个配置的探测统计，从未探测过时返回None"""
+        history = self._histories.get(profile_id)
+        return history.summary() if history is not None else None
+
+    def summaries(self, profile_ids: Optional[Iterable[str]] = None) -> Dict[str, dict]:
+        """获取多个配置的探测统计，只包含探测过的配置"""
+        ids = self._histories.keys() if profile_ids is None else profile_ids
+        return {pid: self._histories[pid].summary() for pid in ids if pid in self._histories}
+
+    def retain(self, profile_ids: Iterable[str]):
+        """丢弃已删除配置的探测历史"""
+        keep = set(profile_ids)
+        for profile_id in [pid for pid in self._histories if pid not in keep]:
+            del self._histories[profile_id]
@@ -1,6 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from .manager import ApiConfigManager
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi import Path as PathParam
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from pydantic import ValidationError
+import hashlib
+import os
+from typing import List, Optional
+from . import fastjson
+from .manager import ApiConfigManager, RevisionConflictError
+from .async_manager import AsyncApiConfigManager
+from .backups import BackupStore, Snapshot
+from .events import EventBroker, get_event_broker
+from .journal import create_journal
+from .namespaces import DEFAULT_NAMESPACE, Namespace, NamespaceRegistry
+from .probe import LatencyProber
+from .storage import ConfigStorage, create_config_storage
+from .usage import UsageIndexer
+from .sync_targets import SyncTarget, SyncTargetRegistry, TargetSyncResult
+from .watcher import get_file_watcher
+from modules.metrics.instruments import METRICS_ENABLED, REGISTRY
 from .models import (
     ApiConfigProfile, 
     CreateApiConfigRequest, 
@@ -8,38 +30,288 @@ from .models import (
     ApiConfigListResponse,
     ApplyConfigResponse,
     CurrentApiConfigResponse,
-    StatusResponse
+    StatusResponse,
+    SettingsSyncStatsResponse,
+    ProbeListResponse,
+    BulkCreateRequest,
+    BulkUpdateRequest,
+    BulkDeleteRequest,
+    BulkUpdateItem,
+    BulkItemResult,
+    BulkOperationResponse,
+    BackupSnapshotInfo,
+    BackupListResponse,
+    BackupCreateResponse,
+    BackupDiffResponse,
+    BackupRestoreResponse,
+    TargetSyncResultModel,
+    SyncTargetInfo,
+    SyncTargetListResponse,
+    CreateSyncTargetRequest,
+    UpdateSyncTargetRequest,
+    SyncTargetsRequest,
+    SyncTargetsResponse,
+    UsageResponse,
+    HistoryEntry,
+    HistoryResponse,
+    ActiveAtResponse,
+    HistoryCompactResponse,
+    NamespaceInfo,
+    NamespaceListResponse,
+    CreateNamespaceRequest
 )
 
-router = APIRouter(prefix="/api/v1/api-config", tags=["API Configuration"])
+# 配置管理路由，分别挂载在默认命名空间和 /namespaces/{namespace} 下(见文件末尾)
+config_routes = APIRouter()
+
+# 流式导入时每积累多少条执行一次批量写入
+IMPORT_CHUNK_SIZE = 500
+
+def build_api_config_manager(config_file: Path, claude_settings_path: str, storage: ConfigStorage,
+                             backup_dir: Path) -> ApiConfigManager:
+    """按环境变量创建配置管理器，数据(同步目标、激活记录等)保存在config_file所在目录"""
+    auto_backup_window = float(os.getenv("CCM_BACKUP_WINDOW", "5"))
+    return ApiConfigManager(
+        config_file=str(config_file),
+        claude_settings_path=claude_settings_path,
+        watcher=get_file_watcher(),
+        storage=storage,
+        # 激活切换合并窗口(秒)，0表示每次立即写入
+        settings_sync_window=float(os.getenv("CCM_SETTINGS_SYNC_WINDOW", "0")),
+        backups=BackupStore(
+            backup_dir,
+            keep_last=int(os.getenv("CCM_BACKUP_KEEP", "20")),
+            keep_daily=int(os.getenv("CCM_BACKUP_KEEP_DAILY", "7"))
+        ),
+        # 自动备份合并窗口(秒)，负数表示关闭自动备份
+        auto_backup_window=auto_backup_window if auto_backup_window >= 0 else None,
+        sync_targets=SyncTargetRegistry(
+            config_file.parent / "sync_targets.json",
+            max_workers=int(os.getenv("CCM_SYNC_TARGET_WORKERS", "8"))
+        ),
+        journal=create_journal(config_file.parent / "journal")
+    )
 
+@lru_cache(maxsize=None)
 def get_api_config_manager() -> ApiConfigManager:
-    """依赖注入：获取配置管理器实例"""
-    return ApiConfigManager()
+    """依赖注入：获取进程级共享的配置管理器实例(默认命名空间)"""
+    manager = build_api_config_manager(
+        Path("./data/api_configs.json"),
+        "~/.claude/settings.json",
+        create_config_storage(),
+        Path(os.getenv("CCM_BACKUP_DIR", "./data/backups"))
+    )
+    manager.add_listener(get_event_broker().publish)
+    if METRICS_ENABLED:
+        REGISTRY.add_collector(lambda: collect_manager_metrics(manager))
+    return manager
+
+def create_namespace_manager(namespace: Namespace, config_file: Path) -> ApiConfigManager:
+    """创建命名空间的管理器，事件附带命名空间名称"""
+    manager = build_api_config_manager(
+        config_file,
+        namespace.claude_settings_path,
+        create_config_storage(str(config_file), sqlite_path=str(config_file.with_suffix(".db"))),
+        config_file.parent / "backups"
+    )
+    broker = get_event_broker()
+    manager.add_listener(lambda event_type, data: broker.publish(event_type, dict(data, namespace=namespace.name)))
+    return manager
+
+@lru_cache(maxsize=None)
+def get_namespace_registry() -> NamespaceRegistry:
+    """依赖注入：获取命名空间列表，各命名空间的数据保存在 data/namespaces/<name>/"""
+    return NamespaceRegistry(
+        Path("./data/namespaces"),
+        create_namespace_manager,
+        reserved_settings=[get_api_config_manager().claude_settings_path]
+    )
+
+def collect_manager_metrics(manager: ApiConfigManager) -> list:
+    """抓取/metrics时读取配置数量、修订号和settings.json同步计数"""
+    summary = manager.get_summary()
+    sync_stats = manager.get_settings_sync_stats()
+    return [
+        ("ccm_profiles", "gauge", "配置数量", [({}, summary["profile_count"])]),
+        ("ccm_config_revision", "gauge", "配置文档修订号", [({}, summary["revision"])]),
+        ("ccm_settings_sync_total", "counter", "settings.json同步请求按结果计数", [
+            ({"result": result}, sync_stats[result]) for result in ("written", "skipped", "coalesced", "failed")
+        ]),
+    ]
+
+@lru_cache(maxsize=None)
+def get_async_api_config_manager() -> AsyncApiConfigManager:
+    """依赖注入：获取共享配置管理器的异步接口"""
+    return AsyncApiConfigManager(get_api_config_manager())
+
+def namespace_path(namespace: str = PathParam(..., description="命名空间名称，default为默认命名空间")):
+    """声明命名空间路径参数"""
+    return namespace
+
+def get_request_manager(
+    request: Request,
+    default_manager: AsyncApiConfigManager = Depends(get_async_api_config_manager)
+) -> AsyncApiConfigManager:
+    """依赖注入：按路径中的命名空间选择管理器，不带命名空间的路由使用默认管理器"""
+    namespace = request.path_params.get("namespace", DEFAULT_NAMESPACE)
+    if namespace == DEFAULT_NAMESPACE:
+        return default_manager
+    manager = get_namespace_registry().manager(namespace)
+    if manager is None:
+        raise HTTPException(status_code=404, detail=f"命名空间 '{namespace}' 不存在")
+    return manager
+
+@lru_cache(maxsize=None)
+def get_latency_prober() -> LatencyProber:
+    """依赖注入：获取进程级共享的延迟探测器"""
+    return LatencyProber(
+        max_concurrency=int(os.getenv("CCM_PROBE_CONCURRENCY", "8")),
+        timeout=float(os.getenv("CCM_PROBE_TIMEOUT", "5"))
+    )
+
+@lru_cache(maxsize=None)
+def usage_indexer_for(namespace: str) -> UsageIndexer:
+    """命名空间的用量索引：读取其settings.json所在目录下的projects/，默认命名空间可由环境变量指定"""
+    if namespace == DEFAULT_NAMESPACE:
+        manager = get_api_config_manager()
+        projects_dir = Path(os.getenv("CCM_CLAUDE_PROJECTS_DIR", "~/.claude/projects"))
+    else:
+        manager = get_namespace_registry().manager(namespace).manager
+        projects_dir = manager.claude_settings_path.parent / "projects"
+    return UsageIndexer(projects_dir, manager.config_file.parent / "usage_index.json", manager.get_activation_history())
+
+def get_usage_indexer(
+    request: Request,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+) -> UsageIndexer:
+    """依赖注入：获取当前命名空间的用量索引(依赖manager以确认命名空间存在)"""
+    return usage_indexer_for(request.path_params.get("namespace", DEFAULT_NAMESPACE))
+
+def format_etag(revision: int) -> str:
+    """以配置文档修订号生成ETag"""
+    return f'"{revision}"'
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """解析If-Match请求头，返回期望的修订号；未提供或为*时不做检查
+    
+    各接口的ETag都以修订号开头(如 "3" 或 "3-p12")，只取修订号部分比较。
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    value = value.strip('"').split("-", 1)[0]
+    if not value.isdigit():
+        raise HTTPException(status_code=400, detail=f"无效的If-Match: {if_match}")
+    return int(value)
+
+def revision_conflict(e: RevisionConflictError) -> HTTPException:
+    """修订号冲突转换为412响应"""
+    return HTTPException(
+        status_code=412,
+        detail=str(e),
+        headers={"ETag": format_etag(e.current)}
+    )
+
+PROFILE_FIELDS = set(ApiConfigProfile.model_fields)
+
+def settings_tag(signature) -> str:
+    """settings.json文件签名的短摘要"""
+    return hashlib.sha1(repr(signature).encode()).hexdigest()[:12]
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match是否命中当前ETag(弱比较)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+def not_modified(etag: str) -> Response:
+    """304响应"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
 
-@router.get("/profiles", response_model=ApiConfigListResponse, summary="获取所有API配置")
-async def get_api_profiles(manager: ApiConfigManager = Depends(get_api_config_manager)):
-    """获取所有API配置项列表"""
+def set_cache_headers(response: Response, etag: str):
+    """设置ETag，并要求浏览器每次使用缓存前重新验证"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+@config_routes.get("/profiles", response_model=ApiConfigListResponse, summary="获取所有API配置")
+async def get_api_profiles(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="每页数量，不传时返回全部"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    name: Optional[str] = Query(None, description="按名称过滤(忽略大小写的子串匹配)"),
+    base_url: Optional[str] = Query(None, description="按服务器地址过滤(忽略大小写的子串匹配)"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，逗号分隔，如 id,name"),
+    include_probes: bool = Query(False, description="同时返回本页配置的延迟探测统计"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager),
+    prober: LatencyProber = Depends(get_latency_prober)
+):
+    """获取API配置项列表，支持游标分页、过滤和字段投影
+    
+    ETag为配置文档修订号，可用于条件请求(If-None-Match)和后续写请求的If-Match；
+    包含探测统计时ETag附加探测版本号。total_count为配置库总数，不受过滤条件影响。
+    """
+    projection = None
+    if fields:
+        projection = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = projection - PROFILE_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"未知字段: {', '.join(sorted(unknown))}")
+    
     try:
-        profiles = manager.get_all_profiles()
-        active_id = manager.get_active_profile_id()
+        def list_etag(revision: int) -> str:
+            return f'"{revision}-p{prober.version}"' if include_probes else format_etag(revision)
+        
+        revision = await manager.get_revision()
+        if etag_matches(request, list_etag(revision)):
+            return not_modified(list_etag(revision))
+        
+        page = await manager.list_profiles(cursor, limit, name, base_url)
+        etag = list_etag(page.revision)
+        probes = prober.summaries(p.id for p in page.profiles) if include_probes else None
+        
+        if projection is not None:
+            content = {
+                "profiles": [p.model_dump(mode="json", include=projection) for p in page.profiles],
+                "active_profile_id": page.active_id,
+                "total_count": page.total_count,
+                "revision": page.revision,
+                "next_cursor": page.next_cursor
+            }
+            if probes is not None:
+                content["probes"] = jsonable_encoder(probes)
+            return JSONResponse(content=content, headers={"ETag": etag, "Cache-Control": "no-cache"})
         
-        return ApiConfigListResponse(
-            profiles=profiles,
-            active_profile_id=active_id,
-            total_count=len(profiles)
+        # 配置项使用索引中预先编码的JSON片段，不再经过response_model校验和逐项序列化
+        content = {
+            "active_profile_id": page.active_id,
+            "total_count": page.total_count,
+            "revision": page.revision,
+            "next_cursor": page.next_cursor,
+            "probes": jsonable_encoder(probes) if probes is not None else None
+        }
+        return Response(
+            content=fastjson.dumps_with(content, profiles=fastjson.join_array(page.fragments)),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"}
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取配置列表失败: {str(e)}")
 
-@router.post("/profiles", response_model=ApiConfigProfile, summary="创建新API配置")
+@config_routes.post("/profiles", response_model=ApiConfigProfile, summary="创建新API配置")
 async def create_api_profile(
     request: CreateApiConfigRequest,
-    manager: ApiConfigManager = Depends(get_api_config_manager)
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
 ):
     """创建新的API配置项"""
     try:
-        profile = manager.add_profile(request)
+        profile = await manager.add_profile(request)
         return profile
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -49,83 +321,304 @@ async def create_api_profile(
         print(f"创建配置时出错: {error_details}")
         raise HTTPException(status_code=500, detail=f"创建配置失败: {str(e)}")
 
-@router.put("/profiles/{profile_id}", response_model=dict, summary="更新API配置")
+@config_routes.put("/profiles/{profile_id}", response_model=dict, summary="更新API配置")
 async def update_api_profile(
     profile_id: str,
     request: UpdateApiConfigRequest,
-    manager: ApiConfigManager = Depends(get_api_config_manager)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
 ):
-    """更新指定的API配置项"""
+    """更新指定的API配置项，携带If-Match时仅在修订号一致时更新"""
     try:
-        success = manager.update_profile(profile_id, request)
+        success = await manager.update_profile(profile_id, request, parse_if_match(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="配置项不存在")
         
+        response.headers["ETag"] = format_etag(await manager.get_revision())
         return {"success": True, "message": "配置更新成功"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"更新配置失败: {str(e)}")
 
-@router.delete("/profiles/{profile_id}", response_model=dict, summary="删除API配置")
+@config_routes.delete("/profiles/{profile_id}", response_model=dict, summary="删除API配置")
 async def delete_api_profile(
     profile_id: str,
-    manager: ApiConfigManager = Depends(get_api_config_manager)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
 ):
-    """删除指定的API配置项"""
+    """删除指定的API配置项，携带If-Match时仅在修订号一致时删除"""
     try:
-        success = manager.delete_profile(profile_id)
+        success = await manager.delete_profile(profile_id, parse_if_match(if_match))
         if not success:
             raise HTTPException(status_code=404, detail="配置项不存在")
         
+        response.headers["ETag"] = format_etag(await manager.get_revision())
         return {"success": True, "message": "配置删除成功"}
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"删除配置失败: {str(e)}")
 
-@router.post("/profiles/{profile_id}/apply", response_model=ApplyConfigResponse, summary="激活API配置")
+def format_validation_error(e: ValidationError) -> str:
+    """将Pydantic校验错误压缩为一行描述"""
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+    )
+
+def build_bulk_response(results: List[BulkItemResult], revision: int) -> BulkOperationResponse:
+    """汇总逐项结果"""
+    results.sort(key=lambda r: r.index)
+    success_count = sum(1 for r in results if r.success)
+    return BulkOperationResponse(
+        success_count=success_count,
+        failure_count=len(results) - success_count,
+        results=results,
+        revision=revision
+    )
+
+async def add_profiles_in_batch(
+    manager: AsyncApiConfigManager,
+    items: List[tuple],
+    expected_revision: Optional[int] = None
+) -> List[BulkItemResult]:
+    """批量写入已校验的配置，items为(序号, ApiConfigProfile)列表"""
+    errors = await manager.bulk_add_profiles([profile for _, profile in items], expected_revision)
+    return [
+        BulkItemResult(index=i, success=error is None, id=profile.id, error=error)
+        for (i, profile), error in zip(items, errors)
+    ]
+
+@config_routes.post("/profiles/bulk", response_model=BulkOperationResponse, summary="批量创建API配置")
+async def bulk_create_api_profiles(
+    request: BulkCreateRequest,
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """批量创建配置项，逐项校验，所有有效项在一次写入中完成"""
+    try:
+        results: List[BulkItemResult] = []
+        valid = []
+        for i, item in enumerate(request.profiles):
+            try:
+                data = CreateApiConfigRequest.model_validate(item)
+            except ValidationError as e:
+                results.append(BulkItemResult(index=i, success=False, error=format_validation_error(e)))
+                continue
+            valid.append((i, ApiConfigProfile(name=data.name, api_key=data.api_key, base_url=data.base_url)))
+        
+        if valid:
+            results.extend(await add_profiles_in_batch(manager, valid, parse_if_match(if_match)))
+        return build_bulk_response(results, await manager.get_revision())
+    except HTTPException:
+        raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量创建配置失败: {str(e)}")
+
+@config_routes.patch("/profiles/bulk", response_model=BulkOperationResponse, summary="批量更新API配置")
+async def bulk_update_api_profiles(
+    request: BulkUpdateRequest,
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """批量更新配置项，逐项校验，所有有效项在一次写入中完成"""
+    try:
+        results: List[BulkItemResult] = []
+        valid = []
+        for i, item in enumerate(request.profiles):
+            try:
+                data = BulkUpdateItem.model_validate(item)
+            except ValidationError as e:
+                results.append(BulkItemResult(
+                    index=i, success=False, id=item.get("id"), error=format_validation_error(e)
+                ))
+                continue
+            valid.append((i, data))
+        
+        if valid:
+            updates = [
+                (data.id, UpdateApiConfigRequest(**data.model_dump(exclude={"id"})))
+                for _, data in valid
+            ]
+            errors = await manager.bulk_update_profiles(updates, parse_if_match(if_match))
+            results.extend(
+                BulkItemResult(index=i, success=error is None, id=data.id, error=error)
+                for (i, data), error in zip(valid, errors)
+            )
+        return build_bulk_response(results, await manager.get_revision())
+    except HTTPException:
+        raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量更新配置失败: {str(e)}")
+
+@config_routes.post("/profiles/bulk/delete", response_model=BulkOperationResponse, summary="批量删除API配置")
+async def bulk_delete_api_profiles(
+    request: BulkDeleteRequest,
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """批量删除配置项，在一次写入中完成"""
+    try:
+        errors = await manager.bulk_delete_profiles(request.ids, parse_if_match(if_match))
+        results = [
+            BulkItemResult(index=i, success=error is None, id=profile_id, error=error)
+            for i, (profile_id, error) in enumerate(zip(request.ids, errors))
+        ]
+        return build_bulk_response(results, await manager.get_revision())
+    except HTTPException:
+        raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量删除配置失败: {str(e)}")
+
+@config_routes.get("/profiles/export", summary="导出API配置(NDJSON)")
+async def export_api_profiles(manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """以NDJSON流导出所有配置项，每行一个配置"""
+    try:
+        profiles = await manager.export_profiles()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"导出配置失败: {str(e)}")
+    
+    def ndjson_lines():
+        for profile in profiles:
+            yield fastjson.dumps(profile) + b"\n"
+    
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="api_configs.ndjson"'}
+    )
+
+@config_routes.post("/profiles/import", response_model=BulkOperationResponse, summary="导入API配置(NDJSON)")
+async def import_api_profiles(
+    request: Request,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """流式导入NDJSON格式的配置，按行校验，每积累一批执行一次批量写入
+    
+    保留原有的id和created_at，激活状态不随导入迁移；index为从1开始的行号。
+    """
+    results: List[BulkItemResult] = []
+    pending = []
+    line_no = 0
+    buffer = b""
+    
+    async def flush():
+        if pending:
+            results.extend(await add_profiles_in_batch(manager, pending))
+            pending.clear()
+    
+    async def handle_line(raw: bytes):
+        if not raw.strip():
+            return
+        try:
+            record = fastjson.loads(raw)
+            if not isinstance(record, dict):
+                raise ValueError("每行必须是一个JSON对象")
+            record.pop("is_active", None)
+            pending.append((line_no, ApiConfigProfile.model_validate(record)))
+        except ValidationError as e:
+            results.append(BulkItemResult(index=line_no, success=False, error=format_validation_error(e)))
+        except ValueError as e:
+            results.append(BulkItemResult(index=line_no, success=False, error=f"无效的JSON: {e}"))
+        if len(pending) >= IMPORT_CHUNK_SIZE:
+            await flush()
+    
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for raw in lines:
+                line_no += 1
+                await handle_line(raw)
+        if buffer:
+            line_no += 1
+            await handle_line(buffer)
+        await flush()
+        return build_bulk_response(results, await manager.get_revision())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"导入配置失败: {str(e)}")
+
+def target_result_model(result: TargetSyncResult) -> TargetSyncResultModel:
+    return TargetSyncResultModel(**vars(result))
+
+@config_routes.post("/profiles/{profile_id}/apply", response_model=ApplyConfigResponse, summary="激活API配置")
 async def apply_api_profile(
     profile_id: str,
-    manager: ApiConfigManager = Depends(get_api_config_manager)
+    response: Response,
+    rollback_on_failure: bool = Query(False, description="有同步目标写入失败时回滚并放弃激活"),
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
 ):
-    """激活指定的API配置，将其应用到Claude Code"""
+    """激活指定的API配置，将其应用到Claude Code及所有跟随激活配置的同步目标
+    
+    携带If-Match时仅在修订号一致时激活。rollback_on_failure=true 时任一同步目标失败则整体回滚并返回502，
+    响应中包含逐个目标的结果。
+    """
     try:
-        # 获取配置详情
-        profiles = manager.get_all_profiles()
-        target_profile = None
-        for profile in profiles:
-            if profile.id == profile_id:
-                target_profile = profile
-                break
-        
-        if not target_profile:
+        # 激活配置
+        if await manager.get_profile(profile_id) is None:
             raise HTTPException(status_code=404, detail="配置项不存在")
         
-        # 激活配置
-        success = manager.activate_profile(profile_id)
-        if not success:
+        result = await manager.apply_profile(profile_id, parse_if_match(if_match), rollback_on_failure)
+        if not result.success:
+            if any(target.status == "failed" for target in result.targets):
+                raise HTTPException(status_code=502, detail={
+                    "message": "部分同步目标写入失败，已回滚" if rollback_on_failure else "激活配置失败",
+                    "target_results": jsonable_encoder([target_result_model(t) for t in result.targets])
+                })
             raise HTTPException(status_code=500, detail="激活配置失败")
         
+        target_profile = await manager.get_profile(profile_id)
+        if not target_profile:
+            raise HTTPException(status_code=404, detail="配置项不存在")
+        
+        response.headers["ETag"] = format_etag(await manager.get_revision())
         return ApplyConfigResponse(
             success=True,
             message=f"配置 '{target_profile.name}' 已成功激活并应用到Claude Code",
-            applied_profile=target_profile
+            applied_profile=target_profile,
+            target_results=[target_result_model(t) for t in result.targets]
         )
     except HTTPException:
         raise
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"激活配置失败: {str(e)}")
 
-@router.get("/current", response_model=CurrentApiConfigResponse, summary="获取当前配置")
-async def get_current_api_config(manager: ApiConfigManager = Depends(get_api_config_manager)):
-    """获取当前Claude Code正在使用的API配置"""
+@config_routes.get("/current", response_model=CurrentApiConfigResponse, summary="获取当前配置")
+async def get_current_api_config(
+    request: Request,
+    response: Response,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """获取当前Claude Code正在使用的API配置，ETag由配置修订号和settings.json签名组成"""
     try:
+        summary = await manager.get_summary()
+        etag = f'"{summary["revision"]}-{settings_tag(summary["settings_signature"])}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
+        
         # 获取当前激活的配置项
-        active_profile = manager.get_active_profile()
+        active_profile = await manager.get_active_profile()
         
         # 获取Claude设置文件中的实际配置
-        claude_config = manager.get_current_claude_config()
+        claude_config = await manager.get_current_claude_config()
         
         return CurrentApiConfigResponse(
             api_key=claude_config["api_key"],
@@ -137,32 +630,406 @@ async def get_current_api_config(manager: ApiConfigManager = Depends(get_api_con
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取当前配置失败: {str(e)}")
 
-@router.get("/status", response_model=StatusResponse, summary="获取服务状态")
-async def get_service_status(manager: ApiConfigManager = Depends(get_api_config_manager)):
-    """获取API配置服务状态"""
+@config_routes.get("/status", response_model=StatusResponse, summary="获取服务状态")
+async def get_service_status(
+    request: Request,
+    response: Response,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """获取API配置服务状态，支持If-None-Match条件请求"""
     try:
-        profiles = manager.get_all_profiles()
-        active_id = manager.get_active_profile_id()
+        summary = await manager.get_summary()
+        settings_exists = summary["settings_signature"] is not None
+        etag = f'"{summary["revision"]}-{int(settings_exists)}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_cache_headers(response, etag)
         
         return StatusResponse(
             status="running",
-            api_config_count=len(profiles),
-            active_profile_id=active_id,
-            claude_settings_exists=manager.claude_settings_path.exists()
+            api_config_count=summary["profile_count"],
+            active_profile_id=summary["active_profile_id"],
+            claude_settings_exists=settings_exists
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取状态失败: {str(e)}")
 
-@router.post("/backup", response_model=dict, summary="备份配置")
-async def backup_config(manager: ApiConfigManager = Depends(get_api_config_manager)):
-    """备份当前API配置数据"""
+@config_routes.get("/settings-sync", response_model=SettingsSyncStatsResponse, summary="settings.json同步统计")
+async def get_settings_sync_stats(manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """获取settings.json同步计数：实际写入、内容未变化跳过、合并窗口内被覆盖的次数"""
+    return SettingsSyncStatsResponse(**await manager.get_settings_sync_stats())
+
+@config_routes.get("/probes", response_model=ProbeListResponse, summary="获取延迟探测统计")
+async def get_probe_results(
+    manager: AsyncApiConfigManager = Depends(get_request_manager),
+    prober: LatencyProber = Depends(get_latency_prober)
+):
+    """获取各配置服务器地址的延迟探测统计(连接/TLS/首字节耗时的滚动百分位数)"""
+    profiles = await manager.export_profiles()
+    profile_ids = [profile["id"] for profile in profiles]
+    prober.retain(profile_ids)
+    return ProbeListResponse(probes=prober.summaries(profile_ids), total_count=len(profiles))
+
+@config_routes.post("/probes/run", response_model=ProbeListResponse, summary="执行延迟探测")
+async def run_probes(
+    profile_id: Optional[str] = Query(None, description="只探测指定配置，不传时探测全部"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager),
+    prober: LatencyProber = Depends(get_latency_prober)
+):
+    """并发探测配置的服务器地址，并发数和单次超时由 CCM_PROBE_CONCURRENCY / CCM_PROBE_TIMEOUT 控制"""
+    profiles = await manager.export_profiles()
+    targets = [
+        (profile["id"], profile["base_url"]) for profile in profiles
+        if profile_id is None or profile["id"] == profile_id
+    ]
+    if profile_id is not None and not targets:
+        raise HTTPException(status_code=404, detail="配置项不存在")
+    
+    await prober.probe_all(targets)
+    return ProbeListResponse(
+        probes=prober.summaries(target_id for target_id, _ in targets),
+        total_count=len(profiles)
+    )
+
+def snapshot_info(snapshot: Snapshot) -> BackupSnapshotInfo:
+    return BackupSnapshotInfo(**vars(snapshot))
+
+@config_routes.post("/backup", response_model=BackupCreateResponse, summary="备份配置")
+async def backup_config(manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """备份当前API配置数据和settings.json，内容与最近一次备份相同时不会新建备份"""
     try:
-        success = manager.backup_config()
-        if not success:
-            raise HTTPException(status_code=500, detail="备份失败")
-        
-        return {"success": True, "message": "配置备份成功"}
+        snapshot, created = await manager.backup_config()
+        return BackupCreateResponse(
+            success=True,
+            message="配置备份成功" if created else "配置未变化，沿用最近一次备份",
+            created=created,
+            snapshot=snapshot_info(snapshot)
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"备份失败: {str(e)}")
+
+@config_routes.get("/backups", response_model=BackupListResponse, summary="获取备份列表")
+async def list_backups(manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """按时间从新到旧列出备份，以及备份库占用和保留策略"""
+    try:
+        snapshots = await manager.list_backups()
+        stats = await manager.get_backup_stats()
+        return BackupListResponse(
+            snapshots=[snapshot_info(snapshot) for snapshot in snapshots],
+            blob_count=stats["blob_count"],
+            stored_bytes=stats["stored_bytes"],
+            keep_last=stats["keep_last"],
+            keep_daily=stats["keep_daily"]
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取备份列表失败: {str(e)}")
+
+@config_routes.get("/backups/{snapshot_id}/diff", response_model=BackupDiffResponse, summary="比较备份")
+async def diff_backup(
+    snapshot_id: str,
+    against: Optional[str] = Query(None, description="比较目标的备份ID，不传时与当前配置比较"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """比较备份与另一个备份(或当前配置)：按配置ID列出增删改，以及settings.json的差异"""
+    try:
+        diff = await manager.diff_backups(snapshot_id, against)
+        return BackupDiffResponse(base=snapshot_id, target=against or "current", **diff)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"备份不存在: {e.args[0]}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"比较备份失败: {str(e)}")
+
+@config_routes.post("/backups/{snapshot_id}/restore", response_model=BackupRestoreResponse, summary="恢复备份")
+async def restore_backup(
+    snapshot_id: str,
+    response: Response,
+    restore_settings: bool = Query(False, description="同时恢复备份中的settings.json"),
+    if_match: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """用备份整体替换配置库，恢复前会自动备份当前状态；携带If-Match时仅在修订号一致时恢复"""
+    try:
+        revision, pre_restore = await manager.restore_backup(snapshot_id, restore_settings, parse_if_match(if_match))
+        response.headers["ETag"] = format_etag(revision)
+        return BackupRestoreResponse(
+            success=True,
+            message=f"已恢复备份 {snapshot_id}",
+            revision=revision,
+            pre_restore_snapshot_id=pre_restore.id
+        )
     except HTTPException:
         raise
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"备份不存在: {e.args[0]}")
+    except RevisionConflictError as e:
+        raise revision_conflict(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"恢复备份失败: {str(e)}")
+
+@config_routes.get("/events", summary="订阅配置变更事件")
+async def stream_config_events(
+    since: Optional[str] = Query(None, description="从该事件id之后继续推送"),
+    last_event_id: Optional[str] = Header(None),
+    manager: AsyncApiConfigManager = Depends(get_request_manager),
+    broker: EventBroker = Depends(get_event_broker)
+):
+    """以Server-Sent Events推送配置变更，支持通过Last-Event-ID或since参数断点续传
+    
+    依赖manager以确保共享管理器及其文件监听已经就绪，所有订阅者共用同一组文件监听。
+    """
+    start_version = broker.parse_id(last_event_id or since)
+    if start_version is None and (last_event_id or since):
+        start_version = -1  # 事件id来自旧进程或已失效，要求客户端全量刷新
+    
+    async def event_stream():
+        async for event in broker.subscribe(start_version):
+            yield broker.encode(event)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+def sync_target_info(target: SyncTarget, result: Optional[TargetSyncResult]) -> SyncTargetInfo:
+    return SyncTargetInfo(
+        **vars(target),
+        last_result=target_result_model(result) if result is not None else None
+    )
+
+@config_routes.get("/sync-targets", response_model=SyncTargetListResponse, summary="获取同步目标")
+async def list_sync_targets(manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """列出额外的settings.json同步目标，以及各自的绑定配置和最近一次同步结果"""
+    targets = await manager.list_sync_targets()
+    return SyncTargetListResponse(
+        targets=[sync_target_info(target, result) for target, result in targets],
+        total_count=len(targets)
+    )
+
+@config_routes.post("/sync-targets", response_model=SyncTargetInfo, summary="登记同步目标")
+async def create_sync_target(
+    request: CreateSyncTargetRequest,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """登记项目级 .claude/settings.json 或 settings.local.json 等同步目标，登记后立即同步一次"""
+    try:
+        target, result = await manager.add_sync_target(request.path, request.profile_id, request.label)
+        return sync_target_info(target, result)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"登记同步目标失败: {str(e)}")
+
+@config_routes.patch("/sync-targets/{target_id}", response_model=SyncTargetInfo, summary="修改同步目标")
+async def update_sync_target(
+    target_id: str,
+    request: UpdateSyncTargetRequest,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """修改同步目标绑定的配置(profile_id为null时改为跟随激活配置)或名称，修改后立即同步"""
+    try:
+        updated = await manager.update_sync_target(target_id, **request.model_dump(exclude_unset=True))
+        if updated is None:
+            raise HTTPException(status_code=404, detail="同步目标不存在")
+        return sync_target_info(*updated)
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"修改同步目标失败: {str(e)}")
+
+@config_routes.delete("/sync-targets/{target_id}", response_model=dict, summary="删除同步目标")
+async def delete_sync_target(target_id: str, manager: AsyncApiConfigManager = Depends(get_request_manager)):
+    """取消登记同步目标，目标文件保持不变"""
+    if not await manager.remove_sync_target(target_id):
+        raise HTTPException(status_code=404, detail="同步目标不存在")
+    return {"success": True, "message": "同步目标已删除"}
+
+@config_routes.post("/sync-targets/sync", response_model=SyncTargetsResponse, summary="同步目标")
+async def run_sync_targets(
+    request: SyncTargetsRequest,
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """按各目标的绑定并行重新同步，只写入内容发生变化的文件，并发数由 CCM_SYNC_TARGET_WORKERS 控制"""
+    try:
+        results = await manager.sync_targets(request.target_ids, request.rollback_on_failure)
+        return SyncTargetsResponse(
+            success=not any(result.status in ("failed", "rolled_back") for result in results),
+            results=[target_result_model(result) for result in results]
+        )
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"同步目标不存在: {e.args[0]}")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"备份失败: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"同步失败: {str(e)}")
+
+def to_query_epoch(value: Optional[datetime]) -> Optional[float]:
+    """查询参数中的时间转为时间戳，不带时区时按UTC处理"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+@config_routes.get("/usage", response_model=UsageResponse, summary="获取用量统计")
+async def get_usage(
+    granularity: str = Query("day", pattern="^(hour|day)$", description="时间桶粒度"),
+    since: Optional[datetime] = Query(None, description="起始时间(含)，不带时区时按UTC"),
+    until: Optional[datetime] = Query(None, description="结束时间(不含)，不带时区时按UTC"),
+    profile_id: Optional[str] = Query(None, description="只统计指定配置"),
+    refresh: bool = Query(True, description="先读取transcript新追加的内容"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager),
+    indexer: UsageIndexer = Depends(get_usage_indexer)
+):
+    """按配置和时间桶汇总Claude Code本地transcript中的token用量
+    
+    请求按时间归属到当时的激活配置；每次只解析新追加的内容，且两次扫描至少间隔2秒。
+    """
+    try:
+        if refresh:
+            await run_in_threadpool(indexer.refresh)
+        result = await run_in_threadpool(
+            indexer.query, to_query_epoch(since), to_query_epoch(until), granularity, profile_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"统计用量失败: {str(e)}")
+    
+    names = {entry.profile_id: entry.name for entry in indexer.activations.entries()}
+    names.update((profile["id"], profile["name"]) for profile in await manager.export_profiles())
+    return UsageResponse(
+        granularity=granularity,
+        profiles=[dict(item, name=names.get(item["profile_id"])) for item in result["profiles"]],
+        buckets=result["buckets"],
+        files_indexed=result["files_indexed"],
+        bytes_indexed=result["bytes_indexed"],
+        indexed_at=result["indexed_at"]
+    )
+
+@config_routes.get("/history", response_model=HistoryResponse, summary="获取变更记录")
+async def get_history(
+    since: Optional[datetime] = Query(None, description="起始时间(含)，不带时区时按UTC"),
+    until: Optional[datetime] = Query(None, description="结束时间(不含)，不带时区时按UTC"),
+    types: Optional[List[str]] = Query(None, alias="type", description="只返回指定类型，可重复"),
+    profile_id: Optional[str] = Query(None, description="只返回涉及该配置的记录"),
+    order: str = Query("desc", pattern="^(asc|desc)$", description="desc从新到旧，asc从旧到新"),
+    limit: int = Query(100, ge=1, le=1000, description="每页记录数"),
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """按时间范围查询变更日志(所有配置变更和激活)，定位起点的耗时与记录总数的对数相关"""
+    try:
+        entries, next_cursor = await manager.query_history(
+            to_query_epoch(since), to_query_epoch(until), types, profile_id, limit, cursor, order == "desc"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return HistoryResponse(entries=entries, next_cursor=next_cursor)
+
+@config_routes.get("/history/active-at", response_model=ActiveAtResponse, summary="查询某一时刻的激活配置")
+async def get_active_at(
+    at: datetime = Query(..., description="查询的时刻，不带时区时按UTC"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """返回该时刻生效的激活配置，以及该时刻之前的最后一条变更记录"""
+    epoch = to_query_epoch(at)
+    entry = await manager.history_entry_at(epoch)
+    active_id = entry.get("active_profile_id") if entry else None
+    name = None
+    if active_id is not None:
+        # 名称取激活时记录的名称，配置之后被改名也能对应上当时的名称
+        activations, _ = await manager.query_history(
+            until=epoch + 1e-6, types=["profile_activated"], profile_id=active_id, limit=1
+        )
+        name = activations[0].get("name") if activations else None
+    return ActiveAtResponse(
+        at=datetime.fromtimestamp(epoch, timezone.utc),
+        active_profile_id=active_id,
+        name=name,
+        entry=HistoryEntry(**entry) if entry else None
+    )
+
+@config_routes.post("/history/compact", response_model=HistoryCompactResponse, summary="压缩变更记录")
+async def compact_history(
+    before: datetime = Query(..., description="早于此时间的已封存分段只保留激活变化"),
+    manager: AsyncApiConfigManager = Depends(get_request_manager)
+):
+    """合并早于before的已封存分段，只保留激活配置发生变化的记录，仍可查询任意时刻的激活配置
+    
+    开始新分段时会按 CCM_JOURNAL_RETENTION_DAYS 自动压缩。
+    """
+    dropped, stats = await manager.compact_history(to_query_epoch(before))
+    return HistoryCompactResponse(dropped=dropped, segments=stats["segments"], bytes=stats["bytes"])
+
+# === 命名空间 ===
+
+namespace_routes = APIRouter()
+
+def namespace_info(namespace: Namespace) -> NamespaceInfo:
+    return NamespaceInfo(**vars(namespace))
+
+@namespace_routes.get("/namespaces", response_model=NamespaceListResponse, summary="获取命名空间")
+async def list_namespaces(
+    default_manager: AsyncApiConfigManager = Depends(get_async_api_config_manager),
+    registry: NamespaceRegistry = Depends(get_namespace_registry)
+):
+    """列出所有命名空间；各命名空间的配置接口位于 /namespaces/{name}/ 下，与默认命名空间的接口相同"""
+    namespaces = [NamespaceInfo(
+        name=DEFAULT_NAMESPACE,
+        claude_settings_path=str(default_manager.claude_settings_path),
+        is_default=True
+    )]
+    namespaces.extend(namespace_info(namespace) for namespace in registry.list())
+    return NamespaceListResponse(namespaces=namespaces, total_count=len(namespaces))
+
+@namespace_routes.post("/namespaces", response_model=NamespaceInfo, summary="创建命名空间")
+async def create_namespace(
+    request: CreateNamespaceRequest,
+    registry: NamespaceRegistry = Depends(get_namespace_registry)
+):
+    """创建独立的配置集合，拥有自己的分片文件、激活配置和settings.json"""
+    try:
+        return namespace_info(registry.create(request.name, request.claude_settings_path, request.description))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@namespace_routes.delete("/namespaces/{namespace}", response_model=dict, summary="删除命名空间")
+async def delete_namespace(
+    namespace: str,
+    purge: bool = Query(False, description="同时删除该命名空间的配置数据和备份"),
+    registry: NamespaceRegistry = Depends(get_namespace_registry)
+):
+    """删除命名空间，其settings.json保持不变；默认命名空间不能删除"""
+    if namespace == DEFAULT_NAMESPACE:
+        raise HTTPException(status_code=400, detail="默认命名空间不能删除")
+    if not await run_in_threadpool(registry.delete, namespace, purge):
+        raise HTTPException(status_code=404, detail=f"命名空间 '{namespace}' 不存在")
+    usage_indexer_for.cache_clear()
+    return {"success": True, "message": f"命名空间 '{namespace}' 已删除"}
+
+@namespace_routes.get("/namespaces/export", summary="导出所有命名空间的配置(NDJSON)")
+async def export_all_namespaces(
+    default_manager: AsyncApiConfigManager = Depends(get_async_api_config_manager),
+    registry: NamespaceRegistry = Depends(get_namespace_registry)
+):
+    """逐个分片读取并输出所有命名空间的配置，每行一个配置并附带namespace字段，同一时间只持有一个分片的数据"""
+    names = [namespace.name for namespace in registry.list()]
+    
+    async def ndjson_lines():
+        for name in [DEFAULT_NAMESPACE] + names:
+            manager = default_manager if name == DEFAULT_NAMESPACE else await run_in_threadpool(registry.manager, name)
+            if manager is None:  # 导出过程中被删除
+                continue
+            for profile in await manager.export_profiles():
+                profile["namespace"] = name
+                yield fastjson.dumps(profile) + b"\n"
+    
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="api_configs_all.ndjson"'}
+    )
+
+# 同一组配置路由挂载两次：默认命名空间 /api/v1/api-config/...，其他命名空间 /api/v1/api-config/namespaces/{namespace}/...
+router = APIRouter(prefix="/api/v1/api-config", tags=["API Configuration"])
+router.include_router(config_routes)
+router.include_router(namespace_routes)
+router.include_router(config_routes, prefix="/namespaces/{namespace}", dependencies=[Depends(namespace_path)])
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+from .fileio import atomic_write_text
+from .watcher import FileSignature, file_signature
+from modules.metrics.instruments import observe_io
+
+@dataclass
+class SettingsSyncStats:
+    """settings.json同步计数"""
+    requested: int = 0   # 收到的同步请求
+    written: int = 0     # 实际写盘次数
+    skipped: int = 0     # 内容未变化而跳过的次数
+    coalesced: int = 0   # 合并窗口内被后续请求覆盖的次数
+    failed: int = 0      # 写入失败次数
+
+class ClaudeSettingsSync:
+    """将激活配置同步到Claude Code的settings.json
+
+    只比较本工具管理的字段(API Key、Base URL、apiKeyHelper)的摘要，内容相同则不写盘，
+    其他字段按原样保留。每次重写都会触发所有运行中的Claude Code会话重新加载配置，
+    因此 window>0 时同一窗口内的多次同步只落盘最后一次。
+    """
+
+    def __init__(self, settings_path: Path, window: float = 0.0):
+        self.settings_path = Path(settings_path)
+        self.window = window
+        self._lock = threading.Lock()
+        self._pending: Optional[Tuple[str, str]] = None
+        self._timer: Optional[threading.Timer] = None
+        self._stats = SettingsSyncStats()
+        # 最近一次确认过的文件签名及其中受管字段的摘要
+        self._signature: FileSignature = None
+        self._digest: Optional[str] = None
+        # 最近一次写入失败的原因
+        self.last_error: Optional[str] = None
+
+    @property
+    def last_signature(self) -> FileSignature:
+        """本实例最近一次写入或确认的settings.json签名"""
+        return self._signature
+
+    @staticmethod
+    def _managed_fields(api_key: str, base_url: str) -> dict:
+        return {
+            "ANTHROPIC_API_KEY": api_key,
+            "ANTHROPIC_BASE_URL": base_url,
+            "apiKeyHelper": f"echo '{api_key}'"
+        }
+
+    @staticmethod
+    def _digest_of(fields: dict) -> str:
+        return hashlib.sha256(json.dumps(fields, sort_keys=True).encode()).hexdigest()
+
+    @classmethod
+    def _digest_of_config(cls, claude_config: dict) -> str:
+        """从已有settings.json内容计算受管字段摘要"""
+        env = claude_config.get("env") or {}
+        return cls._digest_of({
+            "ANTHROPIC_API_KEY": env.get("ANTHROPIC_API_KEY"),
+            "ANTHROPIC_BASE_URL": env.get("ANTHROPIC_BASE_URL"),
+            "apiKeyHelper": claude_config.get("apiKeyHelper")
+        })
+
+    def sync(self, api_key: str, base_url: str) -> bool:
+        """同步配置到settings.json
+
+        window为0时立即执行并返回是否成功；否则只登记请求，窗口结束时写入最后一次请求的内容。
+        """
+        with self._lock:
+            self._stats.requested += 1
+            if self.window <= 0:
+                return self._write(api_key, base_url) != "failed"
+
+            if self._pending is not None:
+                self._stats.coalesced += 1
+            self._pending = (api_key, base_url)
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+            return True
+
+    def flush(self) -> bool:
+        """立即写入窗口内尚未落盘的请求"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, None
+            if pending is None:
+                return True
+            return self._write(*pending) != "failed"
+
+    def write(self, api_key: str, base_url: str) -> str:
+        """忽略合并窗口立即同步，返回 written(已写入)、unchanged(内容未变化) 或 failed"""
+        with self._lock:
+            self._stats.requested += 1
+            return self._write(api_key, base_url)
+
+    def stats(self) -> dict:
+        """获取同步计数"""
+        with self._lock:
+            return dict(asdict(self._stats), pending=self._pending is not None, window=self.window)
+
+    def _write(self, api_key: str, base_url: str) -> str:
+        """内容感知写入，返回值同 write()，调用方须持有 self._lock"""
+        fields = self._managed_fields(api_key, base_url)
+        digest = self._digest_of(fields)
+
+        # 文件自上次确认后未被修改且内容一致，不必读取文件
+        signature = file_signature(self.settings_path)
+        if signature is not None and signature == self._signature and digest == self._digest:
+            self._stats.skipped += 1
+            return "unchanged"
+
+        try:
+            self.last_error = None
+            if signature is None:
+                # 如果不存在，创建基本结构(项目中的.claude目录可能还不存在)
+                self.settings_path.parent.mkdir(parents=True, exist_ok=True)
+                claude_config = {
+                    "env": {},
+                    "permissions": {"allow": [], "deny": []}
+                }
+            else:
+                started = time.perf_counter()
+                with open(self.settings_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                observe_io("read", "claude_settings", time.perf_counter() - started, len(text))
+                claude_config = json.loads(text)
+                if self._digest_of_config(claude_config) == digest:
+                    self._signature, self._digest = signature, digest
+                    self._stats.skipped += 1
+                    return "unchanged"
+
+            env = claude_config.get("env")
+            if not isinstance(env, dict):
+                env = claude_config["env"] = {}
+            env["ANTHROPIC_API_KEY"] = fields["ANTHROPIC_API_KEY"]
+            env["ANTHROPIC_BASE_URL"] = fields["ANTHROPIC_BASE_URL"]
+            claude_config["apiKeyHelper"] = fields["apiKeyHelper"]
+
+            text = json.dumps(claude_config, ensure_ascii=False, indent=2)
+            started = time.perf_counter()
+            atomic_write_text(self.settings_path, text)
+            observe_io("write", "claude_settings", time.perf_counter() - started, len(text))
+            self._signature = file_signature(self.settings_path)
+            self._digest = digest
+            self._stats.written += 1
+            return "written"
+        except Exception as e:
+            self._stats.failed += 1
+            self.last_error = str(e)
+            print(f"同步Claude设置失败: {e}")
+            return "failed"
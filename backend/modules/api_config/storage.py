@@ -0,0 +1,300 @@
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Hashable, List, Optional
+from . import fastjson
+from .fileio import atomic_write_text
+from .index import ProfileIndex
+from .watcher import file_signature
+from modules.metrics.instruments import observe_io, observe_parse
+
+PROFILE_COLUMNS = ("id", "name", "api_key", "base_url", "created_at", "is_active")
+
+def empty_document() -> dict:
+    """生成空的配置文档"""
+    return {
+        "api_profiles": [],
+        "metadata": {
+            "last_updated": datetime.utcnow().isoformat(),
+            "version": "1.0"
+        }
+    }
+
+@dataclass
+class ChangeSet:
+    """一次变更涉及的配置项，供按行存储的后端增量落盘"""
+    upserts: List[dict] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    active_id: Optional[str] = None
+
+class ConfigStorage(ABC):
+    """配置存储后端接口
+
+    prepare 在持有快照锁时调用，只做内存操作；commit 在写锁内、快照锁外执行实际落盘。
+    signature 用于判断存储是否被其他进程或外部工具修改。
+    """
+
+    @property
+    @abstractmethod
+    def watch_paths(self) -> List[Path]:
+        """需要监听变更的文件"""
+
+    @property
+    @abstractmethod
+    def lock_path(self) -> Path:
+        """跨进程写锁使用的锁文件"""
+
+    @abstractmethod
+    def initialize(self):
+        """确保存储已创建"""
+
+    @abstractmethod
+    def signature(self) -> Hashable:
+        """当前存储内容的变更标识"""
+
+    @abstractmethod
+    def load(self) -> dict:
+        """读取完整配置文档"""
+
+    @abstractmethod
+    def prepare(self, index: ProfileIndex, changes: ChangeSet) -> Any:
+        """根据内存索引和变更集生成待落盘的数据"""
+
+    @abstractmethod
+    def commit(self, payload: Any) -> bool:
+        """落盘prepare生成的数据"""
+
+class JsonFileStorage(ConfigStorage):
+    """JSON文件存储（默认后端），每次变更原子性重写整个文件"""
+
+    def __init__(self, config_file: Path):
+        self.config_file = Path(config_file)
+
+    @property
+    def watch_paths(self) -> List[Path]:
+        return [self.config_file]
+
+    @property
+    def lock_path(self) -> Path:
+        return self.config_file.with_suffix('.lock')
+
+    def initialize(self):
+        self.config_file.parent.mkdir(parents=True, exist_ok=True)
+        if not self.config_file.exists():
+            self.write_document(empty_document())
+
+    def signature(self) -> Hashable:
+        return file_signature(self.config_file)
+
+    def load(self) -> dict:
+        try:
+            started = time.perf_counter()
+            with open(self.config_file, 'rb') as f:
+                raw = f.read()
+            loaded = time.perf_counter()
+            observe_io("read", "config", loaded - started, len(raw))
+            data = fastjson.loads(raw)
+            observe_parse("config", time.perf_counter() - loaded)
+            return data
+        except (json.JSONDecodeError, FileNotFoundError):
+            return empty_document()
+
+    def prepare(self, index: ProfileIndex, changes: ChangeSet) -> str:
+        data = index.to_document()
+        data["metadata"]["last_updated"] = datetime.utcnow().isoformat()
+        return fastjson.dumps_pretty(data)
+
+    def commit(self, payload: str) -> bool:
+        try:
+            started = time.perf_counter()
+            atomic_write_text(self.config_file, payload)
+            observe_io("write", "config", time.perf_counter() - started, len(payload))
+            return True
+        except Exception as e:
+            print(f"写入配置文件失败: {e}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def write_document(self, data: dict) -> bool:
+        """直接写入完整配置文档"""
+        data.setdefault("metadata", {})["last_updated"] = datetime.utcnow().isoformat()
+        return self.commit(fastjson.dumps_pretty(data))
+
+class SqliteStorage(ConfigStorage):
+    """SQLite存储（WAL模式）
+
+    每个配置项一行，增删改只涉及变更行；激活切换由一条UPDATE语句完成。
+    写连接只在写锁内使用，读连接只在快照锁内使用，WAL模式下两者互不阻塞，
+    其他进程也可以同时读取数据库。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS api_profiles (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            name TEXT NOT NULL,
+            api_key TEXT NOT NULL,
+            base_url TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            is_active INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_api_profiles_active ON api_profiles(is_active) WHERE is_active = 1;
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_path: Path, import_from: Optional[Path] = None):
+        self.db_path = Path(db_path)
+        self.import_from = Path(import_from) if import_from else None
+        self._reader: Optional[sqlite3.Connection] = None
+        self._writer: Optional[sqlite3.Connection] = None
+
+    @property
+    def watch_paths(self) -> List[Path]:
+        return [self.db_path, self.db_path.with_name(self.db_path.name + "-wal")]
+
+    @property
+    def lock_path(self) -> Path:
+        return self.db_path.with_suffix('.lock')
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def initialize(self):
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        is_new = not self.db_path.exists()
+        self._writer = self._connect()
+        self._writer.executescript(self.SCHEMA)
+        self._reader = self._connect()
+
+        if is_new and self.import_from is not None and self.import_from.exists():
+            imported = self.import_json(self.import_from)
+            print(f"已从 {self.import_from} 导入 {imported} 个配置到 {self.db_path}")
+
+    def signature(self) -> Hashable:
+        # data_version 在其他连接(包括本进程的写连接)提交后变化
+        return self._reader.execute("PRAGMA data_version").fetchone()[0]
+
+    def load(self) -> dict:
+        started = time.perf_counter()
+        rows = self._reader.execute(
+            "SELECT id, name, api_key, base_url, created_at, is_active FROM api_profiles ORDER BY seq"
+        ).fetchall()
+        metadata = {
+            row["key"]: json.loads(row["value"])
+            for row in self._reader.execute("SELECT key, value FROM metadata")
+        }
+        if not metadata:
+            metadata = empty_document()["metadata"]
+        observe_io("read", "config", time.perf_counter() - started)
+        return {
+            "api_profiles": [dict(row, is_active=bool(row["is_active"])) for row in rows],
+            "metadata": metadata
+        }
+
+    def prepare(self, index: ProfileIndex, changes: ChangeSet) -> dict:
+        index.metadata["last_updated"] = datetime.utcnow().isoformat()
+        return {
+            "upserts": [self._row(profile) for profile in changes.upserts],
+            "deletes": list(changes.deletes),
+            "active_id": changes.active_id,
+            "metadata": dict(index.metadata)
+        }
+
+    def commit(self, payload: dict) -> bool:
+        conn = self._writer
+        try:
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            if payload["deletes"]:
+                conn.executemany("DELETE FROM api_profiles WHERE id = ?", [(i,) for i in payload["deletes"]])
+            if payload["upserts"]:
+                self._upsert_rows(conn, payload["upserts"])
+            if payload["active_id"] is not None:
+                conn.execute(
+                    "UPDATE api_profiles SET is_active = (id = ?) WHERE is_active = 1 OR id = ?",
+                    (payload["active_id"], payload["active_id"])
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?)",
+                [(k, json.dumps(v, ensure_ascii=False)) for k, v in payload["metadata"].items()]
+            )
+            conn.execute("COMMIT")
+            observe_io("write", "config", time.perf_counter() - started)
+            return True
+        except Exception as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"写入配置数据库失败: {e}")
+            return False
+
+    def import_json(self, json_path: Path) -> int:
+        """一次性导入 api_configs.json 格式的数据，返回导入的配置数量"""
+        with open(json_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        index = ProfileIndex(data)
+        rows = []
+        for profile in index.values():
+            if all(profile.get(column) is not None for column in PROFILE_COLUMNS[:5]):
+                rows.append(self._row(profile))
+
+        metadata = dict(index.metadata or empty_document()["metadata"])
+        metadata["imported_from"] = str(json_path)
+        changes = {"upserts": rows, "deletes": [], "active_id": index.active_id, "metadata": metadata}
+        if not self.commit(changes):
+            raise Exception("导入配置失败")
+        return len(rows)
+
+    @staticmethod
+    def _row(profile: dict) -> tuple:
+        return (
+            profile["id"],
+            profile["name"],
+            profile["api_key"],
+            profile["base_url"],
+            profile["created_at"],
+            1 if profile.get("is_active") else 0
+        )
+
+    @staticmethod
+    def _upsert_rows(conn: sqlite3.Connection, rows: List[tuple]):
+        conn.executemany(
+            """
+            INSERT INTO api_profiles (id, name, api_key, base_url, created_at, is_active)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                api_key = excluded.api_key,
+                base_url = excluded.base_url,
+                created_at = excluded.created_at,
+                is_active = excluded.is_active
+            """,
+            rows
+        )
+
+def create_config_storage(config_file: str = "./data/api_configs.json",
+                          sqlite_path: Optional[str] = None) -> ConfigStorage:
+    """按环境变量 CCM_STORAGE_BACKEND (json|sqlite) 创建存储后端
+    
+    首次启用sqlite时会自动导入现有的 api_configs.json。
+    """
+    backend = os.getenv("CCM_STORAGE_BACKEND", "json").lower()
+    if backend == "sqlite":
+        db_path = sqlite_path or os.getenv("CCM_SQLITE_PATH", str(Path(config_file).with_suffix(".db")))
+        return SqliteStorage(Path(db_path), import_from=Path(config_file))
+    if backend != "json":
+        raise ValueError(f"不支持的存储后端: {backend}")
+    return JsonFileStorage(Path(config_file))
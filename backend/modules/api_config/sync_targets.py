@@ -0,0 +1,220 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from . import fastjson
+from .fileio import ProcessLock, atomic_write_bytes
+from .settings_sync import ClaudeSettingsSync
+from .watcher import file_signature
+
+@dataclass
+class SyncTarget:
+    """额外的settings.json同步目标，profile_id为空时跟随激活配置"""
+    id: str
+    path: str
+    profile_id: Optional[str] = None
+    label: Optional[str] = None
+    created_at: str = ""
+
+@dataclass
+class TargetSyncResult:
+    """一次同步中单个目标的结果
+
+    status: written(已写入)、unchanged(内容未变化)、skipped(没有可应用的配置)、
+    failed(写入失败)、rolled_back(已写入但因其他目标失败而回滚)
+    """
+    target_id: str
+    path: str
+    profile_id: Optional[str]
+    status: str
+    error: Optional[str] = None
+    synced_at: str = ""
+
+# 一个待同步的目标：(目标, 应用的配置ID, (API Key, Base URL)或None)
+Assignment = Tuple[SyncTarget, Optional[str], Optional[Tuple[str, str]]]
+
+class SyncTargetRegistry:
+    """已登记的同步目标及其并行写入
+
+    目标列表保存在registry_file中，修改在跨进程锁内完成，其他进程修改后按文件签名重新读取。
+    每个目标有独立的 ClaudeSettingsSync，只写入受管字段发生变化的文件；
+    一次同步的所有目标在有界线程池中并行写入。
+    """
+
+    def __init__(self, registry_file: Path, max_workers: int = 8):
+        self.registry_file = Path(registry_file)
+        self._lock = threading.Lock()
+        self._process_lock = ProcessLock(self.registry_file.with_suffix(".lock"))
+        self._targets: Dict[str, SyncTarget] = {}
+        self._signature = None
+        self._syncers: Dict[str, ClaudeSettingsSync] = {}
+        self._last_results: Dict[str, TargetSyncResult] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="settings-sync")
+
+    def _refresh(self):
+        """目标列表文件被修改过时重新读取，调用方须持有 self._lock"""
+        signature = file_signature(self.registry_file)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.registry_file, 'rb') as f:
+                data = fastjson.loads(f.read())
+            targets = [SyncTarget(**item) for item in data.get("targets", [])]
+        except FileNotFoundError:
+            targets = []
+        self._targets = {target.id: target for target in targets}
+        self._signature = signature
+
+    def _save(self):
+        self.registry_file.parent.mkdir(parents=True, exist_ok=True)
+        document = {"targets": [asdict(target) for target in self._targets.values()]}
+        atomic_write_bytes(self.registry_file, fastjson.dumps_pretty(document).encode("utf-8"))
+        self._signature = file_signature(self.registry_file)
+
+    def targets(self) -> List[SyncTarget]:
+        with self._lock:
+            self._refresh()
+            return list(self._targets.values())
+
+    def get(self, target_id: str) -> Optional[SyncTarget]:
+        with self._lock:
+            self._refresh()
+            return self._targets.get(target_id)
+
+    def last_result(self, target_id: str) -> Optional[TargetSyncResult]:
+        """本进程中该目标最近一次的同步结果"""
+        return self._last_results.get(target_id)
+
+    def add(self, path: str, profile_id: Optional[str] = None, label: Optional[str] = None,
+            reserved: Iterable[Path] = ()) -> SyncTarget:
+        """登记同步目标，路径必须是绝对路径下的json文件且未被登记；reserved为不允许登记的路径"""
+        resolved = Path(path).expanduser()
+        if not resolved.is_absolute():
+            raise ValueError(f"同步目标必须是绝对路径: {path}")
+        if resolved.suffix != ".json":
+            raise ValueError(f"同步目标必须是json文件: {path}")
+        resolved = resolved.resolve()
+        if any(resolved == Path(other).expanduser().resolve() for other in reserved):
+            raise ValueError(f"{resolved} 已由默认同步管理")
+
+        with self._lock, self._process_lock:
+            self._refresh()
+            if any(Path(target.path) == resolved for target in self._targets.values()):
+                raise ValueError(f"同步目标 '{resolved}' 已存在")
+            target = SyncTarget(
+                id=str(uuid.uuid4()),
+                path=str(resolved),
+                profile_id=profile_id,
+                label=label,
+                created_at=datetime.utcnow().isoformat()
+            )
+            self._targets[target.id] = target
+            self._save()
+            return target
+
+    def update(self, target_id: str, **fields) -> Optional[SyncTarget]:
+        """修改目标的绑定配置(profile_id)或名称(label)"""
+        with self._lock, self._process_lock:
+            self._refresh()
+            target = self._targets.get(target_id)
+            if target is None:
+                return None
+            for key, value in fields.items():
+                setattr(target, key, value)
+            self._save()
+            return target
+
+    def remove(self, target_id: str) -> bool:
+        with self._lock, self._process_lock:
+            self._refresh()
+            if self._targets.pop(target_id, None) is None:
+                return False
+            self._save()
+        self._syncers.pop(target_id, None)
+        self._last_results.pop(target_id, None)
+        return True
+
+    def affected(self, profile_ids: Iterable[str] = (), active_changed: bool = False) -> List[SyncTarget]:
+        """绑定到指定配置的目标；active_changed 时另加跟随激活配置的目标"""
+        profile_ids = set(profile_ids)
+        return [
+            target for target in self.targets()
+            if (target.profile_id is None and active_changed) or target.profile_id in profile_ids
+        ]
+
+    def _syncer(self, target: SyncTarget) -> ClaudeSettingsSync:
+        with self._lock:
+            syncer = self._syncers.get(target.id)
+            if syncer is None or syncer.settings_path != Path(target.path):
+                syncer = self._syncers[target.id] = ClaudeSettingsSync(Path(target.path))
+            return syncer
+
+    def _apply_one(self, assignment: Assignment, keep_original: bool) -> Tuple[TargetSyncResult, Optional[bytes]]:
+        """同步单个目标，keep_original 时先读取原始内容以便回滚"""
+        target, profile_id, credentials = assignment
+        result = TargetSyncResult(
+            target_id=target.id, path=target.path, profile_id=profile_id, status="skipped",
+            synced_at=datetime.utcnow().isoformat()
+        )
+        if credentials is None:
+            result.error = "没有可应用的配置" if profile_id is None else "绑定的配置不存在或无效"
+            return result, None
+
+        original = None
+        if keep_original:
+            try:
+                original = Path(target.path).read_bytes()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                result.status, result.error = "failed", str(e)
+                return result, None
+        syncer = self._syncer(target)
+        result.status = syncer.write(*credentials)
+        if result.status == "failed":
+            result.error = syncer.last_error
+        return result, original
+
+    @staticmethod
+    def _restore(path: Path, original: Optional[bytes]):
+        if original is None:
+            path.unlink(missing_ok=True)
+        else:
+            atomic_write_bytes(path, original)
+
+    def apply(self, assignments: List[Assignment], rollback_on_failure: bool = False) -> List[TargetSyncResult]:
+        """并行同步所有目标，返回与assignments一一对应的结果
+
+        rollback_on_failure 时只要有目标失败，已写入的目标都恢复为写入前的内容。
+        """
+        if not assignments:
+            return []
+        futures = [
+            self._executor.submit(self._apply_one, assignment, rollback_on_failure)
+            for assignment in assignments
+        ]
+        outcomes = [future.result() for future in futures]
+        results = [result for result, _ in outcomes]
+
+        if rollback_on_failure and any(result.status == "failed" for result in results):
+            written = [(result, original) for result, original in outcomes if result.status == "written"]
+            restores = [
+                self._executor.submit(self._restore, Path(result.path), original)
+                for result, original in written
+            ]
+            for (result, _), future in zip(written, restores):
+                try:
+                    future.result()
+                    result.status = "rolled_back"
+                except Exception as e:
+                    result.error = f"回滚失败: {e}"
+
+        for result in results:
+            self._last_results[result.target_id] = result
+        return results
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
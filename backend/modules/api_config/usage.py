@@ -0,0 +1,244 @@
+import mmap
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from . import fastjson
+from .activations import ActivationHistory, to_epoch
+from .fileio import ProcessLock, atomic_write_bytes
+from .watcher import file_signature
+
+# 统计的usage字段，计数顺序为 [请求数, *USAGE_FIELDS]
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+# 索引中的时间粒度(秒)，查询时可再按天汇总
+BUCKET_SECONDS = 3600
+GRANULARITIES = {"hour": 3600, "day": 86400}
+# 新增内容达到此大小时用mmap读取，避免一次性读入内存
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+# (配置ID, 时间桶起点)，早于第一条激活记录的请求配置ID为""
+BucketKey = Tuple[str, int]
+
+@dataclass
+class FileCheckpoint:
+    """单个transcript文件的读取进度及其贡献的用量"""
+    offset: int = 0
+    inode: int = 0
+    # 上一条计入的消息ID：同一条消息的多个内容块会写成连续的多行，usage相同，只计一次
+    last_message: Optional[str] = None
+    buckets: Dict[BucketKey, List[int]] = field(default_factory=dict)
+
+def _add(target: Dict[BucketKey, List[int]], key: BucketKey, counts: List[int], sign: int = 1):
+    current = target.get(key)
+    if current is None:
+        current = target[key] = [0] * len(counts)
+    for i, value in enumerate(counts):
+        current[i] += sign * value
+    if sign < 0 and not any(current):
+        del target[key]
+
+class UsageIndexer:
+    """从Claude Code本地transcript(~/.claude/projects/**/*.jsonl)统计各配置的token用量
+
+    每个文件记录已读取的字节偏移，每次只解析新追加的完整行；不含usage的行不做JSON解析。
+    请求按时间戳归属到当时的激活配置(见 ActivationHistory)，按小时累计。
+    文件被截断或替换时撤销其原有贡献后重新读取；文件被删除时保留已统计的用量。
+    索引保存在index_file中，更新在跨进程锁内完成，其他进程更新后按文件签名重新读取。
+    """
+
+    def __init__(self, projects_dir: Path, index_file: Path, activations: ActivationHistory,
+                 refresh_interval: float = 2.0, clock: Callable[[], float] = time.monotonic):
+        self.projects_dir = Path(projects_dir).expanduser()
+        self.index_file = Path(index_file)
+        self.activations = activations
+        # 两次扫描的最小间隔(秒)，间隔内的查询直接使用内存中的结果
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._process_lock = ProcessLock(self.index_file.with_suffix(".lock"))
+        self._files: Dict[str, FileCheckpoint] = {}
+        self._totals: Dict[BucketKey, List[int]] = {}
+        self._signature = None
+        self._refreshed_at: Optional[float] = None
+        self.indexed_at: Optional[str] = None
+        # 索引每次变化时递增，查询结果按(版本, 参数)缓存
+        self._version = 0
+        self._query_cache: "OrderedDict[tuple, dict]" = OrderedDict()
+
+    # === 索引文件 ===
+
+    def _load(self):
+        """索引文件被修改过时重新读取，调用方须持有 self._lock"""
+        signature = file_signature(self.index_file)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.index_file, 'rb') as f:
+                data = fastjson.loads(f.read())
+        except FileNotFoundError:
+            data = {}
+        self._files = {}
+        self._totals = {}
+        for path, item in data.get("files", {}).items():
+            checkpoint = FileCheckpoint(item["offset"], item["inode"], item.get("last_message"))
+            for profile_id, start, *counts in item.get("buckets", []):
+                checkpoint.buckets[(profile_id, start)] = counts
+                _add(self._totals, (profile_id, start), counts)
+            self._files[path] = checkpoint
+        self.indexed_at = data.get("indexed_at")
+        self._signature = signature
+        self._version += 1
+
+    def _save(self):
+        files = {
+            path: {
+                "offset": checkpoint.offset,
+                "inode": checkpoint.inode,
+                "last_message": checkpoint.last_message,
+                "buckets": [[profile_id, start, *counts] for (profile_id, start), counts in checkpoint.buckets.items()]
+            }
+            for path, checkpoint in self._files.items()
+        }
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_bytes(self.index_file, fastjson.dumps({"version": 1, "indexed_at": self.indexed_at, "files": files}))
+        self._signature = file_signature(self.index_file)
+
+    # === 扫描 ===
+
+    def refresh(self, force: bool = False) -> bool:
+        """读取各transcript新追加的内容，返回索引是否有变化；距上次扫描不足refresh_interval时跳过"""
+        with self._lock:
+            now = self._clock()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.refresh_interval:
+                return False
+            with self._process_lock:
+                self._load()
+                changed = self._scan_all()
+                self._refreshed_at = now
+                if changed:
+                    self.indexed_at = datetime.utcnow().isoformat()
+                    self._save()
+                    self._version += 1
+                return changed
+
+    def _scan_all(self) -> bool:
+        resolve = None
+        changed = False
+        for path in self.projects_dir.rglob("*.jsonl"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = str(path)
+            checkpoint = self._files.get(key)
+            if checkpoint is not None and checkpoint.inode == stat.st_ino and checkpoint.offset == stat.st_size:
+                continue
+            if checkpoint is None or checkpoint.inode != stat.st_ino or stat.st_size < checkpoint.offset:
+                # 新文件，或文件被替换/截断：撤销原有贡献，从头读取
+                if checkpoint is not None:
+                    for bucket, counts in checkpoint.buckets.items():
+                        _add(self._totals, bucket, counts, -1)
+                checkpoint = self._files[key] = FileCheckpoint(inode=stat.st_ino)
+                changed = True
+            if stat.st_size > checkpoint.offset:
+                if resolve is None:
+                    resolve = self.activations.resolver()
+                changed = self._scan_file(path, checkpoint, stat.st_size, resolve) or changed
+        return changed
+
+    def _scan_file(self, path: Path, checkpoint: FileCheckpoint, size: int,
+                   resolve: Callable[[float], Optional[str]]) -> bool:
+        """解析 checkpoint.offset 到 size 之间的完整行，返回是否读取了新内容"""
+        with open(path, 'rb') as f:
+            if size - checkpoint.offset >= MMAP_THRESHOLD:
+                data = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+                start = checkpoint.offset
+            else:
+                f.seek(checkpoint.offset)
+                data = f.read(size - checkpoint.offset)
+                start = 0
+            try:
+                end = data.rfind(b"\n", start, len(data)) + 1
+                if end <= start:  # 还没有写完的行
+                    return False
+                self._parse_lines(data, start, end, checkpoint, resolve)
+                checkpoint.offset += end - start
+                return True
+            finally:
+                if isinstance(data, mmap.mmap):
+                    data.close()
+
+    def _parse_lines(self, data, start: int, end: int, checkpoint: FileCheckpoint,
+                     resolve: Callable[[float], Optional[str]]):
+        position = start
+        while position < end:
+            line_end = data.find(b"\n", position, end)
+            line_start, position = position, line_end + 1
+            if data.find(b'"usage"', line_start, line_end) < 0:
+                continue
+            try:
+                entry = fastjson.loads(data[line_start:line_end])
+                message = entry.get("message")
+                usage = message.get("usage") if entry.get("type") == "assistant" and isinstance(message, dict) else None
+                if not isinstance(usage, dict):
+                    continue
+                message_id = message.get("id") or entry.get("requestId")
+                if message_id is not None and message_id == checkpoint.last_message:
+                    continue
+                epoch = to_epoch(entry["timestamp"])
+                counts = [1] + [int(usage.get(name) or 0) for name in USAGE_FIELDS]
+            except (ValueError, TypeError, KeyError, AttributeError):
+                continue
+            checkpoint.last_message = message_id
+            bucket = (resolve(epoch) or "", int(epoch) // BUCKET_SECONDS * BUCKET_SECONDS)
+            _add(checkpoint.buckets, bucket, counts)
+            _add(self._totals, bucket, counts)
+
+    # === 查询 ===
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              granularity: str = "day", profile_id: Optional[str] = None) -> dict:
+        """按配置和时间桶(UTC)汇总[since, until)内的用量，未归属的请求配置ID为None"""
+        step = GRANULARITIES[granularity]
+        with self._lock:
+            cache_key = (self._version, since, until, granularity, profile_id)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                self._query_cache.move_to_end(cache_key)
+                return cached
+
+            profiles: Dict[str, List[int]] = {}
+            buckets: Dict[BucketKey, List[int]] = {}
+            for (owner, start), counts in self._totals.items():
+                if profile_id is not None and owner != profile_id:
+                    continue
+                if (since is not None and start + BUCKET_SECONDS <= since) or (until is not None and start >= until):
+                    continue
+                _add(profiles, (owner, 0), counts)
+                _add(buckets, (owner, start // step * step), counts)
+
+            def totals(counts: List[int]) -> dict:
+                item = {"requests": counts[0], **dict(zip(USAGE_FIELDS, counts[1:]))}
+                item["total_tokens"] = sum(counts[1:])
+                return item
+
+            result = {
+                "profiles": [
+                    {"profile_id": owner or None, **totals(counts)}
+                    for (owner, _), counts in sorted(profiles.items(), key=lambda item: -sum(item[1][1:]))
+                ],
+                "buckets": [
+                    {"start": datetime.fromtimestamp(start, timezone.utc).isoformat(), "profile_id": owner or None, **totals(counts)}
+                    for (owner, start), counts in sorted(buckets.items(), key=lambda item: (item[0][1], item[0][0]))
+                ],
+                "files_indexed": len(self._files),
+                "bytes_indexed": sum(checkpoint.offset for checkpoint in self._files.values()),
+                "indexed_at": self.indexed_at
+            }
+            self._query_cache[cache_key] = result
+            while len(self._query_cache) > 32:
+                self._query_cache.popitem(last=False)
+            return result
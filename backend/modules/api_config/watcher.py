@@ -0,0 +1,151 @@
+import atexit
+import functools
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+@functools.lru_cache(maxsize=None)
+def load_watchfiles():
+    """首次监听文件时才导入watchfiles(随uvicorn[standard]安装，提供inotify/FSEvents等系统级文件事件)，未安装时返回None
+
+    只用到 file_signature 的模块(如命令行工具)因此不必加载它。
+    """
+    try:
+        import watchfiles
+    except ImportError:
+        return None
+    return watchfiles
+
+FileSignature = Optional[Tuple[int, int, int]]
+
+def file_signature(path: Path) -> FileSignature:
+    """获取文件签名(inode, 大小, mtime)，文件不存在时返回None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+class FileWatcher:
+    """进程级文件监听器
+
+    所有被监听的文件共用一个后台线程：可用时基于watchfiles的系统级文件事件，
+    否则按固定间隔stat轮询。两种方式都会比对文件签名，只有签名真正变化时才回调。
+    """
+
+    def __init__(self, poll_interval: float = 1.0):
+        self.poll_interval = poll_interval
+        self._callbacks: Dict[Path, List[Callable[[Path], None]]] = {}
+        self._signatures: Dict[Path, FileSignature] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._restart_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, path, callback: Callable[[Path], None]) -> bool:
+        """监听文件变更，返回该文件是否由系统级文件事件覆盖"""
+        path = Path(path).expanduser().absolute()
+        with self._lock:
+            if path not in self._callbacks:
+                self._callbacks[path] = []
+                self._signatures[path] = file_signature(path)
+                self._restart_event.set()
+            self._callbacks[path].append(callback)
+        self._ensure_started()
+        return load_watchfiles() is not None and path.parent.is_dir()
+
+    def unwatch(self, path, callback: Callable[[Path], None]):
+        """取消文件监听"""
+        path = Path(path).expanduser().absolute()
+        with self._lock:
+            callbacks = self._callbacks.get(path, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+            if not callbacks and path in self._callbacks:
+                del self._callbacks[path]
+                del self._signatures[path]
+                self._restart_event.set()
+
+    def stop(self):
+        """停止后台监听线程"""
+        self._stop_event.set()
+        self._restart_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _ensure_started(self):
+        """按需启动后台监听线程"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="config-file-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """监听主循环：监听目录集合变化时重建watch"""
+        watchfiles = load_watchfiles()
+        while not self._stop_event.is_set():
+            self._restart_event.clear()
+            with self._lock:
+                dirs = sorted({str(p.parent) for p in self._callbacks if p.parent.is_dir()})
+
+            if watchfiles is None or not dirs:
+                self._check_all()
+                self._restart_event.wait(self.poll_interval)
+                continue
+
+            try:
+                # 超时返回空集合，顺带轮询父目录尚不存在的文件
+                for _ in watchfiles.watch(
+                    *dirs,
+                    debounce=50,
+                    step=10,
+                    stop_event=self._restart_event,
+                    rust_timeout=int(self.poll_interval * 1000),
+                    yield_on_timeout=True,
+                    recursive=False,
+                    raise_interrupt=False
+                ):
+                    self._check_all()
+            except Exception as e:
+                print(f"文件监听失败，退回轮询模式: {e}")
+                self._check_all()
+                self._stop_event.wait(self.poll_interval)
+
+    def _check_all(self):
+        """比对所有文件签名，触发发生变化文件的回调"""
+        with self._lock:
+            watched = list(self._signatures.items())
+
+        for path, old_signature in watched:
+            signature = file_signature(path)
+            if signature == old_signature:
+                continue
+
+            with self._lock:
+                if path not in self._signatures:
+                    continue
+                self._signatures[path] = signature
+                callbacks = list(self._callbacks.get(path, []))
+
+            for callback in callbacks:
+                try:
+                    callback(path)
+                except Exception as e:
+                    print(f"文件变更回调执行失败: {e}")
+
+_file_watcher: Optional[FileWatcher] = None
+_file_watcher_lock = threading.Lock()
+
+def get_file_watcher() -> FileWatcher:
+    """获取进程级共享的文件监听器"""
+    global _file_watcher
+    with _file_watcher_lock:
+        if _file_watcher is None:
+            _file_watcher = FileWatcher()
+            # 解释器退出前停止监听线程，避免watchfiles在销毁阶段仍在运行
+            atexit.register(_file_watcher.stop)
+        return _file_watcher
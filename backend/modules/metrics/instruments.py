@@ -0,0 +1,122 @@
+"""热路径埋点
+
+所有埋点函数在指标和Server-Timing都关闭时只做一次布尔判断就返回；
+锁的等待/持有时间只在启用指标时通过包装锁对象采集，关闭时使用原始锁，没有额外开销。
+"""
+import contextvars
+import os
+import time
+from typing import Dict, Optional
+from .registry import BYTES_BUCKETS, MetricsRegistry
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+# CCM_METRICS_ENABLED 控制 /metrics 指标采集(默认开启)；CCM_SERVER_TIMING 控制逐请求耗时拆分响应头(默认关闭)
+METRICS_ENABLED = _env_flag("CCM_METRICS_ENABLED", "1")
+SERVER_TIMING_ENABLED = _env_flag("CCM_SERVER_TIMING", "0")
+ENABLED = METRICS_ENABLED or SERVER_TIMING_ENABLED
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "ccm_http_request_duration_seconds", "HTTP请求处理耗时", ("method", "route", "status")
+)
+LOCK_WAIT_SECONDS = REGISTRY.histogram("ccm_lock_wait_seconds", "获取锁的等待时间", ("lock",))
+LOCK_HOLD_SECONDS = REGISTRY.histogram("ccm_lock_hold_seconds", "锁的持有时间", ("lock",))
+IO_SECONDS = REGISTRY.histogram("ccm_file_io_duration_seconds", "文件读写耗时", ("op", "target"))
+IO_BYTES = REGISTRY.counter("ccm_file_io_bytes_total", "文件读写字节数", ("op", "target"))
+IO_SIZE = REGISTRY.histogram("ccm_file_io_size_bytes", "单次文件读写大小", ("op", "target"), buckets=BYTES_BUCKETS)
+PARSE_SECONDS = REGISTRY.histogram("ccm_parse_duration_seconds", "配置文档解析耗时", ("target",))
+CACHE_LOOKUPS = REGISTRY.counter(
+    "ccm_snapshot_cache_lookups_total",
+    "配置快照查询：hit为免校验命中，revalidated为校验签名后命中，miss为重新加载",
+    ("result",)
+)
+
+# 当前请求的分阶段耗时(毫秒)，只在启用Server-Timing时设置
+_request_timing: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "ccm_request_timing", default=None
+)
+
+def start_request_timing() -> Optional[contextvars.Token]:
+    """为当前请求开启分阶段计时"""
+    if not SERVER_TIMING_ENABLED:
+        return None
+    return _request_timing.set({})
+
+def finish_request_timing(token: Optional[contextvars.Token]):
+    """结束分阶段计时，须在开启计时的同一上下文中调用"""
+    if token is not None:
+        _request_timing.reset(token)
+
+def current_request_timing() -> Optional[Dict[str, float]]:
+    return _request_timing.get()
+
+def record_phase(phase: str, seconds: float):
+    """累加当前请求某一阶段的耗时"""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing[phase] = timing.get(phase, 0.0) + seconds * 1000
+
+def observe_io(op: str, target: str, seconds: float, nbytes: Optional[int] = None):
+    """记录一次文件读写(op为read或write)"""
+    if not ENABLED:
+        return
+    if METRICS_ENABLED:
+        IO_SECONDS.observe(seconds, op=op, target=target)
+        if nbytes is not None:
+            IO_BYTES.inc(nbytes, op=op, target=target)
+            IO_SIZE.observe(nbytes, op=op, target=target)
+    record_phase(f"{target}-{op}", seconds)
+
+def observe_parse(target: str, seconds: float):
+    """记录一次配置解析"""
+    if not ENABLED:
+        return
+    if METRICS_ENABLED:
+        PARSE_SECONDS.observe(seconds, target=target)
+    record_phase(f"{target}-parse", seconds)
+
+def count_cache_lookup(result: str):
+    """记录一次配置快照查询结果"""
+    if METRICS_ENABLED:
+        CACHE_LOOKUPS.inc(result=result)
+
+class InstrumentedLock:
+    """记录等待和持有时间的锁包装，可包装 threading.Lock 或任何支持 acquire/release 的锁
+
+    锁是互斥的，同一时刻只有一个持有者，因此获取时间直接保存在实例上。
+    """
+
+    def __init__(self, lock, name: str):
+        self._lock = lock
+        self.name = name
+        self._acquired_at = 0.0
+
+    def acquire(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._lock.acquire(*args, **kwargs)
+        self._acquired_at = time.perf_counter()
+        waited = self._acquired_at - started
+        if METRICS_ENABLED:
+            LOCK_WAIT_SECONDS.observe(waited, lock=self.name)
+        record_phase(f"{self.name}-lock-wait", waited)
+        return result
+
+    def release(self):
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        if METRICS_ENABLED:
+            LOCK_HOLD_SECONDS.observe(held, lock=self.name)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+def instrument_lock(lock, name: str):
+    """启用埋点时返回包装后的锁，否则原样返回"""
+    return InstrumentedLock(lock, name) if ENABLED else lock
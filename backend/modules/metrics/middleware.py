@@ -0,0 +1,75 @@
+import time
+from typing import Dict, Optional
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .instruments import (
+    HTTP_REQUEST_SECONDS,
+    METRICS_ENABLED,
+    SERVER_TIMING_ENABLED,
+    current_request_timing,
+    finish_request_timing,
+    start_request_timing
+)
+
+def format_server_timing(timing: Dict[str, float], total_ms: float) -> str:
+    """生成Server-Timing响应头，app为未单独计时部分(参数校验、业务逻辑、响应序列化等)"""
+    entries = [f"{name};dur={duration:.3f}" for name, duration in timing.items()]
+    other = max(total_ms - sum(timing.values()), 0.0)
+    entries.append(f"app;dur={other:.3f}")
+    entries.append(f"total;dur={total_ms:.3f}")
+    return ", ".join(entries)
+
+class MetricsMiddleware:
+    """记录每个路由的处理耗时，并按需添加Server-Timing响应头
+
+    使用纯ASGI中间件而不是BaseHTTPMiddleware，流式响应(SSE、代理)不会被缓冲。
+    路由标签使用路由模板(如 /profiles/{profile_id})，避免标签基数随配置ID增长。
+    """
+
+    def __init__(self, app: ASGIApp, routes_app=None):
+        self.app = app
+        # 提供routes属性的应用(FastAPI实例)，用于把endpoint映射回路由模板
+        self._routes_app = routes_app
+        self._route_paths: Optional[Dict[object, str]] = None
+
+    def _route_label(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._route_paths is None:
+            routes = getattr(self._routes_app, "routes", [])
+            self._route_paths = {getattr(route, "endpoint", None): route.path for route in routes}
+        return self._route_paths.get(endpoint, "other")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not (METRICS_ENABLED or SERVER_TIMING_ENABLED):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        token = start_request_timing()
+        timing = current_request_timing() if token is not None else None
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if timing is not None:
+                    # 响应头发出时业务处理已经完成
+                    total_ms = (time.perf_counter() - started) * 1000
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", format_server_timing(timing, total_ms).encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            finish_request_timing(token)
+            if METRICS_ENABLED:
+                HTTP_REQUEST_SECONDS.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=self._route_label(scope),
+                    status=str(status_code)
+                )
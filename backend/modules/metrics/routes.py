@@ -0,0 +1,12 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from .instruments import METRICS_ENABLED, REGISTRY
+
+router = APIRouter(tags=["Metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="Prometheus指标")
+def get_metrics():
+    """以Prometheus文本格式输出指标，CCM_METRICS_ENABLED=0 时不可用"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="指标采集未启用")
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,159 @@
+import itertools
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+PROXY_MODES = ("active", "weighted", "least_latency")
+
+@dataclass
+class Upstream:
+    """代理可转发到的一个配置"""
+    profile_id: str
+    name: str
+    base_url: str
+    api_key: str
+    weight: int = 1
+
+@dataclass
+class UpstreamStats:
+    """上游的转发统计"""
+    requests: int = 0
+    errors: int = 0
+    in_flight: int = 0
+    ewma_ttfb_ms: Optional[float] = None
+
+class UpstreamBalancer:
+    """代理上游选择器
+
+    内存中保存配置快照和激活配置指针，配置变更时由管理器事件标记失效、下次选择时重新加载，
+    因此切换激活配置只是一次指针替换。支持三种模式：
+    - active：只转发到当前激活配置
+    - weighted：在所有权重>0的配置间做平滑加权轮询
+    - least_latency：选择首字节耗时最低的配置，耗时取代理流量的滑动平均，没有时参考探测结果
+    """
+
+    def __init__(self, load_snapshot: Callable[[], tuple], mode: str = "active",
+                 weights: Optional[Dict[str, int]] = None,
+                 probe_latency: Optional[Callable[[str], Optional[float]]] = None,
+                 ewma_alpha: float = 0.3, error_penalty_ms: float = 10000.0):
+        self.set_mode(mode)
+        self._load_snapshot = load_snapshot
+        self._weights = weights or {}
+        self._probe_latency = probe_latency
+        self._ewma_alpha = ewma_alpha
+        self._error_penalty_ms = error_penalty_ms
+        self._lock = threading.Lock()
+        self._upstreams: List[Upstream] = []
+        self._active_id: Optional[str] = None
+        self._stale = True
+        self._current_weights: Dict[str, int] = {}
+        self._stats: Dict[str, UpstreamStats] = {}
+        self._tiebreak = itertools.count()
+
+    def set_mode(self, mode: str):
+        if mode not in PROXY_MODES:
+            raise ValueError(f"不支持的代理模式: {mode}")
+        self.mode = mode
+
+    def invalidate(self, *args):
+        """配置变更回调，可直接注册为管理器的事件监听器"""
+        self._stale = True
+
+    def refresh(self):
+        """从管理器重新加载配置快照"""
+        # 先清除标记，加载期间发生的变更会重新标记失效
+        self._stale = False
+        profiles, active_id = self._load_snapshot()
+        upstreams = [
+            Upstream(
+                profile_id=profile["id"],
+                name=profile["name"],
+                base_url=profile["base_url"].rstrip("/"),
+                api_key=profile["api_key"],
+                weight=self._weights.get(profile["id"], self._weights.get(profile["name"], 1))
+            )
+            for profile in profiles
+        ]
+        with self._lock:
+            self._upstreams = upstreams
+            self._active_id = active_id
+            self._current_weights = {u.profile_id: self._current_weights.get(u.profile_id, 0) for u in upstreams}
+
+    @property
+    def stale(self) -> bool:
+        return self._stale
+
+    def choose(self) -> Optional[Upstream]:
+        """按当前模式选择上游，没有可用配置时返回None"""
+        with self._lock:
+            if self.mode == "active":
+                return next((u for u in self._upstreams if u.profile_id == self._active_id), None)
+            pool = [u for u in self._upstreams if u.weight > 0]
+            if not pool:
+                return None
+            if self.mode == "weighted":
+                return self._choose_weighted(pool)
+            return self._choose_least_latency(pool)
+
+    def _choose_weighted(self, pool: List[Upstream]) -> Upstream:
+        """平滑加权轮询(同nginx)，调用方须持有 self._lock"""
+        total = 0
+        best = None
+        for upstream in pool:
+            self._current_weights[upstream.profile_id] += upstream.weight
+            total += upstream.weight
+            if best is None or self._current_weights[upstream.profile_id] > self._current_weights[best.profile_id]:
+                best = upstream
+        self._current_weights[best.profile_id] -= total
+        return best
+
+    def _choose_least_latency(self, pool: List[Upstream]) -> Upstream:
+        """选择预估耗时最低的上游，没有耗时数据的上游优先试探一次，调用方须持有 self._lock"""
+        def score(upstream: Upstream) -> tuple:
+            stats = self._stats.get(upstream.profile_id)
+            latency = stats.ewma_ttfb_ms if stats else None
+            if latency is None and self._probe_latency is not None:
+                latency = self._probe_latency(upstream.profile_id)
+            in_flight = stats.in_flight if stats else 0
+            return (latency if latency is not None else 0.0, in_flight, next(self._tiebreak))
+        return min(pool, key=score)
+
+    def started(self, upstream: Upstream):
+        """记录开始转发"""
+        with self._lock:
+            stats = self._stats.setdefault(upstream.profile_id, UpstreamStats())
+            stats.requests += 1
+            stats.in_flight += 1
+
+    def finished(self, upstream: Upstream, ttfb_ms: Optional[float], error: bool = False):
+        """记录转发结束，ttfb_ms为上游响应头到达耗时；失败按惩罚耗时计入，避免最低延迟模式反复选中故障上游"""
+        with self._lock:
+            stats = self._stats.setdefault(upstream.profile_id, UpstreamStats())
+            stats.in_flight = max(stats.in_flight - 1, 0)
+            if error:
+                stats.errors += 1
+                if ttfb_ms is None:
+                    ttfb_ms = self._error_penalty_ms
+            if ttfb_ms is not None:
+                if stats.ewma_ttfb_ms is None:
+                    stats.ewma_ttfb_ms = ttfb_ms
+                else:
+                    stats.ewma_ttfb_ms += self._ewma_alpha * (ttfb_ms - stats.ewma_ttfb_ms)
+
+    def status(self) -> dict:
+        """获取上游列表和转发统计"""
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "active_profile_id": self._active_id,
+                "upstreams": [
+                    {
+                        "profile_id": u.profile_id,
+                        "name": u.name,
+                        "base_url": u.base_url,
+                        "weight": u.weight,
+                        **vars(self._stats.get(u.profile_id, UpstreamStats()))
+                    }
+                    for u in self._upstreams
+                ]
+            }
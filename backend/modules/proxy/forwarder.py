@@ -0,0 +1,120 @@
+import hmac
+import time
+from typing import Optional
+import httpx
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from .balancer import Upstream, UpstreamBalancer
+
+# 逐跳头部不能转发(RFC 7230 6.1)，认证头由代理替换为上游配置的密钥
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade"
+}
+REQUEST_EXCLUDED_HEADERS = HOP_BY_HOP_HEADERS | {"host", "x-api-key", "authorization"}
+
+class ProxyForwarder:
+    """本地反向代理的请求转发
+
+    上游连接由一个长期存在的httpx.AsyncClient池化保持，请求体和响应体都以流的方式透传，不做缓冲；
+    响应体使用原始字节(aiter_raw)，上游的压缩编码原样交给客户端。
+    """
+
+    def __init__(self, balancer: UpstreamBalancer, token: Optional[str] = None,
+                 max_connections: int = 100, max_keepalive: int = 20,
+                 connect_timeout: float = 10.0, read_timeout: float = 600.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.balancer = balancer
+        self.token = token
+        self._client_options = dict(
+            timeout=httpx.Timeout(connect_timeout, read=read_timeout, write=60.0, pool=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            transport=transport,
+            follow_redirects=False
+        )
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(**self._client_options)
+        return self._client
+
+    async def aclose(self):
+        """关闭上游连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _authorized(self, request: Request) -> bool:
+        """校验客户端携带的是代理令牌(x-api-key 或 Bearer)，未设置令牌时不校验"""
+        if not self.token:
+            return True
+        presented = request.headers.get("x-api-key")
+        if presented is None:
+            authorization = request.headers.get("authorization", "")
+            presented = authorization[7:] if authorization.lower().startswith("bearer ") else ""
+        return hmac.compare_digest(presented.encode(), self.token.encode())
+
+    @staticmethod
+    def _upstream_request_headers(request: Request, upstream: Upstream) -> list:
+        headers = [
+            (key, value) for key, value in request.headers.items()
+            if key.lower() not in REQUEST_EXCLUDED_HEADERS
+        ]
+        headers.append(("x-api-key", upstream.api_key))
+        headers.append(("authorization", f"Bearer {upstream.api_key}"))
+        return headers
+
+    async def forward(self, request: Request, path: str) -> Response:
+        """把请求转发到选中的上游配置"""
+        if not self._authorized(request):
+            return JSONResponse(status_code=401, content={"detail": "代理令牌无效"})
+
+        if self.balancer.stale:
+            await run_in_threadpool(self.balancer.refresh)
+        upstream = self.balancer.choose()
+        if upstream is None:
+            return JSONResponse(status_code=503, content={"detail": "没有可用的上游配置"})
+
+        url = f"{upstream.base_url}/{path}"
+        if request.url.query:
+            url = f"{url}?{request.url.query}"
+
+        client = self._get_client()
+        upstream_request = client.build_request(
+            request.method,
+            url,
+            headers=self._upstream_request_headers(request, upstream),
+            content=request.stream()
+        )
+
+        self.balancer.started(upstream)
+        started = time.perf_counter()
+        try:
+            upstream_response = await client.send(upstream_request, stream=True)
+        except httpx.HTTPError as e:
+            self.balancer.finished(upstream, None, error=True)
+            return JSONResponse(
+                status_code=504 if isinstance(e, httpx.TimeoutException) else 502,
+                content={"detail": f"上游 {upstream.name} 请求失败: {type(e).__name__}"}
+            )
+        ttfb_ms = (time.perf_counter() - started) * 1000
+
+        async def close_upstream():
+            await upstream_response.aclose()
+            self.balancer.finished(upstream, ttfb_ms, error=upstream_response.status_code >= 500)
+
+        response = StreamingResponse(
+            upstream_response.aiter_raw(),
+            status_code=upstream_response.status_code,
+            background=BackgroundTask(close_upstream)
+        )
+        # 保留重复头部(如多个set-cookie)，去掉逐跳头部
+        response.raw_headers = [
+            (key, value) for key, value in upstream_response.headers.raw
+            if key.decode("latin-1").lower() not in HOP_BY_HOP_HEADERS
+        ]
+        response.headers["x-ccm-upstream"] = upstream.profile_id
+        return response
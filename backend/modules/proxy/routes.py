@@ -0,0 +1,107 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from functools import lru_cache
+from pathlib import Path
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+import os
+import secrets
+from typing import Dict, Optional
+from modules.api_config.routes import get_api_config_manager, get_latency_prober
+from .balancer import PROXY_MODES, UpstreamBalancer
+from .forwarder import ProxyForwarder
+
+# 转发路由：Claude Code 的 ANTHROPIC_BASE_URL 指向这里
+router = APIRouter(prefix="/proxy", include_in_schema=False)
+# 管理路由
+admin_router = APIRouter(prefix="/api/v1/proxy", tags=["Local Proxy"])
+
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"]
+
+class ProxyModeRequest(BaseModel):
+    mode: str = Field(..., description="代理模式：active / weighted / least_latency")
+
+def proxy_enabled() -> bool:
+    """是否启用本地代理模式(CCM_PROXY_ENABLED)"""
+    return os.getenv("CCM_PROXY_ENABLED", "").lower() in ("1", "true", "yes")
+
+def proxy_public_url() -> str:
+    """写入settings.json的代理地址"""
+    return os.getenv("CCM_PROXY_PUBLIC_URL", "http://127.0.0.1:50000/proxy").rstrip("/")
+
+def parse_weights(raw: str) -> Dict[str, int]:
+    """解析 CCM_PROXY_WEIGHTS，格式为 "配置名称或ID=权重,..."，权重为0表示不参与负载均衡"""
+    weights = {}
+    for item in raw.split(","):
+        key, sep, value = item.rpartition("=")
+        if not sep or not key.strip():
+            continue
+        try:
+            weights[key.strip()] = max(int(value), 0)
+        except ValueError:
+            print(f"忽略无效的代理权重: {item}")
+    return weights
+
+def load_proxy_token(token_file: str = "./data/proxy_token") -> str:
+    """获取代理令牌：优先使用 CCM_PROXY_TOKEN，否则生成一次并保存，重启后settings.json无需改写"""
+    token = os.getenv("CCM_PROXY_TOKEN")
+    if token:
+        return token
+    path = Path(token_file)
+    try:
+        token = path.read_text(encoding='utf-8').strip()
+        if token:
+            return token
+    except FileNotFoundError:
+        pass
+    token = f"ccm-proxy-{secrets.token_urlsafe(24)}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+    return token
+
+@lru_cache(maxsize=None)
+def get_upstream_balancer() -> UpstreamBalancer:
+    """依赖注入：获取进程级共享的上游选择器，配置变更事件会使其快照失效"""
+    manager = get_api_config_manager()
+    prober = get_latency_prober()
+
+    def probe_latency(profile_id: str) -> Optional[float]:
+        summary = prober.summary(profile_id)
+        return summary["ttfb_ms"]["p50"] if summary else None
+
+    balancer = UpstreamBalancer(
+        load_snapshot=lambda: (manager.export_profiles(), manager.get_active_profile_id()),
+        mode=os.getenv("CCM_PROXY_MODE", "active"),
+        weights=parse_weights(os.getenv("CCM_PROXY_WEIGHTS", "")),
+        probe_latency=probe_latency
+    )
+    manager.add_listener(balancer.invalidate)
+    return balancer
+
+@lru_cache(maxsize=None)
+def get_proxy_forwarder() -> ProxyForwarder:
+    """依赖注入：获取进程级共享的转发器"""
+    return ProxyForwarder(get_upstream_balancer(), token=load_proxy_token())
+
+@router.api_route("/{path:path}", methods=PROXY_METHODS)
+async def forward_request(path: str, request: Request,
+                          forwarder: ProxyForwarder = Depends(get_proxy_forwarder)):
+    """转发到选中的上游配置"""
+    return await forwarder.forward(request, path)
+
+@admin_router.get("/status", response_model=dict, summary="获取本地代理状态")
+async def get_proxy_status(balancer: UpstreamBalancer = Depends(get_upstream_balancer)):
+    """获取代理模式、上游列表和各上游的转发统计"""
+    if balancer.stale:
+        await run_in_threadpool(balancer.refresh)
+    return {"enabled": proxy_enabled(), "public_url": proxy_public_url(), **balancer.status()}
+
+@admin_router.put("/mode", response_model=dict, summary="切换代理模式")
+async def set_proxy_mode(body: ProxyModeRequest, balancer: UpstreamBalancer = Depends(get_upstream_balancer)):
+    """运行时切换代理模式，重启后恢复为 CCM_PROXY_MODE"""
+    try:
+        balancer.set_mode(body.mode)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"代理模式必须是: {', '.join(PROXY_MODES)}")
+    return {"success": True, "mode": balancer.mode}
@@ -0,0 +1,111 @@
+import bisect
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# 字段顺序：分 时 日 月 周(0和7都表示周日)
+FIELD_RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+FIELD_NAMES = ("分", "时", "日", "月", "周")
+# 最多向后查找的年数，超过时认为表达式永远不会触发(如2月30日)
+SEARCH_YEARS = 5
+
+def parse_field(text: str, low: int, high: int, name: str) -> Tuple[List[int], bool]:
+    """解析单个字段，支持 * , - /，返回(排序后的取值, 是否为*)"""
+    values = set()
+    for part in text.split(","):
+        base, has_step, step_text = part.partition("/")
+        try:
+            step = int(step_text) if has_step else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (int(value) for value in base.split("-", 1))
+            else:
+                start = int(base)
+                end = high if has_step else start
+        except ValueError:
+            raise ValueError(f"cron表达式的{name}字段无效: {text}")
+        if step < 1 or not low <= start <= end <= high:
+            raise ValueError(f"cron表达式的{name}字段超出范围: {text}")
+        values.update(range(start, end + 1, step))
+    return sorted(values), text == "*"
+
+@dataclass(frozen=True)
+class CronSchedule:
+    """cron时间表(分 时 日 月 周)，按指定时区计算触发时间
+
+    与标准cron相同：日和周都不是*时满足其一即可，否则两者都须满足。
+    """
+    minutes: Tuple[int, ...]
+    hours: Tuple[int, ...]
+    days: Tuple[int, ...]
+    months: Tuple[int, ...]
+    weekdays: Tuple[int, ...]
+    any_day: bool
+    any_weekday: bool
+    tz: ZoneInfo
+
+    @classmethod
+    def parse(cls, expression: str, timezone: str = "UTC") -> "CronSchedule":
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式须包含5个字段(分 时 日 月 周): {expression}")
+        try:
+            tz = ZoneInfo(timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"未知的时区: {timezone}")
+        parsed = [parse_field(text, low, high, name)
+                  for text, (low, high), name in zip(fields, FIELD_RANGES, FIELD_NAMES)]
+        weekdays = sorted({day % 7 for day in parsed[4][0]})
+        return cls(
+            minutes=tuple(parsed[0][0]),
+            hours=tuple(parsed[1][0]),
+            days=tuple(parsed[2][0]),
+            months=tuple(parsed[3][0]),
+            weekdays=tuple(weekdays),
+            any_day=parsed[2][1],
+            any_weekday=parsed[4][1],
+            tz=tz
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, epoch: float) -> float:
+        """严格晚于epoch的下一次触发时间(Unix时间戳)"""
+        local = datetime.fromtimestamp(epoch, self.tz).replace(tzinfo=None, second=0, microsecond=0)
+        moment = local + timedelta(minutes=1)
+        limit = moment + timedelta(days=366 * SEARCH_YEARS)
+        while moment < limit:
+            if moment.month not in self.months:
+                moment = (moment.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(moment):
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            hour = self._next_value(self.hours, moment.hour)
+            if hour is None:
+                moment = moment.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if hour != moment.hour:
+                moment = moment.replace(hour=hour, minute=0)
+            minute = self._next_value(self.minutes, moment.minute)
+            if minute is None:
+                moment = moment.replace(minute=0) + timedelta(hours=1)
+                continue
+            moment = moment.replace(minute=minute)
+            result = moment.replace(tzinfo=self.tz).timestamp()
+            if result > epoch:  # 夏令时跳过的时刻可能落在epoch之前
+                return result
+            moment += timedelta(minutes=1)
+        raise ValueError("cron表达式不会触发")
+
+    @staticmethod
+    def _next_value(values: Tuple[int, ...], current: int) -> Optional[int]:
+        position = bisect.bisect_left(values, current)
+        return values[position] if position < len(values) else None
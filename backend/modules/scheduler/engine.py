@@ -0,0 +1,313 @@
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import httpx
+from modules.api_config.activations import to_epoch
+from modules.api_config.async_manager import AsyncApiConfigManager
+from .cron import CronSchedule
+from .rules import ScheduleLog, ScheduleRule, ScheduleRuleStore, ScheduleRun
+
+# 这些事件可能改变激活配置，需要重新计算最长激活时间规则的到期时间
+ACTIVATION_EVENTS = {"profile_activated", "profile_created", "profile_deleted", "profiles_changed"}
+# 切换失败后重试的间隔(秒)
+RETRY_SECONDS = 60
+
+# 定时器：(到期时间, 序号, 规则ID, 动作, 规则代数, 附加数据)
+Timer = Tuple[float, int, str, str, int, object]
+
+@dataclass
+class RuleState:
+    """规则的运行状态，generation变化后堆中该规则的旧定时器作废"""
+    generation: int = 0
+    next_check: Optional[float] = None
+    last_checked: Optional[str] = None
+    last_error: Optional[str] = None
+    last_run: Optional[ScheduleRun] = None
+
+class RotationScheduler:
+    """按规则自动切换激活配置
+
+    所有规则共用一个定时器堆和一个后台任务：任务只等待到最早的到期时间，
+    规则变更或激活配置变化时被唤醒后重新计算受影响规则的定时器(旧定时器按代数作废，不从堆中删除)。
+    clock 返回Unix时间戳，测试时可注入假时钟并直接调用 run_due(now)。
+
+    condition 规则请求url，2xx的JSON响应中有 "profile"(配置名称或ID)时切换到该配置，
+    否则 "match" 为真时切换到规则的profile_id；请求失败不切换。
+    每次自动切换(包括失败)都追加到切换记录，成功的切换同时记入激活记录。
+    """
+
+    def __init__(self, manager: AsyncApiConfigManager, rules: ScheduleRuleStore, log: ScheduleLog,
+                 clock: Callable[[], float] = time.time, timeout: float = 5.0,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.manager = manager
+        self.rules = rules
+        self.log = log
+        self._clock = clock
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._heap: List[Timer] = []
+        self._seq = itertools.count()
+        self._active_rules: Dict[str, ScheduleRule] = {}
+        self._states: Dict[str, RuleState] = {}
+        self._rules_signature = None
+        self._activation_dirty = False
+        # 本进程中最近一次激活的(配置ID, clock时间)，其他进程的激活从激活记录读取
+        self._activated_at: Optional[Tuple[str, float]] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # 串行化后台任务和 reload 对定时器堆的修改
+        self._guard: Optional[asyncio.Lock] = None
+        manager.manager.add_listener(self._on_manager_event)
+
+    # === 生命周期 ===
+
+    async def start(self):
+        """在当前事件循环中启动后台任务"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def wake(self):
+        """唤醒后台任务重新检查(可在任意线程调用)"""
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _get_guard(self) -> asyncio.Lock:
+        if self._guard is None:
+            self._guard = asyncio.Lock()
+        return self._guard
+
+    async def reload(self):
+        """规则已修改：立即重新计算所有规则的定时器，并唤醒后台任务按新的到期时间等待"""
+        async with self._get_guard():
+            self._rules_signature = None
+            await self._replan(self._clock())
+        self.wake()
+
+    def _on_manager_event(self, event_type: str, data: dict):
+        if event_type in ACTIVATION_EVENTS:
+            if event_type == "profile_activated":
+                self._activated_at = (data.get("active_profile_id"), self._clock())
+            self._activation_dirty = True
+            self.wake()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                await self.run_due()
+            except Exception as e:
+                print(f"自动切换执行失败: {e}")
+            due = self.next_wakeup()
+            timeout = None if due is None else max(due - self._clock(), 0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    # === 定时器堆 ===
+
+    def _push(self, rule: ScheduleRule, due: float, action: str, extra: object = None):
+        heapq.heappush(self._heap, (due, next(self._seq), rule.id, action, self._states[rule.id].generation, extra))
+
+    def _valid(self, timer: Timer) -> bool:
+        state = self._states.get(timer[2])
+        return state is not None and state.generation == timer[4] and timer[2] in self._active_rules
+
+    def next_wakeup(self) -> Optional[float]:
+        """最早的有效定时器的到期时间，没有时返回None"""
+        while self._heap and not self._valid(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def next_runs(self) -> Dict[str, float]:
+        """各规则下一次到期的时间"""
+        result: Dict[str, float] = {}
+        for timer in self._heap:
+            if self._valid(timer) and timer[0] < result.get(timer[2], float("inf")):
+                result[timer[2]] = timer[0]
+        return result
+
+    async def _plan(self, rule: ScheduleRule, now: float):
+        """作废规则原有的定时器并按当前状态重新计算"""
+        state = self._states.setdefault(rule.id, RuleState())
+        state.generation += 1
+        if rule.kind == "cron":
+            schedule = CronSchedule.parse(rule.cron, rule.timezone)
+            self._push(rule, schedule.next_after(now), "start")
+            if rule.duration_seconds:
+                # 当前是否处于某个窗口内：窗口开始时间是晚于 now-duration 的第一次触发
+                window_start = schedule.next_after(now - rule.duration_seconds)
+                if window_start <= now:
+                    self._push(rule, window_start + rule.duration_seconds, "end", (window_start, None))
+        elif rule.kind == "condition":
+            self._push(rule, state.next_check or now, "check")
+        elif rule.kind == "max_active":
+            active_id = await self.manager.get_active_profile_id()
+            if active_id is None or (rule.profile_id is not None and active_id != rule.profile_id):
+                return
+            if self._activated_at is not None and self._activated_at[0] == active_id:
+                since = self._activated_at[1]
+            else:
+                latest = (await self.manager.get_activation_history()).latest()
+                since = to_epoch(latest.at) if latest is not None and latest.profile_id == active_id else now
+            self._push(rule, since + rule.max_active_seconds, "rotate", active_id)
+
+    async def _replan(self, now: float):
+        signature = self.rules.signature
+        if signature != self._rules_signature:
+            self._rules_signature = signature
+            self._activation_dirty = False
+            self._active_rules = {rule.id: rule for rule in self.rules.rules() if rule.enabled}
+            self._states = {rule_id: state for rule_id, state in self._states.items() if rule_id in self._active_rules}
+            self._heap = []
+            for rule in self._active_rules.values():
+                await self._plan(rule, now)
+        elif self._activation_dirty:
+            self._activation_dirty = False
+            for rule in self._active_rules.values():
+                if rule.kind == "max_active":
+                    await self._plan(rule, now)
+            if len(self._heap) > 64 + 4 * len(self._active_rules):
+                self._heap = [timer for timer in self._heap if self._valid(timer)]
+                heapq.heapify(self._heap)
+
+    async def run_due(self, now: Optional[float] = None) -> List[ScheduleRun]:
+        """执行所有已到期的定时器，返回本次的自动切换"""
+        async with self._get_guard():
+            now = self._clock() if now is None else now
+            await self._replan(now)
+            runs = []
+            while self._heap and self._heap[0][0] <= now:
+                timer = heapq.heappop(self._heap)
+                if not self._valid(timer):
+                    continue
+                due, _, rule_id, action, _, extra = timer
+                run = await self._fire(self._active_rules[rule_id], action, due, extra, now)
+                if run is not None:
+                    runs.append(run)
+            return runs
+
+    # === 规则动作 ===
+
+    async def _fire(self, rule: ScheduleRule, action: str, due: float, extra: object,
+                    now: float) -> Optional[ScheduleRun]:
+        state = self._states[rule.id]
+        active_id = await self.manager.get_active_profile_id()
+        if action == "start":
+            self._push(rule, CronSchedule.parse(rule.cron, rule.timezone).next_after(now), "start")
+            if rule.duration_seconds:
+                self._push(rule, due + rule.duration_seconds, "end", (due, active_id))
+            return await self._switch(rule, "cron", active_id, rule.profile_id, now)
+        if action == "end":
+            if active_id != rule.profile_id:  # 窗口内已被手动切换
+                return None
+            window_start, previous_id = extra
+            if CronSchedule.parse(rule.cron, rule.timezone).next_after(window_start) <= due:  # 下一个窗口已经开始
+                return None
+            target = rule.fallback_profile_id or previous_id
+            if target is None:  # 窗口开始于本次启动之前
+                history = await self.manager.get_activation_history()
+                target = history.active_at(window_start - 0.001)
+            return await self._switch(rule, "cron_end", active_id, target, now)
+        if action == "rotate":
+            if active_id != extra:
+                return None
+            run = await self._switch(rule, "max_active", active_id, await self._next_profile(rule, active_id), now)
+            if run is not None and run.status == "failed":
+                self._push(rule, now + RETRY_SECONDS, "rotate", active_id)
+            return run
+        if action == "check":
+            state.next_check = now + rule.interval_seconds
+            self._push(rule, state.next_check, "check")
+            target = await self._check_condition(rule, state)
+            return await self._switch(rule, "condition", active_id, target, now)
+        return None
+
+    async def _next_profile(self, rule: ScheduleRule, active_id: str) -> Optional[str]:
+        if rule.next_profile_id is not None:
+            return rule.next_profile_id
+        ids = [profile.id for profile in await self.manager.get_all_profiles()]
+        if active_id not in ids or len(ids) < 2:
+            return None
+        return ids[(ids.index(active_id) + 1) % len(ids)]
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout), transport=self._transport)
+        return self._client
+
+    async def _check_condition(self, rule: ScheduleRule, state: RuleState) -> Optional[str]:
+        """请求条件接口，返回应切换到的配置ID"""
+        state.last_checked = datetime.utcfromtimestamp(self._clock()).isoformat()
+        try:
+            response = await self._get_client().get(rule.url)
+            response.raise_for_status()
+            body = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            state.last_error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            return None
+        state.last_error = None
+        if not isinstance(body, dict):
+            return None
+        if body.get("profile"):
+            ref = str(body["profile"])
+            for profile in await self.manager.get_all_profiles():
+                if profile.id == ref or profile.name.lower() == ref.lower():
+                    return profile.id
+            state.last_error = f"条件接口返回的配置不存在: {ref}"
+            return None
+        return rule.profile_id if body.get("match") else None
+
+    async def _switch(self, rule: ScheduleRule, trigger: str, active_id: Optional[str],
+                      target_id: Optional[str], now: float) -> Optional[ScheduleRun]:
+        """切换到target_id并记录，已是激活配置或没有目标时不做任何事"""
+        if target_id is None or target_id == active_id:
+            return None
+        run = ScheduleRun(
+            at=datetime.utcfromtimestamp(now).isoformat(),
+            rule_id=rule.id,
+            rule_name=rule.name,
+            trigger=trigger,
+            from_profile_id=active_id,
+            to_profile_id=target_id
+        )
+        try:
+            profile = await self.manager.get_profile(target_id)
+            if profile is None:
+                run.status, run.error = "failed", "配置不存在"
+            else:
+                run.to_name = profile.name
+                result = await self.manager.apply_profile(target_id)
+                if not result.success:
+                    run.status, run.error = "failed", "激活配置失败"
+        except Exception as e:
+            run.status, run.error = "failed", str(e)
+        self.log.record(run)
+        self._states[rule.id].last_run = run
+        if run.status == "switched":
+            print(f"⏱️ 规则 '{rule.name or rule.id}' 已切换到 '{run.to_name}'")
+        return run
+
+    def status(self, rule_id: str) -> Optional[RuleState]:
+        return self._states.get(rule_id)
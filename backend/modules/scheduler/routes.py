@@ -0,0 +1,143 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from datetime import datetime
+from functools import lru_cache
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from modules.api_config.routes import get_api_config_manager, get_async_api_config_manager
+from .engine import RotationScheduler
+from .rules import ScheduleLog, ScheduleRule, ScheduleRuleStore, ScheduleRun
+
+router = APIRouter(prefix="/api/v1/scheduler", tags=["Scheduler"])
+
+class ScheduleRuleFields(BaseModel):
+    name: Optional[str] = Field(None, max_length=100, description="规则名称")
+    enabled: bool = Field(True, description="是否启用")
+    profile_id: Optional[str] = Field(None, description="cron/condition：要激活的配置；max_active：只限制该配置，为空时限制任意配置")
+    cron: Optional[str] = Field(None, description="cron表达式(分 时 日 月 周)，如 0 9 * * 1-5")
+    timezone: str = Field("UTC", description="cron表达式使用的时区，如 Asia/Shanghai")
+    duration_seconds: Optional[int] = Field(None, gt=0, description="cron窗口时长(秒)，结束后切回")
+    fallback_profile_id: Optional[str] = Field(None, description="cron窗口结束后切回的配置，为空时切回窗口开始前的激活配置")
+    max_active_seconds: Optional[int] = Field(None, gt=0, description="最长连续激活时间(秒)")
+    next_profile_id: Optional[str] = Field(None, description="超时后切换到的配置，为空时按列表顺序轮换")
+    url: Optional[str] = Field(None, description="条件接口地址")
+    interval_seconds: Optional[int] = Field(None, gt=0, description="条件接口的检查间隔(秒)")
+
+class CreateScheduleRuleRequest(ScheduleRuleFields):
+    kind: str = Field(..., description="规则类型：cron / max_active / condition")
+
+class UpdateScheduleRuleRequest(ScheduleRuleFields):
+    enabled: Optional[bool] = Field(None, description="是否启用")
+    timezone: Optional[str] = Field(None, description="cron表达式使用的时区")
+
+class ScheduleRunModel(BaseModel):
+    at: datetime = Field(..., description="切换时间(UTC)")
+    rule_id: str = Field(..., description="规则ID")
+    rule_name: Optional[str] = Field(None, description="规则名称")
+    trigger: str = Field(..., description="触发原因：cron / cron_end / max_active / condition")
+    from_profile_id: Optional[str] = Field(None, description="切换前的激活配置")
+    to_profile_id: str = Field(..., description="切换到的配置")
+    to_name: Optional[str] = Field(None, description="切换到的配置名称")
+    status: str = Field(..., description="switched 或 failed")
+    error: Optional[str] = Field(None, description="失败原因")
+
+class ScheduleRuleInfo(CreateScheduleRuleRequest):
+    id: str = Field(..., description="规则ID")
+    created_at: datetime = Field(..., description="创建时间(UTC)")
+    next_run: Optional[datetime] = Field(None, description="下一次到期时间(UTC)")
+    last_checked: Optional[datetime] = Field(None, description="condition规则最近一次请求条件接口的时间")
+    last_error: Optional[str] = Field(None, description="condition规则最近一次请求的错误")
+    last_run: Optional[ScheduleRunModel] = Field(None, description="最近一次自动切换")
+
+class ScheduleRuleListResponse(BaseModel):
+    rules: List[ScheduleRuleInfo] = Field(..., description="规则列表")
+    total_count: int = Field(..., description="规则数量")
+
+class ScheduleHistoryResponse(BaseModel):
+    runs: List[ScheduleRunModel] = Field(..., description="自动切换记录(从新到旧)")
+
+@lru_cache(maxsize=None)
+def get_rotation_scheduler() -> RotationScheduler:
+    """依赖注入：获取进程级共享的自动切换调度器，规则和切换记录保存在api_configs.json同目录"""
+    data_dir = get_api_config_manager().config_file.parent
+    return RotationScheduler(
+        get_async_api_config_manager(),
+        ScheduleRuleStore(data_dir / "schedule_rules.json"),
+        ScheduleLog(data_dir / "schedule_history.jsonl")
+    )
+
+def run_model(run: Optional[ScheduleRun]) -> Optional[ScheduleRunModel]:
+    return ScheduleRunModel(**vars(run)) if run is not None else None
+
+def rule_info(scheduler: RotationScheduler, rule: ScheduleRule) -> ScheduleRuleInfo:
+    state = scheduler.status(rule.id)
+    next_run = scheduler.next_runs().get(rule.id)
+    return ScheduleRuleInfo(
+        **vars(rule),
+        next_run=datetime.utcfromtimestamp(next_run) if next_run is not None else None,
+        last_checked=state.last_checked if state else None,
+        last_error=state.last_error if state else None,
+        last_run=run_model(state.last_run) if state else None
+    )
+
+async def check_profile_refs(scheduler: RotationScheduler, fields: dict):
+    for key in ("profile_id", "fallback_profile_id", "next_profile_id"):
+        if fields.get(key) and await scheduler.manager.get_profile(fields[key]) is None:
+            raise HTTPException(status_code=400, detail=f"{key} 指定的配置不存在: {fields[key]}")
+
+@router.get("/rules", response_model=ScheduleRuleListResponse, summary="获取自动切换规则")
+async def list_schedule_rules(scheduler: RotationScheduler = Depends(get_rotation_scheduler)):
+    """列出规则及各自的下一次到期时间和最近一次自动切换"""
+    rules = await run_in_threadpool(scheduler.rules.rules)
+    return ScheduleRuleListResponse(rules=[rule_info(scheduler, rule) for rule in rules], total_count=len(rules))
+
+@router.post("/rules", response_model=ScheduleRuleInfo, summary="创建自动切换规则")
+async def create_schedule_rule(
+    request: CreateScheduleRuleRequest,
+    scheduler: RotationScheduler = Depends(get_rotation_scheduler)
+):
+    """创建规则：cron(按时间窗口激活)、max_active(限制最长激活时间)或condition(按条件接口切换)"""
+    values = request.model_dump()
+    await check_profile_refs(scheduler, values)
+    try:
+        rule = await run_in_threadpool(lambda: scheduler.rules.add(**values))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await scheduler.reload()
+    return rule_info(scheduler, rule)
+
+@router.patch("/rules/{rule_id}", response_model=ScheduleRuleInfo, summary="修改自动切换规则")
+async def update_schedule_rule(
+    rule_id: str,
+    request: UpdateScheduleRuleRequest,
+    scheduler: RotationScheduler = Depends(get_rotation_scheduler)
+):
+    """修改规则，只更新请求中出现的字段"""
+    values = request.model_dump(exclude_unset=True)
+    for key in ("enabled", "timezone"):
+        if key in values and values[key] is None:
+            raise HTTPException(status_code=400, detail=f"{key} 不能为空")
+    await check_profile_refs(scheduler, values)
+    try:
+        rule = await run_in_threadpool(lambda: scheduler.rules.update(rule_id, **values))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rule is None:
+        raise HTTPException(status_code=404, detail="规则不存在")
+    await scheduler.reload()
+    return rule_info(scheduler, rule)
+
+@router.delete("/rules/{rule_id}", response_model=dict, summary="删除自动切换规则")
+async def delete_schedule_rule(rule_id: str, scheduler: RotationScheduler = Depends(get_rotation_scheduler)):
+    if not await run_in_threadpool(scheduler.rules.remove, rule_id):
+        raise HTTPException(status_code=404, detail="规则不存在")
+    await scheduler.reload()
+    return {"success": True, "message": "规则已删除"}
+
+@router.get("/history", response_model=ScheduleHistoryResponse, summary="获取自动切换记录")
+async def get_schedule_history(
+    limit: int = Query(50, ge=1, le=1000, description="返回的记录数"),
+    scheduler: RotationScheduler = Depends(get_rotation_scheduler)
+):
+    """最近的自动切换(包括失败的切换)，从新到旧"""
+    return ScheduleHistoryResponse(runs=[run_model(run) for run in await run_in_threadpool(scheduler.log.recent, limit)])
@@ -0,0 +1,194 @@
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+from modules.api_config import fastjson
+from modules.api_config.fileio import ProcessLock, atomic_write_bytes
+from modules.api_config.watcher import file_signature
+from .cron import CronSchedule
+
+RULE_KINDS = ("cron", "max_active", "condition")
+
+@dataclass
+class ScheduleRule:
+    """自动切换规则
+
+    kind 为 cron 时按cron表达式激活profile_id；设置duration_seconds时窗口结束后切回
+    fallback_profile_id(为空时切回窗口开始前的激活配置)。
+    kind 为 max_active 时激活配置(profile_id为空表示任意配置)连续激活超过max_active_seconds后
+    切换到next_profile_id(为空时按列表顺序轮换到下一个配置)。
+    kind 为 condition 时每interval_seconds请求一次url，按响应切换(见 RotationScheduler)。
+    """
+    id: str
+    kind: str
+    name: Optional[str] = None
+    enabled: bool = True
+    profile_id: Optional[str] = None
+    cron: Optional[str] = None
+    timezone: str = "UTC"
+    duration_seconds: Optional[int] = None
+    fallback_profile_id: Optional[str] = None
+    max_active_seconds: Optional[int] = None
+    next_profile_id: Optional[str] = None
+    url: Optional[str] = None
+    interval_seconds: Optional[int] = None
+    created_at: str = ""
+
+RULE_FIELDS = {item.name for item in fields(ScheduleRule)} - {"id", "created_at"}
+
+def check_rule(rule: ScheduleRule):
+    """校验规则各字段是否与kind匹配，无效时抛出ValueError"""
+    if rule.kind not in RULE_KINDS:
+        raise ValueError(f"规则类型必须是: {', '.join(RULE_KINDS)}")
+    if rule.kind == "cron":
+        if not rule.cron or not rule.profile_id:
+            raise ValueError("cron规则需要cron和profile_id")
+        CronSchedule.parse(rule.cron, rule.timezone)
+        if rule.duration_seconds is not None and rule.duration_seconds <= 0:
+            raise ValueError("duration_seconds必须大于0")
+    elif rule.kind == "max_active":
+        if not rule.max_active_seconds or rule.max_active_seconds <= 0:
+            raise ValueError("max_active规则需要大于0的max_active_seconds")
+    elif rule.kind == "condition":
+        if not rule.url or not rule.url.startswith(("http://", "https://")):
+            raise ValueError("condition规则需要http(s)的url")
+        if not rule.interval_seconds or rule.interval_seconds <= 0:
+            raise ValueError("condition规则需要大于0的interval_seconds")
+
+class ScheduleRuleStore:
+    """自动切换规则，保存在api_configs.json同目录的schedule_rules.json
+
+    修改在跨进程锁内完成，其他进程修改后按文件签名重新读取。
+    """
+
+    def __init__(self, rules_file: Path):
+        self.rules_file = Path(rules_file)
+        self._lock = threading.Lock()
+        self._process_lock = ProcessLock(self.rules_file.with_suffix(".lock"))
+        self._rules: Dict[str, ScheduleRule] = {}
+        self._signature = None
+
+    def _refresh(self):
+        """规则文件被修改过时重新读取，调用方须持有 self._lock"""
+        signature = file_signature(self.rules_file)
+        if signature == self._signature:
+            return
+        try:
+            with open(self.rules_file, 'rb') as f:
+                data = fastjson.loads(f.read())
+            rules = [ScheduleRule(**item) for item in data.get("rules", [])]
+        except FileNotFoundError:
+            rules = []
+        self._rules = {rule.id: rule for rule in rules}
+        self._signature = signature
+
+    def _save(self):
+        self.rules_file.parent.mkdir(parents=True, exist_ok=True)
+        document = {"rules": [asdict(rule) for rule in self._rules.values()]}
+        atomic_write_bytes(self.rules_file, fastjson.dumps_pretty(document).encode("utf-8"))
+        self._signature = file_signature(self.rules_file)
+
+    @property
+    def signature(self):
+        return file_signature(self.rules_file)
+
+    def rules(self) -> List[ScheduleRule]:
+        with self._lock:
+            self._refresh()
+            return list(self._rules.values())
+
+    def get(self, rule_id: str) -> Optional[ScheduleRule]:
+        with self._lock:
+            self._refresh()
+            return self._rules.get(rule_id)
+
+    def add(self, kind: str, **values) -> ScheduleRule:
+        rule = ScheduleRule(id=str(uuid.uuid4()), kind=kind, created_at=datetime.utcnow().isoformat(), **values)
+        check_rule(rule)
+        with self._lock, self._process_lock:
+            self._refresh()
+            self._rules[rule.id] = rule
+            self._save()
+            return rule
+
+    def update(self, rule_id: str, **values) -> Optional[ScheduleRule]:
+        """修改规则，只允许修改 RULE_FIELDS 中的字段"""
+        unknown = set(values) - RULE_FIELDS
+        if unknown:
+            raise ValueError(f"未知的规则字段: {', '.join(sorted(unknown))}")
+        with self._lock, self._process_lock:
+            self._refresh()
+            rule = self._rules.get(rule_id)
+            if rule is None:
+                return None
+            updated = ScheduleRule(**dict(asdict(rule), **values))
+            check_rule(updated)
+            self._rules[rule_id] = updated
+            self._save()
+            return updated
+
+    def remove(self, rule_id: str) -> bool:
+        with self._lock, self._process_lock:
+            self._refresh()
+            if self._rules.pop(rule_id, None) is None:
+                return False
+            self._save()
+            return True
+
+@dataclass
+class ScheduleRun:
+    """一次自动切换
+
+    trigger: cron(时间窗口开始)、cron_end(时间窗口结束)、max_active(超过最长激活时间)、condition(条件接口)
+    status: switched(已切换)或failed(切换失败)
+    """
+    at: str
+    rule_id: str
+    rule_name: Optional[str]
+    trigger: str
+    from_profile_id: Optional[str]
+    to_profile_id: str
+    to_name: Optional[str] = None
+    status: str = "switched"
+    error: Optional[str] = None
+
+class ScheduleLog:
+    """自动切换记录，每行一条JSON，只追加不改写"""
+
+    def __init__(self, log_file: Path):
+        self.log_file = Path(log_file)
+
+    def record(self, run: ScheduleRun):
+        self.log_file.parent.mkdir(parents=True, exist_ok=True)
+        # O_APPEND 保证多个进程同时追加时各行完整
+        fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, fastjson.dumps(asdict(run)) + b"\n")
+        finally:
+            os.close(fd)
+
+    def recent(self, limit: int = 50) -> List[ScheduleRun]:
+        """最近的limit条记录(从新到旧)，只从文件末尾向前读取需要的部分"""
+        try:
+            f = open(self.log_file, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            data, position = b"", end
+            while position > 0 and data.count(b"\n") <= limit:
+                step = min(64 * 1024, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+        lines = data[:data.rfind(b"\n") + 1].splitlines()
+        runs = []
+        for line in reversed(lines[-limit:] if position == 0 else lines[1:][-limit:]):
+            try:
+                runs.append(ScheduleRun(**fastjson.loads(line)))
+            except (ValueError, TypeError):
+                continue
+        return runs
@@ -7,7 +7,9 @@ import type {
   ApiConfigListResponse,
   ApplyConfigResponse,
   CurrentApiConfigResponse,
-  StatusResponse
+  StatusResponse,
+  ConfigEvent,
+  ConfigEventType
 } from '../types/api'
 
 // 动态获取API基础URL
@@ -17,6 +19,17 @@ const getApiBaseUrl = () => {
   return `http://${hostname}:50000/api/v1/api-config`
 }
 
+const CONFIG_EVENT_TYPES: ConfigEventType[] = [
+  'ready',
+  'resync',
+  'profile_created',
+  'profile_updated',
+  'profile_deleted',
+  'profile_activated',
+  'profiles_changed',
+  'settings_changed'
+]
+
 // 配置axios默认值
 const api = axios.create({
   baseURL: getApiBaseUrl(),
@@ -105,6 +118,23 @@ export class ApiConfigService {
     return response.data
   }
 
+  /**
+   * 订阅配置变更事件（SSE），断线后浏览器会携带Last-Event-ID自动续传
+   */
+  static subscribeEvents(onEvent: (event: ConfigEvent) => void): () => void {
+    const source = new EventSource(`${getApiBaseUrl()}/events`)
+    const handler = (message: MessageEvent) => {
+      try {
+        onEvent({ type: message.type as ConfigEventType, ...JSON.parse(message.data) })
+      } catch (error) {
+        console.error('解析配置事件失败:', error)
+      }
+    }
+
+    CONFIG_EVENT_TYPES.forEach(type => source.addEventListener(type, handler))
+    return () => source.close()
+  }
+
   /**
    * 测试API配置连接
    */
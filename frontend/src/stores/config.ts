@@ -4,7 +4,8 @@ import type {
   ApiConfigProfile, 
   CreateApiConfigRequest, 
   UpdateApiConfigRequest,
-  CurrentApiConfigResponse 
+  CurrentApiConfigResponse,
+  ConfigEvent
 } from '../types/api'
 import ApiConfigService from '../services/apiConfig'
 import { ElMessage, ElMessageBox } from 'element-plus'
@@ -215,6 +216,41 @@ export const useConfigStore = defineStore('config', () => {
     }
   }
 
+  // 服务端推送：收到变更事件时按需刷新，取代定时轮询
+  let unsubscribeEvents: (() => void) | null = null
+
+  const handleConfigEvent = (event: ConfigEvent) => {
+    switch (event.type) {
+      case 'ready':
+        break
+      case 'settings_changed':
+        fetchCurrentConfig()
+        break
+      case 'profile_activated':
+      case 'profile_updated':
+      case 'profile_deleted':
+      case 'resync':
+        fetchProfiles()
+        fetchCurrentConfig()
+        break
+      default:
+        fetchProfiles()
+    }
+  }
+
+  const connectEvents = () => {
+    if (!unsubscribeEvents) {
+      unsubscribeEvents = ApiConfigService.subscribeEvents(handleConfigEvent)
+    }
+  }
+
+  const disconnectEvents = () => {
+    if (unsubscribeEvents) {
+      unsubscribeEvents()
+      unsubscribeEvents = null
+    }
+  }
+
   // 初始化数据
   const initialize = async () => {
     await Promise.all([
@@ -244,6 +280,8 @@ export const useConfigStore = defineStore('config', () => {
     activateProfile,
     testConnection,
     backupConfig,
+    connectEvents,
+    disconnectEvents,
     initialize
   }
 })
\ No newline at end of file
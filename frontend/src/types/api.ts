@@ -20,10 +20,31 @@ export interface UpdateApiConfigRequest {
   base_url?: string
 }
 
+export interface LatencyPercentiles {
+  p50: number | null
+  p90: number | null
+  p99: number | null
+}
+
+export interface ProbeSummary {
+  base_url: string
+  samples: number
+  failures: number
+  last_checked: string | null
+  last_status: number | null
+  last_error: string | null
+  connect_ms: LatencyPercentiles
+  tls_ms: LatencyPercentiles
+  ttfb_ms: LatencyPercentiles
+}
+
 export interface ApiConfigListResponse {
   profiles: ApiConfigProfile[]
   active_profile_id: string | null
   total_count: number
+  revision?: number
+  next_cursor?: string | null
+  probes?: Record<string, ProbeSummary> | null
 }
 
 export interface ApplyConfigResponse {
@@ -47,6 +68,25 @@ export interface StatusResponse {
   claude_settings_exists: boolean
 }
 
+export type ConfigEventType =
+  | 'ready'
+  | 'resync'
+  | 'profile_created'
+  | 'profile_updated'
+  | 'profile_deleted'
+  | 'profile_activated'
+  | 'profiles_changed'
+  | 'settings_changed'
+
+export interface ConfigEvent {
+  type: ConfigEventType
+  version: number
+  timestamp: number
+  profile_id?: string
+  active_profile_id?: string | null
+  source?: string
+}
+
 export interface ApiResponse<T = unknown> {
   data?: T
   success?: boolean